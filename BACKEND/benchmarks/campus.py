@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+"""
+Benchmark de la API sobre un campus sintético a escala real.
+
+Genera una vez, en una base SQLite aparte (benchmarks/campus.sqlite3), un
+campus configurable (por defecto 500 salones, 5.000 docentes y 2.000.000 de
+reservas sin solapamientos a lo largo de 3 años, con el cargador de
+`manage.py poblar_db`) y mide en el mismo proceso,
+con django.test.Client (sin servidor HTTP ni red), los endpoints principales:
+
+- salones_horario  GET  /api/salones/?fecha=           listado con el horario del día
+- disponibles      GET  /api/salones/disponibles/      búsqueda de salones libres
+- ocupacion        GET  /api/salones/ocupacion/        rejilla de 30 días de todos los salones
+- crear_reserva    POST /api/reservas/                 alta con verificación de solapamiento
+- mis_reservas     GET  /api/reservas/mis_reservas/
+- login            POST /api/login/
+- metricas         GET  /api/reservas/metricas/        un año de agregados
+
+La generación es determinista (--semilla) y el campus se reutiliza mientras
+no cambien sus parámetros. Las reservas creadas durante la medición se
+revierten. El caché de respuestas se desactiva para medir el acceso a la base
+de datos. Los resultados (tiempos por endpoint, consultas SQL, commit) se
+guardan en JSON para comparar entre commits.
+
+Uso (desde BACKEND/):
+
+    python benchmarks/campus.py
+    python benchmarks/campus.py --salones 50 --docentes 500 --reservas 100000
+    python benchmarks/campus.py --salida antes.json
+    python benchmarks/campus.py --salida despues.json --comparar antes.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import cycle
+from pathlib import Path
+
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+def argumentos():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--salones', type=int, default=500)
+    parser.add_argument('--docentes', type=int, default=5000)
+    parser.add_argument('--reservas', type=int, default=2000000)
+    parser.add_argument('--anios', type=int, default=3, help='años de reservas')
+    parser.add_argument('--inicio', default='2024-01-01', help='primer día del campus (YYYY-MM-DD)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--base', default=str(BACKEND / 'benchmarks' / 'campus.sqlite3'),
+                        help='archivo SQLite del campus')
+    parser.add_argument('--regenerar', action='store_true', help='generar el campus aunque exista')
+    parser.add_argument('--repeticiones', type=int, default=20, help='peticiones medidas por endpoint')
+    parser.add_argument('--calentamiento', type=int, default=3, help='peticiones previas sin medir')
+    parser.add_argument('--salida', help='archivo JSON de resultados '
+                        '(por defecto benchmarks/resultados/campus-<commit>.json)')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior con el que comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='aumento relativo de la mediana considerado regresión (0.2 = 20%%)')
+    return parser.parse_args()
+
+
+def parametros_campus(args):
+    return {
+        'salones': args.salones,
+        'docentes': args.docentes,
+        'reservas': args.reservas,
+        'anios': args.anios,
+        'inicio': args.inicio,
+        'semilla': args.semilla,
+    }
+
+
+def preparar_django(args):
+    """Configurar Django sobre la base del campus (borrándola si hay que regenerarla)"""
+    base = Path(args.base)
+    meta = base.with_suffix('.json')
+    parametros = parametros_campus(args)
+    reutilizar = (
+        not args.regenerar and base.exists() and meta.exists()
+        and json.loads(meta.read_text(encoding='utf-8')) == parametros
+    )
+    if not reutilizar:
+        for archivo in (base, meta):
+            archivo.unlink(missing_ok=True)
+
+    os.environ.update({
+        'SQLITE_PATH': str(base),
+        'CACHE_BACKEND': 'none',
+        'DEBUG': 'False',
+        'ALLOWED_HOSTS': '*',
+        'PERFILADO': 'False',
+    })
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gecos_backend.settings')
+    sys.path.insert(0, str(BACKEND))
+    import django
+    django.setup()
+    return reutilizar, meta
+
+
+def generar_campus(args):
+    """Datos iniciales y campus sintético con el cargador de `manage.py poblar_db`"""
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', verbosity=0)
+    call_command(
+        'poblar_db', salones=args.salones, docentes=args.docentes, reservas=args.reservas,
+        anios=args.anios, inicio=args.inicio, semilla=args.semilla,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def fecha_central(args):
+    """Día hábil en la mitad del campus, usado en las consultas por fecha"""
+    inicio = date.fromisoformat(args.inicio)
+    dia = inicio + (inicio.replace(year=inicio.year + args.anios) - inicio) / 2
+    while dia.weekday() != 2:
+        dia += timedelta(days=1)
+    return dia
+
+
+def medir(peticion, repeticiones, calentamiento):
+    """Tiempos (ms) y consultas SQL de una petición repetida"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(calentamiento):
+        peticion()
+    tiempos = []
+    estados = set()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = peticion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        estados.add(respuesta.status_code)
+    # Las consultas se cuentan aparte: registrarlas agrega costo a la medición
+    with CaptureQueriesContext(connection) as consultas:
+        peticion()
+    tiempos.sort()
+    return {
+        'peticiones': repeticiones,
+        'estados': sorted(estados),
+        'media_ms': round(statistics.fmean(tiempos), 2),
+        'p50_ms': round(statistics.median(tiempos), 2),
+        'p95_ms': round(tiempos[min(int(len(tiempos) * 0.95), len(tiempos) - 1)], 2),
+        'min_ms': round(tiempos[0], 2),
+        'max_ms': round(tiempos[-1], 2),
+        'consultas': len(consultas),
+    }
+
+
+def medir_endpoints(args):
+    from django.db import transaction
+    from django.test import Client
+    from django.utils import timezone
+    from rest_framework.authtoken.models import Token
+    from salones.models import Salon
+    from salones.poblado import CLAVE_SINTETICA
+    from usuarios.models import Usuario
+    from reservas.models import Reserva
+
+    fecha = fecha_central(args)
+    docente = Usuario.objects.get(username='docente00001')
+    token, _ = Token.objects.get_or_create(user=docente)
+    cliente = Client(headers={'Authorization': f'Token {token.key}'})
+    anonimo = Client()
+
+    escenarios = {
+        'salones_horario': lambda: anonimo.get('/api/salones/', {'fecha': fecha.isoformat()}),
+        'disponibles': lambda: anonimo.get('/api/salones/disponibles/', {
+            'fecha': fecha.isoformat(), 'hora_inicio': '10:00', 'hora_fin': '12:00', 'capacidad': 30,
+        }),
+        'ocupacion': lambda: anonimo.get('/api/salones/ocupacion/', {
+            'desde': fecha.isoformat(), 'hasta': (fecha + timedelta(days=29)).isoformat(),
+        }),
+        'mis_reservas': lambda: cliente.get('/api/reservas/mis_reservas/'),
+        'login': lambda: anonimo.post(
+            '/api/login/', {'username': docente.username, 'password': CLAVE_SINTETICA},
+            content_type='application/json',
+        ),
+        'metricas': lambda: anonimo.get('/api/reservas/metricas/', {
+            'desde': (fecha - timedelta(days=182)).isoformat(),
+            'hasta': (fecha + timedelta(days=182)).isoformat(),
+        }),
+    }
+
+    resultados = {}
+    for nombre, peticion in escenarios.items():
+        resultados[nombre] = medir(peticion, args.repeticiones, args.calentamiento)
+        imprimir(nombre, resultados[nombre])
+
+    # Alta de reservas: solo se aceptan fechas futuras, así que las reservas
+    # del día central se copian a un día futuro y se mide el alta contra esa
+    # ocupación. Todo se revierte al terminar.
+    futuro = timezone.localdate() + timedelta(days=30)
+    with transaction.atomic():
+        copia = list(Reserva.objects.filter(fecha=fecha))
+        for reserva in copia:
+            reserva.pk = None
+            reserva.fecha = futuro
+        Reserva.objects.bulk_create(copia, batch_size=5000)
+        salones = cycle(Salon.objects.filter(reservas__fecha=futuro).distinct().order_by('id').values_list('id', flat=True))
+
+        def crear():
+            # 21:00 queda libre en todos los salones; cada alta se revierte
+            with transaction.atomic():
+                respuesta = cliente.post('/api/reservas/', {
+                    'salon': next(salones), 'fecha': futuro.isoformat(),
+                    'hora_inicio': '21:00', 'hora_fin': '22:00',
+                    'motivo': 'Benchmark', 'numero_asistentes': 5,
+                }, content_type='application/json')
+                transaction.set_rollback(True)
+            return respuesta
+
+        resultados['crear_reserva'] = medir(crear, args.repeticiones, args.calentamiento)
+        imprimir('crear_reserva', resultados['crear_reserva'])
+        transaction.set_rollback(True)
+    return resultados
+
+
+def imprimir(nombre, medicion):
+    print(
+        f"{nombre:<16} p50 {medicion['p50_ms']:>9.2f} ms  p95 {medicion['p95_ms']:>9.2f} ms  "
+        f"{medicion['consultas']:>4} consultas  estados {medicion['estados']}"
+    )
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, archivo, tolerancia):
+    """Imprimir la variación de la mediana frente a una ejecución anterior; True si hay regresiones"""
+    anterior = json.loads(Path(archivo).read_text(encoding='utf-8'))
+    if anterior.get('campus') != actual['campus']:
+        print('⚠️  Los campus de ambas ejecuciones tienen parámetros distintos')
+    print(f"\nComparación con {archivo} (commit {anterior.get('commit')}):")
+    regresiones = False
+    for nombre, medicion in actual['endpoints'].items():
+        previa = anterior.get('endpoints', {}).get(nombre)
+        if not previa:
+            continue
+        cambio = medicion['p50_ms'] / previa['p50_ms'] - 1 if previa['p50_ms'] else 0
+        marca = ''
+        if cambio > tolerancia:
+            marca = '  ⚠️  regresión'
+            regresiones = True
+        print(
+            f"{nombre:<16} {previa['p50_ms']:>9.2f} -> {medicion['p50_ms']:>9.2f} ms ({cambio:+.0%})  "
+            f"consultas {previa['consultas']} -> {medicion['consultas']}{marca}"
+        )
+    return regresiones
+
+
+def main():
+    args = argumentos()
+    reutilizar, meta = preparar_django(args)
+
+    generacion = None
+    if reutilizar:
+        print(f'Reutilizando el campus de {args.base}')
+    else:
+        print(f'Generando el campus en {args.base}...')
+        inicio = time.perf_counter()
+        generar_campus(args)
+        generacion = round(time.perf_counter() - inicio, 1)
+        meta.write_text(json.dumps(parametros_campus(args)), encoding='utf-8')
+        print(f'Campus generado en {generacion} s')
+
+    import django
+    commit = commit_actual()
+    resultados = {
+        'commit': commit,
+        'fecha_ejecucion': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'plataforma': platform.platform(),
+        'campus': parametros_campus(args),
+        'generacion_s': generacion,
+        'endpoints': medir_endpoints(args),
+    }
+
+    salida = Path(args.salida or BACKEND / 'benchmarks' / 'resultados' / f'campus-{commit or "sin-commit"}.json')
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultados, indent=2), encoding='utf-8')
+    print(f'Resultados guardados en {salida}')
+
+    if args.comparar and comparar(resultados, args.comparar, args.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
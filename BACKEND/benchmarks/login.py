@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Benchmark de logins por segundo por núcleo.
+
+El login es CPU: casi todo su costo es el hash de la contraseña. Por cada
+algoritmo y factor de trabajo indicados (PASSWORD_HASHER / PASSWORD_COSTO,
+ver usuarios/hashers.py) se lanza un proceso aparte, que usa un solo núcleo,
+sobre una base SQLite temporal y se mide con django.test.Client (sin
+servidor HTTP ni red) durante --duracion segundos cada escenario:
+
+- hash         check_password solo (el límite teórico)
+- correcto     POST /api/login/ con la contraseña correcta
+- incorrecto   contraseña incorrecta (también un solo hash)
+- inexistente  usuario que no existe (un hash ficticio, mismo tiempo)
+- bloqueado    intento rechazado por el límite de fallos (sin hash)
+
+Uso (desde BACKEND/):
+
+    python benchmarks/login.py
+    python benchmarks/login.py --hashers pbkdf2_sha256 scrypt --costos 0 600000 --duracion 5
+    python benchmarks/login.py --salida login.json
+
+Un costo 0 es el valor por defecto de Django para el algoritmo.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+BACKEND = Path(__file__).resolve().parent.parent
+CLAVE = 'Docente123!'
+
+
+def argumentos():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--hashers', nargs='+', default=['pbkdf2_sha256', 'scrypt'])
+    parser.add_argument('--costos', nargs='+', type=int, default=[0],
+                        help='factores de trabajo a medir (0 = el de Django)')
+    parser.add_argument('--duracion', type=float, default=3, help='segundos por escenario')
+    parser.add_argument('--salida', help='archivo JSON de resultados')
+    parser.add_argument('--medir', nargs=2, metavar=('HASHER', 'COSTO'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def por_segundo(funcion, duracion):
+    """Ejecuciones por segundo de `funcion` durante `duracion` segundos (tras una de calentamiento)"""
+    funcion()
+    total = 0
+    inicio = time.perf_counter()
+    while (transcurrido := time.perf_counter() - inicio) < duracion:
+        funcion()
+        total += 1
+    return round(total / transcurrido, 1)
+
+
+def medir(hasher, costo, duracion):
+    """Proceso hijo: logins por segundo de cada escenario con un algoritmo y costo"""
+    base = Path(tempfile.mkdtemp()) / 'login.sqlite3'
+    os.environ.update({
+        'SQLITE_PATH': str(base),
+        'CACHE_BACKEND': 'none',
+        'DEBUG': 'False',
+        'ALLOWED_HOSTS': '*',
+        'PERFILADO': 'False',
+        'PASSWORD_HASHER': hasher,
+        'PASSWORD_COSTO': str(costo or ''),
+        # Los fallos repetidos no deben bloquear salvo en el escenario 'bloqueado'
+        'LOGIN_FALLOS_USUARIO': str(10 ** 9),
+        'LOGIN_FALLOS_IP': str(10 ** 9),
+    })
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gecos_backend.settings')
+    sys.path.insert(0, str(BACKEND))
+    import logging
+    import django
+    django.setup()
+    from django.contrib.auth.hashers import check_password
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.utils import override_settings
+    from usuarios.models import Usuario
+
+    logging.disable(logging.WARNING)
+    call_command('migrate', verbosity=0)
+    usuario = Usuario.objects.create_user(username='docente', password=CLAVE, documento='1')
+    cliente = Client()
+
+    def login(username, password):
+        def peticion():
+            cliente.post('/api/login/', {'username': username, 'password': password},
+                         content_type='application/json')
+        return peticion
+
+    resultados = {'hash': por_segundo(lambda: check_password(CLAVE, usuario.password), duracion)}
+    resultados['correcto'] = por_segundo(login('docente', CLAVE), duracion)
+    resultados['incorrecto'] = por_segundo(login('docente', 'incorrecta'), duracion)
+    resultados['inexistente'] = por_segundo(login('nadie', CLAVE), duracion)
+    with override_settings(LOGIN_FALLOS_USUARIO=0):
+        resultados['bloqueado'] = por_segundo(login('docente', CLAVE), duracion)
+    base.unlink(missing_ok=True)
+    return {'logins_por_segundo': resultados}
+
+
+def main():
+    args = argumentos()
+    if args.medir:
+        hasher, costo = args.medir
+        print(json.dumps(medir(hasher, int(costo), args.duracion)))
+        return
+
+    resultados = []
+    for hasher in args.hashers:
+        for costo in args.costos:
+            proceso = subprocess.run(
+                [sys.executable, __file__, '--medir', hasher, str(costo), '--duracion', str(args.duracion)],
+                cwd=BACKEND, capture_output=True, text=True,
+            )
+            if proceso.returncode != 0:
+                print(f'{hasher} costo {costo or "por defecto"}: error\n{proceso.stderr.strip()}')
+                continue
+            medicion = json.loads(proceso.stdout.strip().splitlines()[-1])
+            medicion.update(hasher=hasher, costo=costo or None)
+            resultados.append(medicion)
+            por_escenario = '  '.join(
+                f'{nombre} {valor:>8.1f}/s' for nombre, valor in medicion['logins_por_segundo'].items()
+            )
+            print(f"{hasher:<14} costo {costo or 'por defecto':<11} {por_escenario}")
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps({
+            'fecha_ejecucion': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine(),
+            'resultados': resultados,
+        }, indent=2), encoding='utf-8')
+        print(f'Resultados guardados en {args.salida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+Benchmark de throughput: vistas síncronas por WSGI vs vistas asíncronas por ASGI.
+
+Levanta dos servidores sobre la misma base de datos (con el caché de
+respuestas desactivado para medir el acceso a la base de datos):
+
+- WSGI: gunicorn con workers de hilos (o `manage.py runserver` si gunicorn
+  no está instalado), sirviendo las vistas de DRF (/api/salones/, ...).
+- ASGI: uvicorn sirviendo las vistas asíncronas (/api/async/salones/, ...).
+
+y mide peticiones por segundo y latencias con 50, 200 y 1000 clientes
+concurrentes (conexiones keep-alive, un cliente = una conexión).
+
+Uso (desde BACKEND/, con la base de datos migrada y poblada):
+
+    python benchmarks/servidores.py
+    python benchmarks/servidores.py --clientes 50 200 --duracion 5 --salida resultados.json
+    python benchmarks/servidores.py --token <token>   # incluye mis_reservas
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def escenarios(fecha, token=None):
+    """Pares de rutas equivalentes (síncrona, asíncrona) a comparar"""
+    lista = [
+        ('salones', '/api/salones/', '/api/async/salones/', {'fecha': fecha}),
+        ('disponibles', '/api/salones/disponibles/', '/api/async/salones/disponibles/',
+         {'fecha': fecha, 'hora_inicio': '10:00', 'hora_fin': '12:00', 'capacidad': 20}),
+    ]
+    if token:
+        lista.append(('mis_reservas', '/api/reservas/mis_reservas/',
+                      '/api/async/reservas/mis_reservas/', {}))
+    return lista
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def comando_servidor(tipo, puerto, workers, hilos):
+    if tipo == 'asgi':
+        return [sys.executable, '-m', 'uvicorn', 'gecos_backend.asgi:application',
+                '--host', '127.0.0.1', '--port', str(puerto),
+                '--workers', str(workers), '--no-access-log', '--log-level', 'warning']
+    if shutil.which('gunicorn'):
+        return ['gunicorn', 'gecos_backend.wsgi:application',
+                '--bind', f'127.0.0.1:{puerto}', '--workers', str(workers),
+                '--threads', str(hilos), '--log-level', 'warning']
+    return [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{puerto}', '--noreload']
+
+
+def iniciar_servidor(tipo, workers, hilos):
+    puerto = puerto_libre()
+    entorno = {**os.environ, 'CACHE_BACKEND': 'none', 'DEBUG': 'False', 'ALLOWED_HOSTS': '*'}
+    proceso = subprocess.Popen(
+        comando_servidor(tipo, puerto, workers, hilos), cwd=BACKEND, env=entorno,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=0.5):
+                return proceso, puerto
+        except OSError:
+            time.sleep(0.2)
+    detener_servidor(proceso)
+    raise RuntimeError(f'El servidor {tipo} no respondió en el puerto {puerto}')
+
+
+def detener_servidor(proceso):
+    try:
+        os.killpg(proceso.pid, signal.SIGTERM)
+        proceso.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proceso.pid, signal.SIGKILL)
+
+
+async def _leer_respuesta(lector):
+    """(estado, cerrar): cerrar indica que el servidor no mantiene la conexión"""
+    cabeceras = await lector.readuntil(b'\r\n\r\n')
+    estado = int(cabeceras.split(b' ', 2)[1])
+    largo, cerrar = 0, False
+    for linea in cabeceras.split(b'\r\n')[1:]:
+        nombre, _, valor = linea.partition(b':')
+        nombre = nombre.strip().lower()
+        if nombre == b'content-length':
+            largo = int(valor)
+        elif nombre == b'connection' and valor.strip().lower() == b'close':
+            cerrar = True
+    await lector.readexactly(largo)
+    return estado, cerrar
+
+
+async def _cliente(puerto, peticion, fin, latencias, errores):
+    """Un cliente: una conexión keep-alive que repite la petición hasta `fin`"""
+    conexion = None
+    while time.monotonic() < fin:
+        try:
+            if conexion is None:
+                conexion = await asyncio.open_connection('127.0.0.1', puerto)
+            lector, escritor = conexion
+            inicio = time.monotonic()
+            escritor.write(peticion)
+            await escritor.drain()
+            estado, cerrar = await asyncio.wait_for(_leer_respuesta(lector), timeout=60)
+            latencias.append(time.monotonic() - inicio)
+            if estado != 200:
+                errores.append(estado)
+            if cerrar:
+                escritor.close()
+                conexion = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            errores.append('conexion')
+            if conexion is not None:
+                conexion[1].close()
+            conexion = None
+            await asyncio.sleep(0.05)
+    if conexion is not None:
+        conexion[1].close()
+
+
+async def medir(puerto, ruta, clientes, duracion, token=None):
+    cabeceras = [f'GET {ruta} HTTP/1.1', f'Host: 127.0.0.1:{puerto}', 'Accept: application/json']
+    if token:
+        cabeceras.append(f'Authorization: Token {token}')
+    peticion = ('\r\n'.join(cabeceras) + '\r\n\r\n').encode()
+    latencias, errores = [], []
+    inicio = time.monotonic()
+    fin = inicio + duracion
+    await asyncio.gather(*(
+        _cliente(puerto, peticion, fin, latencias, errores) for _ in range(clientes)
+    ))
+    transcurrido = time.monotonic() - inicio
+    latencias.sort()
+
+    def percentil(p):
+        return round(latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000, 1) if latencias else None
+
+    return {
+        'clientes': clientes,
+        'peticiones': len(latencias),
+        'errores': len(errores),
+        'rps': round((len(latencias) - len(errores)) / transcurrido, 1),
+        'latencia_ms': {
+            'media': round(statistics.fmean(latencias) * 1000, 1) if latencias else None,
+            'p50': percentil(0.50),
+            'p95': percentil(0.95),
+            'p99': percentil(0.99),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clientes', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--duracion', type=float, default=10, help='segundos por medición')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--hilos', type=int, default=4, help='hilos por worker WSGI')
+    parser.add_argument('--fecha', default=date.today().isoformat())
+    parser.add_argument('--token', help='token de un usuario para medir mis_reservas')
+    parser.add_argument('--salida', help='archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    # Cada cliente es una conexión abierta
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    objetivo = max(args.clientes) * 2 + 100
+    if blando < objetivo:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(objetivo, duro), duro))
+
+    resultados = {
+        'fecha': args.fecha,
+        'workers': args.workers,
+        'hilos_wsgi': args.hilos,
+        'servidor_wsgi': 'gunicorn' if shutil.which('gunicorn') else 'runserver',
+        'escenarios': {},
+    }
+    for tipo in ('wsgi', 'asgi'):
+        proceso, puerto = iniciar_servidor(tipo, args.workers, args.hilos)
+        try:
+            for nombre, ruta_sync, ruta_async, params in escenarios(args.fecha, args.token):
+                ruta = (ruta_sync if tipo == 'wsgi' else ruta_async) + (
+                    '?' + urlencode(params) if params else ''
+                )
+                for clientes in args.clientes:
+                    medicion = asyncio.run(medir(puerto, ruta, clientes, args.duracion, args.token))
+                    resultados['escenarios'].setdefault(nombre, {}).setdefault(tipo, []).append(medicion)
+                    print(
+                        f"{nombre:<14} {tipo:<5} {clientes:>5} clientes: {medicion['rps']:>8} req/s  "
+                        f"p50 {medicion['latencia_ms']['p50']} ms  p99 {medicion['latencia_ms']['p99']} ms  "
+                        f"errores {medicion['errores']}"
+                    )
+        finally:
+            detener_servidor(proceso)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2)
+        print(f'Resultados guardados en {args.salida}')
+
+
+if __name__ == '__main__':
+    main()
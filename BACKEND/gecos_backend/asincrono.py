@@ -0,0 +1,83 @@
+"""
+Utilidades para las vistas asíncronas (/api/async/...).
+
+Las vistas de DRF son síncronas. Las lecturas más usadas tienen además una
+versión asíncrona que, servida por ASGI (gecos_backend.asgi), permite a un
+proceso atender muchas peticiones a la vez mientras espera a la base de
+datos. Reutilizan los filtros y serializers de DRF: los querysets se
+construyen sin consultar, se evalúan con el ORM asíncrono y los serializers
+solo reciben objetos ya cargados.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from usuarios import autenticacion
+
+
+class PaginaInvalida(ValueError):
+    """Número de página inválido o fuera de rango"""
+
+
+def respuesta_json(datos, status=200):
+    # El encoder de DRF serializa fechas, horas y decimales igual que las vistas síncronas
+    return JsonResponse(datos, status=status, safe=False, encoder=JSONEncoder)
+
+
+async def usuario_de_peticion(request):
+    """Usuario autenticado por token (Authorization: Token ...) o por sesión, o None"""
+    tipo, _, clave = request.headers.get('Authorization', '').partition(' ')
+    if tipo.lower() == 'token':
+        clave = clave.strip()
+        # El LRU en memoria se consulta sin salir del hilo del event loop
+        token = None if autenticacion.compartido() else autenticacion.buscar(clave)
+        if token is None:
+            try:
+                token = await sync_to_async(autenticacion.autenticar)(clave)
+            except AuthenticationFailed:
+                return None
+        return token.user if token.user.is_active else None
+    usuario = await request.auser()
+    return usuario if usuario.is_authenticated else None
+
+
+def queryset_de_vista(clase_vista, request, accion='list'):
+    """
+    Queryset de `clase_vista` con sus filtros (django-filter, búsqueda,
+    orden) aplicados a los query params, sin ejecutar ninguna consulta.
+    Lanza ValidationError si un filtro es inválido.
+    """
+    vista = clase_vista(action=accion, format_kwarg=None, args=(), kwargs={})
+    vista.request = Request(request)
+    return vista.filter_queryset(vista.get_queryset())
+
+
+async def paginar(request, queryset):
+    """
+    Página ?page= de `queryset` con el formato de PageNumberPagination.
+    Devuelve (filas, {'count', 'next', 'previous'}).
+    """
+    tamano = api_settings.PAGE_SIZE
+    try:
+        numero = int(request.GET.get('page', 1))
+    except ValueError:
+        raise PaginaInvalida('Página inválida')
+    total = await queryset.acount()
+    inicio = (numero - 1) * tamano
+    if numero < 1 or (numero > 1 and inicio >= total):
+        raise PaginaInvalida('Página inválida')
+    filas = [fila async for fila in queryset[inicio:inicio + tamano]]
+
+    url = request.build_absolute_uri()
+    siguiente = replace_query_param(url, 'page', numero + 1) if inicio + tamano < total else None
+    if numero == 1:
+        anterior = None
+    elif numero == 2:
+        anterior = remove_query_param(url, 'page')
+    else:
+        anterior = replace_query_param(url, 'page', numero - 1)
+    return filas, {'count': total, 'next': siguiente, 'previous': anterior}
+
@@ -0,0 +1,126 @@
+"""
+Selección de campos en las respuestas de la API (sparse fieldsets).
+
+    GET /api/reservas/?fields=id,fecha,hora_inicio,salon_detalle.nombre
+    GET /api/reservas/?fields=id,fecha&expand=salon_detalle
+
+`fields` limita los campos de la respuesta (con `relacion.campo` para los
+objetos embebidos) y `expand` agrega objetos embebidos completos a esa
+selección. Los campos excluidos se quitan del serializer, por lo que sus
+SerializerMethodField no se calculan, y el queryset carga solo las columnas
+necesarias con only().
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _separar(valor):
+    return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+
+def campos_de_peticion(request):
+    """
+    Árbol de campos pedidos en ?fields= y ?expand=, o None si no se pidió
+    ninguna selección. Cada clave es un campo y su valor el subárbol de campos
+    del objeto embebido (None = todos sus campos).
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    fields = params.get('fields')
+    if not fields:
+        return None
+
+    arbol = {}
+    for ruta in _separar(fields):
+        nodo = arbol
+        *padres, hoja = ruta.split('.')
+        for parte in padres:
+            if parte in nodo and nodo[parte] is None:
+                # El objeto embebido ya se pidió completo
+                break
+            nodo = nodo.setdefault(parte, {})
+        else:
+            nodo[hoja] = None
+    for nombre in _separar(params.get('expand', '')):
+        arbol[nombre] = None
+    return arbol
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin para ModelSerializer que respeta ?fields= y ?expand=.
+
+    `dependencias` indica las columnas del modelo que usa cada campo que no
+    es una columna directa (SerializerMethodField, métodos del modelo).
+    """
+    dependencias = {}
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop('campos', None)
+        super().__init__(*args, **kwargs)
+        if campos is None and 'request' in getattr(self, '_context', {}):
+            campos = campos_de_peticion(self._context['request'])
+        if campos:
+            self.restringir(campos)
+
+    def restringir(self, campos):
+        """Quitar los campos que no están en el árbol `campos`"""
+        for nombre in list(self.fields):
+            if nombre not in campos:
+                self.fields.pop(nombre)
+                continue
+            subcampos = campos[nombre]
+            anidado = self.fields[nombre]
+            if subcampos and isinstance(anidado, CamposDinamicosMixin):
+                anidado.restringir(subcampos)
+
+    def columnas_modelo(self, prefijo=''):
+        """
+        Rutas para queryset.only() que cubren los campos actuales, o None si
+        algún campo tiene dependencias desconocidas.
+        """
+        modelo = self.Meta.model
+        columnas = {prefijo + modelo._meta.pk.name}
+        for nombre, campo in self.fields.items():
+            if nombre in self.dependencias:
+                columnas.update(prefijo + c for c in self.dependencias[nombre])
+                continue
+            if isinstance(campo, CamposDinamicosMixin):
+                anidadas = campo.columnas_modelo(prefijo + campo.source + '__')
+                if anidadas is None:
+                    return None
+                columnas.add(prefijo + campo.source)
+                columnas.update(anidadas)
+                continue
+            if campo.source == '*' or '.' in campo.source:
+                return None
+            try:
+                modelo._meta.get_field(campo.source)
+            except FieldDoesNotExist:
+                return None
+            columnas.add(prefijo + campo.source)
+        return columnas
+
+
+class CamposDinamicosViewSetMixin:
+    """
+    Mixin para ViewSets: aplica only() y select_related() según los campos
+    pedidos en ?fields= para las acciones de lectura.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if campos_de_peticion(self.request) is None:
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, CamposDinamicosMixin):
+            return queryset
+        columnas = serializer.columnas_modelo()
+        if columnas is None:
+            return queryset
+        relaciones = {c.rsplit('__', 1)[0] for c in columnas if '__' in c}
+        queryset = queryset.select_related(None)
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        return queryset.only(*columnas)
@@ -0,0 +1,75 @@
+"""
+Peticiones condicionales (ETag / Last-Modified) para los ViewSets.
+
+Los validadores salen de consultas baratas de agregación, max(fecha_actualizacion)
+y count(), sobre el mismo queryset filtrado que usaría la respuesta (y sobre
+los datos relacionados que la vista declare). Si el cliente envía un
+If-None-Match o If-Modified-Since vigente se responde 304 sin serializar nada.
+
+Los listados solo llevan ETag: una eliminación no cambia max(fecha_actualizacion),
+así que Last-Modified no bastaría para detectarla; el count() del ETag sí.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def _agregar(queryset):
+    return queryset.order_by().aggregate(
+        ultima=Max('fecha_actualizacion'), total=Count('pk')
+    )
+
+
+class ValidacionCondicionalMixin:
+    """Mixin para ViewSets con soporte de ETag / Last-Modified en list y retrieve"""
+
+    def validadores_extra(self, request, detalle=False):
+        """Querysets adicionales de los que depende la respuesta (datos embebidos)"""
+        return []
+
+    def calcular_validadores(self, request, queryset, detalle=False):
+        agregados = [_agregar(qs) for qs in [queryset, *self.validadores_extra(request, detalle)]]
+        partes = [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+        for agregado in agregados:
+            ultima = agregado['ultima']
+            partes.append(f"{agregado['total']}:{ultima.isoformat() if ultima else ''}")
+        etag = 'W/"%s"' % hashlib.sha1('|'.join(partes).encode()).hexdigest()
+        fechas = [a['ultima'] for a in agregados if a['ultima'] is not None]
+        return etag, max(fechas) if fechas else None
+
+    def respuesta_condicional(self, request, queryset, calcular, detalle=False):
+        etag, ultima = self.calcular_validadores(request, queryset, detalle)
+        # Last-Modified solo en el detalle (ver docstring del módulo)
+        ultima_ts = int(ultima.timestamp()) if (detalle and ultima) else None
+        respuesta = get_conditional_response(request, etag=etag, last_modified=ultima_ts)
+        if respuesta is not None:
+            return respuesta
+        response = calcular()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if ultima_ts is not None:
+                response['Last-Modified'] = http_date(ultima_ts)
+            # Permitir guardar la respuesta pero revalidarla siempre
+            response['Cache-Control'] = 'no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('count', '').lower() == 'false':
+            # El cliente pidió recorrer sin agregados sobre todo el conjunto
+            # (paginación por cursor, ver gecos_backend.paginacion)
+            return super().list(request, *args, **kwargs)
+        return self.respuesta_condicional(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(ValidacionCondicionalMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        return self.respuesta_condicional(
+            request,
+            self.get_queryset().filter(**{self.lookup_field: kwargs[lookup]}),
+            lambda: super(ValidacionCondicionalMixin, self).retrieve(request, *args, **kwargs),
+            detalle=True,
+        )
@@ -0,0 +1,183 @@
+"""
+Eventos en vivo (Server-Sent Events) para los clientes conectados.
+
+El código síncrono (señales, vistas) publica eventos con `publicar()` y las
+vistas asíncronas de streaming se suscriben al broker con un filtro. Cada
+suscriptor es una asyncio.Queue acotada: una conexión inactiva no ocupa un
+hilo ni hace consultas, solo espera en su cola.
+
+El broker se elige con el setting EVENTOS_BROKER (ruta a la clase). El de
+por defecto, BrokerMemoria, reparte los eventos dentro del proceso. Con
+varios procesos (gunicorn) se usa reservas.eventos.BrokerBaseDatos, que
+comparte los eventos a través de la base de datos; cualquier otro broker
+debe implementar la misma interfaz (publicar, suscribir, cancelar).
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+BROKER_POR_DEFECTO = 'gecos_backend.eventos.BrokerMemoria'
+
+# Eventos pendientes por suscriptor antes de considerarlo atrasado
+TAMANO_COLA = 100
+# Eventos recientes que se reenvían a un cliente que se reconecta (Last-Event-ID)
+TAMANO_HISTORIAL = 500
+# Segundos sin eventos tras los que se envía un comentario para mantener viva la conexión
+INTERVALO_PING = 15
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado"""
+
+    def __init__(self, filtro=None):
+        self.filtro = filtro
+        self.cola = asyncio.Queue(maxsize=TAMANO_COLA)
+        self.loop = asyncio.get_running_loop()
+        # Se perdieron eventos por cola llena: el cliente debe recargar
+        self.atrasada = False
+
+    def acepta(self, evento):
+        return self.filtro is None or self.filtro(evento)
+
+    def _encolar(self, evento):
+        if self.atrasada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.atrasada = True
+
+    def entregar(self, evento):
+        """Encolar el evento desde cualquier hilo"""
+        try:
+            self.loop.call_soon_threadsafe(self._encolar, evento)
+        except RuntimeError:
+            # El loop del suscriptor ya se cerró
+            pass
+
+    def marcar_atrasada(self):
+        """Pedir al cliente que recargue el estado, desde cualquier hilo"""
+        try:
+            self.loop.call_soon_threadsafe(setattr, self, 'atrasada', True)
+        except RuntimeError:
+            pass
+
+
+class BrokerMemoria:
+    """Broker en memoria del proceso (publicación desde cualquier hilo)"""
+
+    def __init__(self):
+        self._suscripciones = set()
+        self._historial = deque(maxlen=TAMANO_HISTORIAL)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publicar(self, tipo, datos):
+        with self._lock:
+            evento = {'id': next(self._ids), 'tipo': tipo, 'datos': datos}
+        self._repartir(evento)
+        return evento
+
+    def _repartir(self, evento):
+        """Guardar el evento en el historial y entregarlo a los suscriptores"""
+        with self._lock:
+            self._historial.append(evento)
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            if suscripcion.acepta(evento):
+                suscripcion.entregar(evento)
+
+    def suscribir(self, filtro=None, ultimo_id=None):
+        """
+        Nueva suscripción (llamar desde el loop del cliente). Con `ultimo_id`
+        se encolan los eventos posteriores que sigan en el historial.
+        """
+        suscripcion = Suscripcion(filtro)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+            pendientes = [
+                evento for evento in self._historial
+                if ultimo_id is not None and evento['id'] > ultimo_id
+            ]
+        for evento in pendientes:
+            if suscripcion.acepta(evento):
+                suscripcion._encolar(evento)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def tiene_suscriptores(self):
+        return bool(self._suscripciones)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def obtener_broker():
+    """Instancia única del broker configurado en EVENTOS_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                clase = import_string(getattr(settings, 'EVENTOS_BROKER', BROKER_POR_DEFECTO))
+                _broker = clase()
+    return _broker
+
+
+def publicar(tipo, datos, detalle=None):
+    """
+    Publicar un evento cuando se confirme la transacción actual (de inmediato
+    si no hay una). El evento siempre queda en el historial del broker, para
+    los clientes que se reconectan con Last-Event-ID. `detalle` es una
+    función opcional cuyo resultado se agrega a `datos` solo si hay
+    suscriptores: sin ellos el evento se guarda sin esas claves.
+    """
+    def enviar():
+        broker = obtener_broker()
+        completos = dict(datos)
+        if detalle is not None and getattr(broker, 'tiene_suscriptores', lambda: True)():
+            completos.update(detalle())
+        broker.publicar(tipo, completos)
+    transaction.on_commit(enviar)
+
+
+def formato_sse(evento):
+    """Texto de un evento en formato text/event-stream"""
+    datos = json.dumps(evento['datos'], cls=DjangoJSONEncoder)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
+
+
+async def flujo_sse(filtro=None, ultimo_id=None, intervalo_ping=INTERVALO_PING):
+    """Generador asíncrono de eventos SSE para StreamingHttpResponse"""
+    broker = obtener_broker()
+    suscripcion = broker.suscribir(filtro, ultimo_id)
+    try:
+        # Tiempo de reconexión sugerido al navegador (ms)
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), intervalo_ping)
+            except asyncio.TimeoutError:
+                if suscripcion.atrasada and suscripcion.cola.empty():
+                    yield 'event: recargar\ndata: {}\n\n'
+                    suscripcion.atrasada = False
+                else:
+                    yield ': ping\n\n'
+                continue
+            yield formato_sse(evento)
+            if suscripcion.atrasada and suscripcion.cola.empty():
+                # Se descartaron eventos: pedir al cliente que recargue el estado
+                yield 'event: recargar\ndata: {}\n\n'
+                suscripcion.atrasada = False
+    finally:
+        broker.cancelar(suscripcion)
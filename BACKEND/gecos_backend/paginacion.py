@@ -0,0 +1,139 @@
+"""
+Paginación por cursor (keyset) con compatibilidad de paginación por número.
+
+Con ?page= (o sin parámetros) se comporta como PageNumberPagination. Con
+?cursor= (vacío para la primera página) se pagina por keyset sobre el orden
+`orden_keyset` de la vista: cada página filtra "después de la última fila
+vista" en lugar de usar OFFSET, así que su costo no depende de la
+profundidad. El cursor es opaco (base64 de los valores de la última fila).
+
+?count=false omite el COUNT(*) total en el modo cursor.
+"""
+import base64
+import json
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """Paginación por número o por cursor keyset según los query params"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.orden = getattr(view, 'orden_keyset', None)
+        self.modo_cursor = bool(self.orden) and self.cursor_query_param in request.query_params
+        if not self.modo_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.campos = [
+            (campo.lstrip('-'), campo.startswith('-')) for campo in self.orden
+        ]
+        self.modelo = queryset.model
+
+        valores, atras = self.decodificar_cursor(request.query_params[self.cursor_query_param])
+
+        self.total = None
+        if request.query_params.get(self.count_query_param, 'true').lower() != 'false':
+            self.total = queryset.count()
+
+        # Si la vista limitó las columnas con only(), cargar también las del cursor
+        cargadas, diferidas = queryset.query.deferred_loading
+        if cargadas and not diferidas:
+            queryset = queryset.only(*cargadas, *(campo for campo, _ in self.campos))
+
+        orden = self.orden if not atras else [self.invertir(c) for c in self.orden]
+        pagina = queryset.order_by(*orden)
+        if valores is not None:
+            pagina = pagina.filter(self.filtro_despues(valores, atras))
+        filas = list(pagina[:self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        if atras:
+            filas.reverse()
+
+        self.filas = filas
+        if atras:
+            self.tiene_siguiente = valores is not None
+            self.tiene_anterior = hay_mas
+        else:
+            self.tiene_siguiente = hay_mas
+            self.tiene_anterior = valores is not None
+        return filas
+
+    @staticmethod
+    def invertir(campo):
+        return campo[1:] if campo.startswith('-') else '-' + campo
+
+    def filtro_despues(self, valores, atras=False):
+        """
+        Filas posteriores a `valores` en el orden de paginación:
+        (a > x) OR (a = x AND b > y) OR ... respetando la dirección de cada campo.
+        """
+        filtro = Q()
+        iguales = Q()
+        for (campo, descendente), valor in zip(self.campos, valores):
+            operador = 'lt' if descendente != atras else 'gt'
+            filtro |= iguales & Q(**{f'{campo}__{operador}': valor})
+            iguales &= Q(**{campo: valor})
+        return filtro
+
+    def codificar_cursor(self, fila, atras=False):
+        valores = []
+        for campo, _ in self.campos:
+            valor = getattr(fila, campo)
+            valores.append(valor.isoformat() if hasattr(valor, 'isoformat') else valor)
+        datos = json.dumps({'v': valores, 'a': atras}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+    def decodificar_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            relleno = '=' * (-len(cursor) % 4)
+            datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+            valores = [
+                self.modelo._meta.get_field(campo).to_python(valor)
+                for (campo, _), valor in zip(self.campos, datos['v'], strict=True)
+            ]
+            return valores, bool(datos.get('a'))
+        except (ValueError, TypeError, KeyError):
+            raise NotFound('Cursor inválido')
+
+    def url_con_cursor(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.modo_cursor:
+            return super().get_next_link()
+        if not self.tiene_siguiente or not self.filas:
+            return None
+        return self.url_con_cursor(self.codificar_cursor(self.filas[-1]))
+
+    def get_previous_link(self):
+        if not self.modo_cursor:
+            return super().get_previous_link()
+        if not self.tiene_anterior or not self.filas:
+            return None
+        return self.url_con_cursor(self.codificar_cursor(self.filas[0], atras=True))
+
+    def get_paginated_response(self, data):
+        if not self.modo_cursor:
+            return super().get_paginated_response(data)
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.total is not None:
+            respuesta = {'count': self.total, **respuesta}
+        return Response(respuesta)
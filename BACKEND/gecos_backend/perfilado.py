@@ -0,0 +1,291 @@
+"""
+Perfilado de peticiones (opcional, activar con PERFILADO=True).
+
+PerfiladoMiddleware mide por petición el tiempo total, la cantidad y el
+tiempo de las consultas SQL, las consultas repetidas (misma SQL con distintos
+parámetros, el síntoma de un N+1) y el tiempo de serialización de DRF. Los
+expone en la cabecera Server-Timing (visible en las herramientas de
+desarrollo del navegador) y los guarda en un archivo SQLite aparte
+(PERFILADO_ARCHIVO) con las últimas PERFILADO_MAXIMO peticiones, que lee el
+comando `python manage.py reporte_perfilado`.
+
+Funciona igual bajo WSGI y ASGI: la petición en curso viaja en un
+ContextVar, que asgiref copia a los hilos de sync_to_async, y cada conexión
+a la base de datos (de cualquier hilo) registra sus consultas en el perfil
+de la petición que las ejecuta.
+
+Desactivado, el middleware se retira al iniciar (MiddlewareNotUsed) y no
+agrega ningún costo.
+"""
+import contextvars
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+# Consultas repetidas que se reportan por petición
+MAX_REPETIDAS = 3
+
+_perfil_actual = contextvars.ContextVar('perfil_actual', default=None)
+
+
+def huella(sql):
+    """SQL normalizada: listas IN (%s, %s, ...) y números literales colapsados"""
+    sql = re.sub(r'\(\s*%s(?:\s*,\s*%s)*\s*\)', '(%s...)', sql)
+    return re.sub(r'\b\d+\b', '?', sql)
+
+
+class Perfil:
+    """Mediciones de una petición"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.db = 0.0
+        self.serializacion = 0.0
+        self.huellas = Counter()
+        self._profundidad = 0
+
+    def registrar_consulta(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - inicio
+            self.consultas += 1
+            self.huellas[huella(sql)] += 1
+
+    def repetidas(self):
+        """[(huella, veces)] de las consultas ejecutadas más de una vez"""
+        return [(sql, n) for sql, n in self.huellas.most_common(MAX_REPETIDAS) if n > 1]
+
+
+def _registrar_consulta(execute, sql, params, many, context):
+    """execute_wrapper permanente: mide la consulta si hay una petición perfilada"""
+    perfil = _perfil_actual.get()
+    if perfil is None:
+        return execute(sql, params, many, context)
+    return perfil.registrar_consulta(execute, sql, params, many, context)
+
+
+def _instalar_en_conexion(connection, **kwargs):
+    if _registrar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_registrar_consulta)
+
+
+def _instalar_medicion_consultas():
+    # Las conexiones ya abiertas en este hilo y todas las que se abran después,
+    # en cualquier hilo (las vistas asíncronas consultan desde otros hilos)
+    for conexion in connections.all():
+        _instalar_en_conexion(conexion)
+    connection_created.connect(_instalar_en_conexion, dispatch_uid='perfilado')
+
+
+def _medir_serializacion(propiedad):
+    """Envolver la propiedad `data` de los serializers para medir su tiempo"""
+    def data(self):
+        perfil = _perfil_actual.get()
+        if perfil is None:
+            return propiedad.fget(self)
+        # Solo cuenta el serializer más externo (ListSerializer.data llama a super().data)
+        perfil._profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return propiedad.fget(self)
+        finally:
+            perfil._profundidad -= 1
+            if perfil._profundidad == 0:
+                perfil.serializacion += time.perf_counter() - inicio
+    return property(data)
+
+
+def _instalar_medicion_serializers():
+    from rest_framework import serializers
+    for clase in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        propiedad = clase.__dict__.get('data')
+        if propiedad is not None and not getattr(propiedad.fget, '_perfilado', False):
+            envuelta = _medir_serializacion(propiedad)
+            envuelta.fget._perfilado = True
+            clase.data = envuelta
+
+
+class Almacen:
+    """Últimas peticiones perfiladas en un archivo SQLite (compartido entre procesos)"""
+    ESQUEMA = '''
+        CREATE TABLE IF NOT EXISTS peticion (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha REAL NOT NULL,
+            metodo TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            ruta TEXT NOT NULL,
+            estado INTEGER NOT NULL,
+            total_ms REAL NOT NULL,
+            consultas INTEGER NOT NULL,
+            db_ms REAL NOT NULL,
+            serializacion_ms REAL NOT NULL,
+            repetidas INTEGER NOT NULL,
+            huella_repetida TEXT
+        )
+    '''
+    # Cada cuántas inserciones se recorta la tabla a `maximo` filas
+    RECORTE = 100
+
+    def __init__(self, archivo, maximo):
+        self.archivo = str(archivo)
+        self.maximo = maximo
+        self._local = threading.local()
+        self._inserciones = 0
+
+    def conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.archivo, timeout=5)
+            conexion.execute(self.ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    def guardar(self, fila):
+        conexion = self.conexion()
+        with conexion:
+            conexion.execute(
+                'INSERT INTO peticion (fecha, metodo, endpoint, ruta, estado, total_ms, consultas, '
+                'db_ms, serializacion_ms, repetidas, huella_repetida) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', fila
+            )
+            self._inserciones += 1
+            if self._inserciones % self.RECORTE == 0:
+                conexion.execute(
+                    'DELETE FROM peticion WHERE id <= (SELECT MAX(id) FROM peticion) - ?',
+                    (self.maximo,)
+                )
+
+    def leer(self, desde=None):
+        """Filas guardadas (desde el timestamp `desde` si se indica)"""
+        conexion = self.conexion()
+        conexion.row_factory = sqlite3.Row
+        consulta = 'SELECT * FROM peticion'
+        parametros = ()
+        if desde is not None:
+            consulta += ' WHERE fecha >= ?'
+            parametros = (desde,)
+        return conexion.execute(consulta, parametros).fetchall()
+
+    def limpiar(self):
+        conexion = self.conexion()
+        with conexion:
+            conexion.execute('DELETE FROM peticion')
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(int(len(valores) * p), len(valores) - 1)]
+
+
+def resumen_endpoints(filas):
+    """
+    Estadísticas por (método, endpoint): peticiones, tiempos (media, p95,
+    máximo), consultas (media, máximo), tiempo en la base de datos y en
+    serialización, consultas repetidas y la huella repetida más frecuente.
+    """
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault((fila['metodo'], fila['endpoint']), []).append(fila)
+
+    resumen = []
+    for (metodo, endpoint), grupo in grupos.items():
+        n = len(grupo)
+        totales = [f['total_ms'] for f in grupo]
+        huellas = Counter(f['huella_repetida'] for f in grupo if f['huella_repetida'])
+        resumen.append({
+            'metodo': metodo,
+            'endpoint': endpoint,
+            'peticiones': n,
+            'total_media': sum(totales) / n,
+            'total_p95': _percentil(totales, 0.95),
+            'total_max': max(totales),
+            'consultas_media': sum(f['consultas'] for f in grupo) / n,
+            'consultas_max': max(f['consultas'] for f in grupo),
+            'db_media': sum(f['db_ms'] for f in grupo) / n,
+            'serializacion_media': sum(f['serializacion_ms'] for f in grupo) / n,
+            'repetidas_media': sum(f['repetidas'] for f in grupo) / n,
+            'huella_repetida': huellas.most_common(1)[0][0] if huellas else None,
+        })
+    return resumen
+
+
+def obtener_almacen():
+    return Almacen(
+        getattr(settings, 'PERFILADO_ARCHIVO', settings.BASE_DIR / 'perfilado.sqlite3'),
+        getattr(settings, 'PERFILADO_MAXIMO', 10000),
+    )
+
+
+class PerfiladoMiddleware:
+    """Middleware de perfilado (ver el docstring del módulo)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFILADO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.almacen = obtener_almacen()
+        _instalar_medicion_consultas()
+        _instalar_medicion_serializers()
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        perfil = Perfil()
+        token = _perfil_actual.set(perfil)
+        try:
+            response = self.get_response(request)
+        finally:
+            _perfil_actual.reset(token)
+        fila = self.medir(request, response, perfil)
+        self.almacen.guardar(fila)
+        return response
+
+    async def __acall__(self, request):
+        perfil = Perfil()
+        token = _perfil_actual.set(perfil)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _perfil_actual.reset(token)
+        fila = self.medir(request, response, perfil)
+        # El almacén escribe en un archivo SQLite: fuera del event loop
+        await sync_to_async(self.almacen.guardar)(fila)
+        return response
+
+    def medir(self, request, response, perfil):
+        """Agregar Server-Timing a la respuesta y devolver la fila para el almacén"""
+        total = (time.perf_counter() - perfil.inicio) * 1000
+        db = perfil.db * 1000
+        serializacion = perfil.serializacion * 1000
+        repetidas = perfil.repetidas()
+        veces_repetidas = sum(n - 1 for _, n in perfil.huellas.items() if n > 1)
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={total:.1f}',
+            f'db;dur={db:.1f};desc="{perfil.consultas} consultas"',
+            f'serializer;dur={serializacion:.1f}',
+            f'repetidas;desc="{veces_repetidas} consultas repetidas"',
+        ])
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        endpoint = coincidencia.view_name if coincidencia else request.path
+        return (
+            time.time(), request.method, endpoint, request.path, response.status_code,
+            round(total, 2), perfil.consultas, round(db, 2), round(serializacion, 2),
+            veces_repetidas, repetidas[0][0] if repetidas else None,
+        )
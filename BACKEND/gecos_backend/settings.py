@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -65,6 +66,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Perfilado por petición, solo con PERFILADO=True (ver gecos_backend/perfilado.py)
+    'gecos_backend.perfilado.PerfiladoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe ir temprano
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,6 +97,32 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'gecos_backend.wsgi.application'
+ASGI_APPLICATION = 'gecos_backend.asgi.application'
+
+# Perfilado de peticiones: cabecera Server-Timing y reporte con
+# `python manage.py reporte_perfilado`
+PERFILADO = os.environ.get('PERFILADO', 'False') == 'True'
+PERFILADO_ARCHIVO = os.environ.get('PERFILADO_ARCHIVO', str(BASE_DIR / 'perfilado.sqlite3'))
+PERFILADO_MAXIMO = int(os.environ.get('PERFILADO_MAXIMO', '10000'))
+
+# Horario de operación de los salones (HH:MM) y minutos por franja del
+# horario diario (5, 10, 15, 20, 30 o 60). HORARIOS_BLOQUE fija el horario de
+# bloques concretos ("Bloque A=07:00-21:00,Bloque B=08:00-18:00"); un salón
+# con hora_apertura y hora_cierre propias usa las suyas.
+HORARIO_APERTURA = os.environ.get('HORARIO_APERTURA', '06:00')
+HORARIO_CIERRE = os.environ.get('HORARIO_CIERRE', '22:00')
+HORARIO_GRANULARIDAD = int(os.environ.get('HORARIO_GRANULARIDAD', '60'))
+HORARIOS_BLOQUE = {
+    bloque.strip(): tuple(hora.strip() for hora in rango.split('-'))
+    for bloque, _, rango in (
+        parte.partition('=') for parte in os.environ.get('HORARIOS_BLOQUE', '').split(',') if '=' in parte
+    )
+}
+
+# Broker de eventos en vivo (/api/eventos/ocupacion/, ver gecos_backend/eventos.py).
+# El broker en memoria solo reparte eventos dentro de un proceso; con varios
+# procesos usar reservas.eventos.BrokerBaseDatos.
+EVENTOS_BROKER = os.environ.get('EVENTOS_BROKER', 'gecos_backend.eventos.BrokerMemoria')
 
 
 # Database
@@ -102,11 +131,81 @@ WSGI_APPLICATION = 'gecos_backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLITE_PATH permite usar otra base (p. ej. el campus de benchmarks/campus.py)
+        'NAME': os.environ.get('SQLITE_PATH') or BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Espera máxima por el bloqueo de escritura; el alta de reservas
+            # lo toma al comenzar su transacción (ver reservas/bloqueos.py)
+            'timeout': 20,
+        },
+        # Base de pruebas en archivo (no en memoria compartida) para que las
+        # pruebas con varios hilos esperen el bloqueo en lugar de fallar
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Caché (respuestas de salones, ver salones/cache.py)
+# CACHE_BACKEND=locmem (por defecto, un caché por proceso), file (compartido
+# entre procesos del mismo servidor) o none (desactivado)
+_cache_backend = os.environ.get('CACHE_BACKEND', 'locmem')
+_cache_timeout = int(os.environ.get('CACHE_TIMEOUT', '300'))
+if _cache_backend == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+            'TIMEOUT': _cache_timeout,
+        }
+    }
+elif _cache_backend == 'none':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gecos',
+            'TIMEOUT': _cache_timeout,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Si el caché `default` llega a todos los procesos que sirven la API: por
+# defecto solo con CACHE_BACKEND=file. El índice de intervalos en memoria
+# (reservas/indice.py) solo guarda entradas con un caché compartido; con un
+# único proceso puede activarse también con locmem.
+CACHE_COMPARTIDO = os.environ.get('CACHE_COMPARTIDO', str(_cache_backend == 'file')) == 'True'
+
+# Caché de autenticación por token (ver usuarios/autenticacion.py): entradas
+# y segundos de vigencia del LRU de cada proceso. Con varios procesos,
+# AUTH_TOKEN_CACHE_COMPARTIDO=True lo respalda en el caché `default` para que
+# un logout o una desactivación lleguen a todos al instante; es el valor por
+# defecto con un caché compartido (CACHE_COMPARTIDO). Sin él, un cambio hecho
+# en otro proceso se ve al vencer la entrada, por eso la vigencia por defecto
+# es más corta.
+AUTH_TOKEN_CACHE_MAXIMO = int(os.environ.get('AUTH_TOKEN_CACHE_MAXIMO', '10000'))
+AUTH_TOKEN_CACHE_COMPARTIDO = os.environ.get(
+    'AUTH_TOKEN_CACHE_COMPARTIDO', str(CACHE_COMPARTIDO)
+) == 'True'
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get(
+    'AUTH_TOKEN_CACHE_TTL', '300' if AUTH_TOKEN_CACHE_COMPARTIDO else '30'
+))
+
+# Contadores de intentos fallidos de login: siempre en memoria del proceso,
+# para no agregar E/S al login (cada proceso lleva su propia cuenta)
+CACHES['login'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'gecos-login',
+    'OPTIONS': {'MAX_ENTRIES': 100000},
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -126,6 +225,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Algoritmo de las contraseñas nuevas (pbkdf2_sha256, scrypt, argon2 o
+# bcrypt_sha256) y su factor de trabajo (ver usuarios/hashers.py). Los hashes
+# guardados con otro algoritmo o costo se recalculan en el siguiente login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2_sha256')
+PASSWORD_COSTO = int(os.environ['PASSWORD_COSTO']) if os.environ.get('PASSWORD_COSTO') else None
+_password_hashers = {
+    'pbkdf2_sha256': 'usuarios.hashers.PBKDF2Hasher',
+    'scrypt': 'usuarios.hashers.ScryptHasher',
+    'argon2': 'usuarios.hashers.Argon2Hasher',
+    'bcrypt_sha256': 'usuarios.hashers.BCryptSHA256Hasher',
+}
+if PASSWORD_HASHER not in _password_hashers:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER={PASSWORD_HASHER!r} no es válido; usar uno de: {', '.join(_password_hashers)}"
+    )
+PASSWORD_HASHERS = [_password_hashers[PASSWORD_HASHER]] + [
+    ruta for nombre, ruta in _password_hashers.items() if nombre != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Intentos fallidos de login permitidos por usuario y por IP en cada ventana
+# de LOGIN_VENTANA segundos (ver usuarios/intentos.py)
+LOGIN_FALLOS_USUARIO = int(os.environ.get('LOGIN_FALLOS_USUARIO', '5'))
+LOGIN_FALLOS_IP = int(os.environ.get('LOGIN_FALLOS_IP', '50'))
+LOGIN_VENTANA = int(os.environ.get('LOGIN_VENTANA', '300'))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -166,7 +291,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'usuarios.autenticacion.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -23,8 +23,10 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from salones.views import SalonViewSet
-from reservas.views import ReservaViewSet, AsignaturaViewSet
+from reservas.views import ReservaViewSet, AsignaturaViewSet, eventos_ocupacion
 from usuarios.views import UsuarioViewSet, login_view, logout_view
+from salones import views_async as salones_async
+from reservas import views_async as reservas_async
 
 # Configuración de Swagger/OpenAPI
 schema_view = get_schema_view(
@@ -52,6 +54,13 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/login/', login_view, name='login'),
     path('api/logout/', logout_view, name='logout'),
+    path('api/eventos/ocupacion/', eventos_ocupacion, name='eventos-ocupacion'),
+    
+    # Versiones asíncronas de las lecturas más usadas (servir por ASGI)
+    path('api/async/salones/', salones_async.lista, name='salones-async'),
+    path('api/async/salones/disponibles/', salones_async.disponibles, name='salones-disponibles-async'),
+    path('api/async/salones/<int:pk>/horario/', salones_async.horario, name='salon-horario-async'),
+    path('api/async/reservas/mis_reservas/', reservas_async.mis_reservas, name='mis-reservas-async'),
     
     # Swagger/OpenAPI URLs
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -0,0 +1,77 @@
+"""
+Configuración de gunicorn para producción (ver docker-compose.yml).
+
+    gunicorn -c gunicorn.conf.py
+
+Variables de entorno:
+
+    GUNICORN_WORKER_CLASS  gthread (WSGI con hilos, por defecto) o asgi (uvicorn)
+    GUNICORN_WORKERS       procesos; por defecto 2 x núcleos + 1 (gthread) o núcleos (asgi)
+                           con CACHE_BACKEND=file, y 1 con los demás cachés
+    GUNICORN_THREADS       hilos por proceso gthread (por defecto 4)
+    GUNICORN_BIND          dirección de escucha (por defecto 0.0.0.0:8000)
+    GUNICORN_TIMEOUT       segundos antes de reiniciar un worker bloqueado (por defecto 60)
+    GUNICORN_MAX_REQUESTS  peticiones antes de reciclar un worker (por defecto 5000, 0 = nunca)
+
+Las vistas de DRF son síncronas: bajo ASGI se ejecutan de a una por proceso,
+así que se sirven con gthread. Los workers asgi son para el flujo de eventos
+(/api/eventos/) y las lecturas asíncronas (/api/async/).
+
+Con varios procesos el caché debe ser compartido (CACHE_BACKEND=file, el
+valor de la imagen de Docker): con locmem cada worker tendría su propio
+caché y no vería las invalidaciones de los demás, así que en ese caso se
+usa un único worker salvo que GUNICORN_WORKERS indique otra cosa.
+
+La aplicación se carga en el proceso maestro antes de crear los workers
+(preload_app), que comparten esa memoria. Señales al maestro:
+
+    HUP   reinicia los workers de forma ordenada (terminan sus peticiones)
+    USR2  arranca un maestro nuevo con el código actualizado; luego WINCH y
+          QUIT al anterior para retirarlo sin cortar conexiones
+    TERM  apagado ordenado (espera graceful_timeout)
+"""
+import multiprocessing
+import os
+
+
+def _entero(nombre, defecto):
+    # Una variable vacía (por ejemplo desde docker-compose) usa el valor por defecto
+    valor = os.environ.get(nombre)
+    return int(valor) if valor else defecto
+
+
+_clase = os.environ.get('GUNICORN_WORKER_CLASS') or 'gthread'
+_nucleos = multiprocessing.cpu_count()
+_cache_compartido = os.environ.get('CACHE_BACKEND') == 'file'
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:8000'
+
+if _clase == 'asgi':
+    wsgi_app = 'gecos_backend.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    workers = _entero('GUNICORN_WORKERS', _nucleos if _cache_compartido else 1)
+else:
+    wsgi_app = 'gecos_backend.wsgi:application'
+    worker_class = 'gthread'
+    workers = _entero('GUNICORN_WORKERS', 2 * _nucleos + 1 if _cache_compartido else 1)
+    threads = _entero('GUNICORN_THREADS', 4)
+
+preload_app = True
+
+timeout = _entero('GUNICORN_TIMEOUT', 60)
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar los workers periódicamente (con desfase para no reiniciarlos a la vez)
+max_requests = _entero('GUNICORN_MAX_REQUESTS', 5000)
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL') or 'info'
+
+
+def post_fork(server, worker):
+    # Las conexiones abiertas por el maestro al precargar no se comparten
+    from django.db import connections
+    connections.close_all()
@@ -0,0 +1,382 @@
+"""
+Asignación de salones a un lote de demandas (planeación del semestre).
+
+Cada demanda pide un salón para `asistentes` personas, con ciertos recursos
+(tiene_*), en alguna de sus ventanas candidatas (fecha, hora_inicio,
+hora_fin). El motor busca la asignación que atiende la mayor cantidad de
+demandas y, entre esas, desperdicia la menor capacidad (suma de capacidad
+del salón - asistentes).
+
+Es un emparejamiento bipartito de costo mínimo entre demandas y pares
+(salón, grupo de ventanas), resuelto con el algoritmo primal-dual: en cada
+fase, Dijkstra con potenciales encuentra la longitud de los caminos de
+aumento más baratos y se aumenta por un conjunto de caminos disjuntos de
+costo reducido cero. Un grupo reúne las ventanas de un día que se solapan
+entre sí, así que un salón recibe a lo sumo una demanda por grupo y las
+asignaciones nunca se pisan. Cuando las ventanas de cada día coinciden o son
+disjuntas (los bloques horarios habituales) el resultado es óptimo. Las
+demandas que quedan sin salón se intentan ubicar después en cualquier hueco
+libre.
+
+Para acotar el grafo, cada demanda se conecta en cada grupo solo con los
+salones factibles más ajustados, hasta que hay más de los que podrían ocupar
+las otras demandas del grupo que caben en ellos: uno siempre le queda libre,
+así que no se pierde el óptimo.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from django.db import transaction
+from django.utils import timezone
+
+from salones.cache import invalidar_fechas
+from salones.disponibilidad import RECURSOS
+from salones.horarios import jornada_de
+from salones.models import Salon
+from .bloqueos import bloquear_salones_fechas
+from .eventos import publicar_reserva
+from .models import ESTADOS_OCUPAN, Reserva
+from . import resumen, indice
+
+
+def _mascara_recursos(recursos):
+    return sum(1 << RECURSOS.index(recurso) for recurso in recursos)
+
+
+def _grupos(ventanas):
+    """
+    {(fecha, inicio, fin): grupo} uniendo, en cada fecha, las ventanas que se
+    solapan entre sí (directamente o a través de otras)
+    """
+    grupos = {}
+    grupo = -1
+    fecha_actual = fin_grupo = None
+    for fecha, inicio, fin in sorted(ventanas):
+        if fecha != fecha_actual or inicio >= fin_grupo:
+            grupo += 1
+            fecha_actual, fin_grupo = fecha, fin
+        else:
+            fin_grupo = max(fin_grupo, fin)
+        grupos[(fecha, inicio, fin)] = grupo
+    return grupos
+
+
+def emparejar(adyacencia, n_derecha):
+    """
+    Emparejamiento de máxima cardinalidad y, entre esos, de costo mínimo.
+
+    `adyacencia[u]` es la lista de aristas (v, costo) de cada vértice u de la
+    izquierda, con costos enteros no negativos. Devuelve la pareja de cada u
+    (índice de la derecha o -1).
+    """
+    n = len(adyacencia)
+    pareja_izq = [-1] * n
+    pareja_der = [-1] * n_derecha
+    # Costo reducido de u -> v: costo + pot_izq[u] - pot_der[v] (nunca negativo)
+    pot_izq = [0] * n
+    pot_der = [0] * n_derecha
+    pot_t = 0
+    infinito = float('inf')
+
+    while True:
+        # Dijkstra desde todas las demandas libres hasta el sumidero t
+        dist_izq = [infinito] * n
+        dist_der = [infinito] * n_derecha
+        cola = []
+        for u in range(n):
+            if pareja_izq[u] < 0:
+                dist_izq[u] = 0
+                cola.append((0, u))
+        heapq.heapify(cola)
+        dist_t = infinito
+        while cola:
+            d, x = heapq.heappop(cola)
+            if d >= dist_t:
+                break
+            if x < n:
+                if d > dist_izq[x]:
+                    continue
+                base = d + pot_izq[x]
+                propia = pareja_izq[x]
+                for v, costo in adyacencia[x]:
+                    nd = base + costo - pot_der[v]
+                    if nd < dist_der[v] and v != propia:
+                        dist_der[v] = nd
+                        heapq.heappush(cola, (nd, n + v))
+            else:
+                v = x - n
+                if d > dist_der[v]:
+                    continue
+                u = pareja_der[v]
+                if u < 0:
+                    dist_t = min(dist_t, d + pot_der[v] - pot_t)
+                else:
+                    # La arista emparejada invertida tiene costo reducido cero
+                    if d < dist_izq[u]:
+                        dist_izq[u] = d
+                        heapq.heappush(cola, (d, u))
+        if dist_t == infinito:
+            break
+
+        for u in range(n):
+            pot_izq[u] += min(dist_izq[u], dist_t)
+        for v in range(n_derecha):
+            pot_der[v] += min(dist_der[v], dist_t)
+        pot_t += dist_t
+
+        # Aumentar por caminos disjuntos de aristas con costo reducido cero
+        visitado = bytearray(n_derecha)
+        for inicio in range(n):
+            if pareja_izq[inicio] >= 0:
+                continue
+            pila = [(inicio, iter(adyacencia[inicio]))]
+            camino = []
+            while pila:
+                u, aristas = pila[-1]
+                for v, costo in aristas:
+                    if visitado[v] or v == pareja_izq[u] or costo + pot_izq[u] != pot_der[v]:
+                        continue
+                    visitado[v] = 1
+                    camino.append(v)
+                    siguiente = pareja_der[v]
+                    if siguiente < 0:
+                        if pot_der[v] == pot_t:
+                            for (u_i, _), v_i in zip(pila, camino):
+                                pareja_izq[u_i] = v_i
+                                pareja_der[v_i] = u_i
+                            pila = []
+                        else:
+                            camino.pop()
+                            continue
+                    else:
+                        pila.append((siguiente, iter(adyacencia[siguiente])))
+                    break
+                else:
+                    pila.pop()
+                    if camino:
+                        camino.pop()
+    return pareja_izq
+
+
+def planificar(demandas, salones=None):
+    """
+    Plan de asignación de un lote de demandas.
+
+    Cada demanda es un dict con 'asistentes', 'recursos' (nombres tiene_*) y
+    'ventanas' [(fecha, hora_inicio, hora_fin)] en orden de preferencia. Se
+    consideran los salones disponibles (o los de `salones`), su horario de
+    operación y las reservas existentes; las ventanas pasadas se ignoran.
+    Devuelve, por demanda, None o un dict con salon, fecha, hora_inicio,
+    hora_fin y desperdicio.
+    """
+    if salones is None:
+        salones = Salon.objects.filter(estado='disponible')
+    salones = sorted(salones, key=lambda salon: (salon.capacidad, salon.pk))
+    capacidades = [salon.capacidad for salon in salones]
+    recursos = [
+        _mascara_recursos([r for r in RECURSOS if getattr(salon, r)]) for salon in salones
+    ]
+    horarios = []
+    for salon in salones:
+        jornada = jornada_de(salon)
+        horarios.append((indice.segundos(jornada.apertura), indice.segundos(jornada.cierre)))
+
+    ahora = timezone.localtime(timezone.now())
+    ahora = (ahora.date(), ahora.time())
+    ventanas = [
+        [
+            (fecha, indice.segundos(inicio), indice.segundos(fin))
+            for fecha, inicio, fin in demanda['ventanas']
+            if fin > inicio and (fecha, inicio) >= ahora
+        ]
+        for demanda in demandas
+    ]
+    fechas = {fecha for lista in ventanas for fecha, _, _ in lista}
+    ocupacion = indice.intervalos_varios([salon.pk for salon in salones], fechas)
+    grupos = _grupos({ventana for lista in ventanas for ventana in lista})
+    # Asistentes (ordenados) de las demandas que compiten por cada grupo
+    competidores = defaultdict(list)
+    for demanda, lista in zip(demandas, ventanas):
+        for grupo in {grupos[ventana] for ventana in lista}:
+            competidores[grupo].append(demanda['asistentes'])
+    for asistentes in competidores.values():
+        asistentes.sort()
+
+    # Salones factibles (índices por capacidad) de cada ventana y recursos;
+    # las demandas de un lote suelen repetir los mismos bloques horarios
+    factibles = {}
+
+    def factibles_de(ventana, requeridos):
+        clave = (ventana, requeridos)
+        if clave not in factibles:
+            fecha, inicio, fin = ventana
+            factibles[clave] = [
+                i for i, salon in enumerate(salones)
+                if recursos[i] & requeridos == requeridos
+                and horarios[i][0] <= inicio and fin <= horarios[i][1]
+                and not ocupacion[(salon.pk, fecha)].hay_solapamiento(inicio, fin)
+            ]
+        return factibles[clave]
+
+    # Aristas: demanda -> (salón, grupo). El costo es el desperdicio y, a
+    # igual desperdicio, la posición de la ventana en el orden de preferencia
+    preferencias = 1 + max(map(len, ventanas), default=0)
+    nodos = {}
+    adyacencia = []
+    elegida = []
+    for demanda, lista in zip(demandas, ventanas):
+        asistentes = demanda['asistentes']
+        requeridos = _mascara_recursos(demanda.get('recursos', ()))
+        mejores = {}
+        for preferencia, ventana in enumerate(lista):
+            grupo = grupos[ventana]
+            candidatos = factibles_de(ventana, requeridos)
+            rivales = competidores[grupo]
+            primero = bisect_left(candidatos, bisect_left(capacidades, asistentes))
+            anterior = None
+            for tomados, i in enumerate(candidatos[primero:]):
+                # Si los `tomados` salones anteriores superan a las otras
+                # demandas que caben en ellos, alguno le queda libre
+                if tomados and tomados >= bisect_right(rivales, capacidades[anterior]):
+                    break
+                anterior = i
+                nodo = nodos.setdefault((i, grupo), len(nodos))
+                costo = (capacidades[i] - asistentes) * preferencias + preferencia
+                if nodo not in mejores or costo < mejores[nodo][0]:
+                    mejores[nodo] = (costo, i, ventana)
+        adyacencia.append([(nodo, costo) for nodo, (costo, _, _) in mejores.items()])
+        elegida.append(mejores)
+
+    parejas = emparejar(adyacencia, len(nodos))
+
+    plan = []
+    nuevas = defaultdict(list)
+    for demanda, nodo, mejores in zip(demandas, parejas, elegida):
+        if nodo < 0:
+            plan.append(None)
+            continue
+        _, i, (fecha, inicio, fin) = mejores[nodo]
+        nuevas[(i, fecha)].append((inicio, fin))
+        plan.append((i, fecha, inicio, fin, capacidades[i] - demanda['asistentes']))
+
+    # Demandas sin salón: cualquier hueco libre, también en grupos ya usados
+    for posicion, (demanda, lista) in enumerate(zip(demandas, ventanas)):
+        if plan[posicion] is not None:
+            continue
+        requeridos = _mascara_recursos(demanda.get('recursos', ()))
+        minimo = bisect_left(capacidades, demanda['asistentes'])
+        huecos = []
+        for ventana in lista:
+            fecha, inicio, fin = ventana
+            candidatos = factibles_de(ventana, requeridos)
+            for i in candidatos[bisect_left(candidatos, minimo):]:
+                if all(fin <= a or inicio >= b for a, b in nuevas[(i, fecha)]):
+                    huecos.append((i, ventana))
+                    break
+        if huecos:
+            i, (fecha, inicio, fin) = min(huecos, key=lambda hueco: hueco[0])
+            nuevas[(i, fecha)].append((inicio, fin))
+            plan[posicion] = (i, fecha, inicio, fin, capacidades[i] - demanda['asistentes'])
+
+    return [
+        None if asignada is None else {
+            'salon': salones[asignada[0]],
+            'fecha': asignada[1],
+            'hora_inicio': indice.hora(asignada[2]),
+            'hora_fin': indice.hora(asignada[3]),
+            'desperdicio': asignada[4],
+        }
+        for asignada in plan
+    ]
+
+
+def crear_asignadas(usuario, demandas, plan):
+    """
+    Crear en bloque las reservas del plan en una única transacción.
+
+    Cada (salón, fecha) se bloquea y el plan se vuelve a verificar contra las
+    reservas existentes con una sola consulta, por si cambiaron desde que se
+    calculó. Devuelve (reservas_creadas, {posición de la demanda: id o None}).
+    """
+    asignadas = [(posicion, paso) for posicion, paso in enumerate(plan) if paso is not None]
+    with transaction.atomic():
+        claves = sorted({(paso['salon'].pk, paso['fecha']) for _, paso in asignadas})
+        bloquear_salones_fechas(claves)
+
+        existentes = defaultdict(list)
+        if claves:
+            filas = Reserva.objects.filter(
+                salon_id__in={salon_id for salon_id, _ in claves},
+                fecha__in={fecha for _, fecha in claves},
+            ).order_by().values_list('salon_id', 'fecha', 'hora_inicio', 'hora_fin', 'estado')
+            for salon_id, fecha, inicio, fin, estado in filas:
+                existentes[(salon_id, fecha)].append((inicio, fin, estado in ESTADOS_OCUPAN))
+
+        nuevas = []
+        posiciones = []
+        for posicion, paso in asignadas:
+            clave = (paso['salon'].pk, paso['fecha'])
+            inicio, fin = paso['hora_inicio'], paso['hora_fin']
+            # Solapamiento con una reserva activa o misma hora de inicio (restricción única)
+            if any(
+                (ocupa and a < fin and b > inicio) or a == inicio
+                for a, b, ocupa in existentes[clave]
+            ):
+                continue
+            existentes[clave].append((inicio, fin, True))
+            demanda = demandas[posicion]
+            nuevas.append(Reserva(
+                usuario=usuario, salon=paso['salon'], fecha=paso['fecha'],
+                hora_inicio=inicio, hora_fin=fin,
+                motivo=demanda['motivo'],
+                descripcion=demanda.get('descripcion', ''),
+                numero_asistentes=demanda['asistentes'],
+            ))
+            posiciones.append(posicion)
+
+        creadas = Reserva.objects.bulk_create(nuevas, batch_size=500)
+        # bulk_create no emite señales (ver reservas.recurrencia)
+        resumen.aplicar(resumen.agregar_reservas(creadas))
+        invalidar_fechas(*{reserva.fecha for reserva in creadas})
+        for reserva in creadas:
+            indice.descartar(reserva.salon_id, reserva.fecha)
+        for reserva in creadas:
+            publicar_reserva('creada', reserva)
+
+    ids = dict.fromkeys(posicion for posicion, _ in asignadas)
+    ids.update((posicion, reserva.pk) for posicion, reserva in zip(posiciones, creadas))
+    return creadas, ids
+
+
+def resultado(demandas, plan, ids=None):
+    """Respuesta del plan (y de las reservas creadas, si se indican sus ids)"""
+    asignaciones = []
+    sin_asignar = []
+    for posicion, (demanda, paso) in enumerate(zip(demandas, plan)):
+        if paso is None or (ids is not None and ids.get(posicion) is None):
+            sin_asignar.append({
+                'demanda': posicion,
+                'referencia': demanda.get('referencia', ''),
+                'motivo': 'sin_salon' if paso is None else 'conflicto',
+            })
+            continue
+        entrada = {
+            'demanda': posicion,
+            'referencia': demanda.get('referencia', ''),
+            'salon': paso['salon'].pk,
+            'codigo': paso['salon'].codigo,
+            'fecha': paso['fecha'],
+            'hora_inicio': paso['hora_inicio'],
+            'hora_fin': paso['hora_fin'],
+            'desperdicio': paso['desperdicio'],
+        }
+        if ids is not None:
+            entrada['id'] = ids[posicion]
+        asignaciones.append(entrada)
+    return {
+        'demandas': len(demandas),
+        'asignadas': len(asignaciones),
+        'desperdicio': sum(a['desperdicio'] for a in asignaciones),
+        'asignaciones': asignaciones,
+        'sin_asignar': sin_asignar,
+    }
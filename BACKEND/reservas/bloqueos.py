@@ -0,0 +1,104 @@
+"""
+Reserva sin condiciones de carrera.
+
+La validación de solapamiento del serializer es una lectura separada del
+INSERT: dos peticiones simultáneas para el mismo salón pueden pasarla ambas.
+Aquí la verificación y la escritura se repiten dentro de una transacción que
+serializa solo las escrituras del mismo (salón, fecha):
+
+- PostgreSQL: pg_advisory_xact_lock(salon_id, día) y, como garantía final, la
+  restricción de exclusión reserva_sin_solape (migración 0006).
+- Motores con SELECT ... FOR UPDATE: bloqueo de la fila del salón.
+- SQLite: una escritura sin efecto sobre la fila del salón toma el bloqueo
+  de escritura de la base al comenzar la transacción, como BEGIN IMMEDIATE
+  pero solo en este camino (el resto de las transacciones, incluidas las de
+  solo lectura, siguen siendo DEFERRED).
+
+Las reservas de salones distintos nunca esperan entre sí (salvo en SQLite,
+que solo admite un escritor a la vez).
+"""
+from django.db import IntegrityError, connection, transaction
+from rest_framework import serializers
+
+from salones.models import Salon
+from .models import Reserva
+
+
+MENSAJE_SOLAPAMIENTO = 'Ya existe una reserva confirmada o pendiente en este horario para este salón.'
+
+
+class ReservaSolapada(serializers.ValidationError):
+    """Otra reserva ocupa el salón en ese horario"""
+
+    def __init__(self):
+        super().__init__({'non_field_errors': [MENSAJE_SOLAPAMIENTO]})
+
+
+def bloquear_salon_fecha(salon_id, fecha):
+    """
+    Tomar el bloqueo de (salon_id, fecha) hasta el final de la transacción
+    actual. Debe llamarse dentro de transaction.atomic().
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [salon_id, fecha.toordinal()])
+    elif connection.features.has_select_for_update:
+        list(Salon.objects.select_for_update().filter(pk=salon_id).values_list('pk'))
+    elif connection.vendor == 'sqlite':
+        # Debe ser la primera sentencia de la transacción: así espera el
+        # bloqueo (timeout) en lugar de fallar al pasar de lectura a escritura
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Salon._meta.db_table} SET id = id WHERE id = %s', [salon_id]
+            )
+
+
+def bloquear_salones_fechas(claves):
+    """
+    Tomar los bloqueos de varios (salon_id, fecha) en orden, para que dos
+    transacciones nunca los esperen en orden inverso. En SQLite el primero
+    ya bloquea toda la base y los demás sobran.
+    """
+    claves = sorted(set(claves))
+    if connection.vendor == 'sqlite':
+        claves = claves[:1]
+    for salon_id, fecha in claves:
+        bloquear_salon_fecha(salon_id, fecha)
+
+
+def guardar_sin_solapamiento(serializer, **kwargs):
+    """
+    Guardar una reserva (alta o edición) verificando el solapamiento bajo el
+    bloqueo de su salón y fecha. Lanza ReservaSolapada si hay conflicto.
+    """
+    datos = serializer.validated_data
+    instancia = serializer.instance
+    salon = datos.get('salon') or instancia.salon
+    fecha = datos.get('fecha') or instancia.fecha
+    inicio = datos.get('hora_inicio') or instancia.hora_inicio
+    fin = datos.get('hora_fin') or instancia.hora_fin
+
+    try:
+        with transaction.atomic():
+            bloquear_salon_fecha(salon.pk, fecha)
+            if Reserva.objects.solapadas(
+                salon, fecha, inicio, fin,
+                excluir=instancia.pk if instancia else None
+            ).exists():
+                raise ReservaSolapada()
+            return serializer.save(**kwargs)
+    except IntegrityError as error:
+        # La restricción de exclusión es la autoridad final; cualquier otra
+        # violación (hora de inicio repetida, claves foráneas...) no es un
+        # solapamiento y se propaga
+        if _restriccion(error) == 'reserva_sin_solape' or Reserva.objects.solapadas(
+            salon, fecha, inicio, fin, excluir=instancia.pk if instancia else None
+        ).exists():
+            raise ReservaSolapada()
+        raise
+
+
+def _restriccion(error):
+    """Nombre de la restricción violada (PostgreSQL), o None"""
+    diagnostico = getattr(error.__cause__, 'diag', None)
+    return getattr(diagnostico, 'constraint_name', None)
@@ -0,0 +1,192 @@
+"""
+Sincronización incremental de reservas (/api/reservas/cambios/?desde=).
+
+Devuelve las reservas creadas o modificadas desde un instante (por el índice
+sobre fecha_actualizacion) y los ids de las eliminadas, que quedan
+registradas en ReservaEliminada. La respuesta incluye `hasta`, que el cliente
+envía como `desde` en la siguiente sincronización.
+
+Cada página trae a lo sumo LIMITE reservas y LIMITE eliminaciones. Si quedan
+más, la respuesta incluye `siguiente`: un cursor opaco que el cliente envía
+como ?cursor= (con los mismos filtros) para continuar dentro de la misma
+ventana [desde, hasta). Reservas y eliminaciones avanzan cada una por su
+propio orden (fecha, id); como una reserva eliminada ya no aparece entre
+las reservas, aplicarlas página por página nunca revive una eliminada.
+
+Una transacción que guarda una reserva puede confirmarse unos instantes
+después de su fecha_actualizacion; por eso cada consulta repite los últimos
+MARGEN segundos. Los clientes deben aplicar primero las eliminaciones y
+luego las reservas, reemplazando por id.
+
+Las eliminaciones se guardan RETENCION; un `desde` más antiguo ya no puede
+responderse completo (CambiosVencidos, 410) y el cliente debe volver a
+cargar el listado.
+"""
+import base64
+import json
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ReservaEliminada
+
+
+MARGEN = timedelta(seconds=5)
+LIMITE = 500
+# Las eliminaciones más antiguas se borran periódicamente
+RETENCION = timedelta(days=30)
+ELIMINACIONES_ENTRE_PURGAS = 100
+
+# Filtros del listado que también se aplican a las eliminaciones
+FILTROS_ELIMINADAS = {'salon': 'salon_id', 'usuario': 'usuario_id', 'fecha': 'fecha'}
+
+_eliminaciones = 0
+
+
+class CambiosInvalidos(ValueError):
+    """Parámetros inválidos para la consulta de cambios"""
+
+
+class CambiosVencidos(Exception):
+    """El instante pedido es anterior a la retención de las eliminaciones"""
+
+
+def _instante(valor):
+    try:
+        # Un '+' sin codificar en la URL llega como espacio
+        instante = parse_datetime(valor.strip().replace(' ', '+'))
+    except ValueError:
+        instante = None
+    if instante is not None and timezone.is_naive(instante):
+        instante = timezone.make_aware(instante)
+    return instante
+
+
+def instante_desde_parametros(params):
+    """Leer ?desde= (fecha y hora ISO 8601, obligatorio) de los query params"""
+    valor = params.get('desde')
+    if not valor:
+        raise CambiosInvalidos("El parámetro 'desde' es obligatorio")
+    instante = _instante(valor)
+    if instante is None:
+        raise CambiosInvalidos("'desde' debe ser una fecha y hora ISO 8601")
+    return instante
+
+
+def codificar_cursor(ventana):
+    datos = {
+        'desde': ventana['desde'].isoformat(),
+        'hasta': ventana['hasta'].isoformat(),
+        'r': [ventana['reservas'][0].isoformat(), ventana['reservas'][1]] if ventana['reservas'] else None,
+        'e': [ventana['eliminadas'][0].isoformat(), ventana['eliminadas'][1]] if ventana['eliminadas'] else None,
+    }
+    return base64.urlsafe_b64encode(json.dumps(datos, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        ventana = {'desde': _instante(datos['desde']), 'hasta': _instante(datos['hasta'])}
+        for clave, corta in (('reservas', 'r'), ('eliminadas', 'e')):
+            posicion = datos[corta]
+            ventana[clave] = (_instante(posicion[0]), int(posicion[1])) if posicion else None
+            if posicion and ventana[clave][0] is None:
+                raise ValueError
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        raise CambiosInvalidos('Cursor inválido')
+    if ventana['desde'] is None or ventana['hasta'] is None:
+        raise CambiosInvalidos('Cursor inválido')
+    return ventana
+
+
+def ventana_desde_parametros(params):
+    """
+    Ventana de la consulta: un ?cursor= de una página anterior o una nueva
+    desde ?desde= hasta ahora. Lanza CambiosInvalidos o CambiosVencidos.
+    """
+    cursor = params.get('cursor')
+    if cursor:
+        ventana = decodificar_cursor(cursor)
+    else:
+        ventana = {
+            'desde': instante_desde_parametros(params), 'hasta': timezone.now(),
+            'reservas': None, 'eliminadas': None,
+        }
+    if ventana['desde'] - MARGEN < timezone.now() - RETENCION:
+        raise CambiosVencidos()
+    return ventana
+
+
+def _despues_de(campo_fecha, posicion):
+    if posicion is None:
+        return Q()
+    instante, ultimo_id = posicion
+    return Q(**{f'{campo_fecha}__gt': instante}) | Q(**{campo_fecha: instante, 'id__gt': ultimo_id})
+
+
+def cambios_desde(queryset, ventana, params=None):
+    """
+    Una página de cambios de la ventana: reservas de `queryset` modificadas
+    e ids de reservas eliminadas en [desde - MARGEN, hasta), después de las
+    posiciones de la ventana. Devuelve (reservas, eliminadas, siguiente),
+    donde `siguiente` es el cursor de la próxima página o None.
+    """
+    inicio = ventana['desde'] - MARGEN
+    hasta = ventana['hasta']
+    reservas = list(queryset.filter(
+        _despues_de('fecha_actualizacion', ventana['reservas']),
+        fecha_actualizacion__gte=inicio,
+        fecha_actualizacion__lt=hasta,
+    ).order_by('fecha_actualizacion', 'id')[:LIMITE + 1])
+
+    eliminadas = ReservaEliminada.objects.filter(
+        _despues_de('fecha_eliminacion', ventana['eliminadas']),
+        fecha_eliminacion__gte=inicio,
+        fecha_eliminacion__lt=hasta,
+    )
+    for param, campo in FILTROS_ELIMINADAS.items():
+        valor = (params or {}).get(param)
+        if valor:
+            eliminadas = eliminadas.filter(**{campo: valor})
+    eliminadas = list(
+        eliminadas.order_by('fecha_eliminacion', 'id')
+                  .values_list('fecha_eliminacion', 'id', 'reserva_id')[:LIMITE + 1]
+    )
+
+    siguiente = None
+    if len(reservas) > LIMITE or len(eliminadas) > LIMITE:
+        reservas, eliminadas = reservas[:LIMITE], eliminadas[:LIMITE]
+        siguiente = codificar_cursor({
+            'desde': ventana['desde'],
+            'hasta': hasta,
+            'reservas': (
+                (reservas[-1].fecha_actualizacion, reservas[-1].pk) if reservas else ventana['reservas']
+            ),
+            'eliminadas': eliminadas[-1][:2] if eliminadas else ventana['eliminadas'],
+        })
+    # Una reserva puede eliminarse una sola vez, pero sin repetir ids por si acaso
+    ids = list(dict.fromkeys(reserva_id for _, _, reserva_id in eliminadas))
+    return reservas, ids, siguiente
+
+
+def purgar_eliminadas():
+    """Borrar las eliminaciones registradas hace más de RETENCION"""
+    return ReservaEliminada.objects.filter(
+        fecha_eliminacion__lt=timezone.now() - RETENCION
+    ).delete()[0]
+
+
+def registrar_eliminacion(reserva):
+    """Registrar la eliminación de `reserva` y purgar las vencidas de vez en cuando"""
+    global _eliminaciones
+    ReservaEliminada.objects.create(
+        reserva_id=reserva.pk,
+        salon_id=reserva.salon_id,
+        usuario_id=reserva.usuario_id,
+        fecha=reserva.fecha,
+    )
+    _eliminaciones += 1
+    if _eliminaciones % ELIMINACIONES_ENTRE_PURGAS == 0:
+        purgar_eliminadas()
@@ -0,0 +1,214 @@
+"""
+Eventos de reservas para los clientes conectados (ver gecos_backend.eventos).
+
+Tipos: reserva_creada, reserva_confirmada, reserva_actualizada,
+reserva_cancelada y horario (cambio de ocupación de un salón en una fecha
+sin reserva asociada, por ejemplo la fecha anterior de una reserva movida).
+
+Cada evento lleva `salon` y `fecha` para filtrar, y el horario del día del
+salón (`horario`) ya recalculado. El horario se calcula solo si hay clientes
+conectados: un evento publicado sin ellos queda en el historial sin
+`horario` y quien lo reciba al reconectarse debe volver a pedir ese día.
+
+BrokerBaseDatos es el broker para varios procesos (EVENTOS_BROKER).
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from django.db import DatabaseError, connection
+from django.db.models import Max, Min
+from django.utils import timezone
+from gecos_backend import eventos
+from gecos_backend.eventos import TAMANO_COLA, BrokerMemoria, Suscripcion
+from salones.horarios import construir_horarios
+from .models import EventoOcupacion
+
+
+logger = logging.getLogger(__name__)
+
+
+def datos_reserva(reserva):
+    return {
+        'id': reserva.pk,
+        'salon': reserva.salon_id,
+        'fecha': reserva.fecha,
+        'hora_inicio': reserva.hora_inicio,
+        'hora_fin': reserva.hora_fin,
+        'estado': reserva.estado,
+        'motivo': reserva.motivo,
+    }
+
+
+def _horario(salon_id, fecha):
+    return construir_horarios([salon_id], fecha)[salon_id]
+
+
+def publicar_horario(salon_id, fecha):
+    eventos.publicar('horario', {
+        'salon': salon_id,
+        'fecha': fecha.isoformat(),
+    }, lambda: {'horario': _horario(salon_id, fecha)})
+
+
+def publicar_reserva(tipo, reserva):
+    """Publicar `reserva_<tipo>` con los datos actuales de la reserva"""
+    salon_id, fecha = reserva.salon_id, reserva.fecha
+    eventos.publicar(f'reserva_{tipo}', {
+        'salon': salon_id,
+        'fecha': fecha.isoformat(),
+        'reserva': datos_reserva(reserva),
+    }, lambda: {'horario': _horario(salon_id, fecha)})
+
+
+def filtro_desde_parametros(params):
+    """
+    Filtro de eventos por ?fecha= (YYYY-MM-DD) y ?salon= (id), o None.
+    Lanza ValueError si algún parámetro es inválido.
+    """
+    fecha = params.get('fecha') or None
+    salon = params.get('salon') or None
+    if fecha is not None:
+        fecha = date.fromisoformat(fecha).isoformat()
+    if salon is not None:
+        salon = int(salon)
+    if fecha is None and salon is None:
+        return None
+
+    def filtro(evento):
+        datos = evento['datos']
+        return (
+            (fecha is None or datos.get('fecha') == fecha)
+            and (salon is None or datos.get('salon') == salon)
+        )
+    return filtro
+
+
+class BrokerBaseDatos(BrokerMemoria):
+    """
+    Broker compartido entre procesos a través de la tabla EventoOcupacion.
+
+    publicar() inserta el evento; en cada proceso con clientes conectados un
+    hilo lee los eventos nuevos cada INTERVALO_LECTURA segundos (una consulta
+    por proceso, no por cliente) y los reparte a sus suscriptores. Los ids
+    son los de la tabla: un cliente que se reconecta con Last-Event-ID, a
+    este o a otro proceso, recibe primero desde la tabla los eventos
+    posteriores a ese id. Si alguno ya se purgó (RETENCION) o son más de los
+    que caben en su cola, se le pide recargar.
+    """
+    INTERVALO_LECTURA = 0.5
+    TAMANO_LOTE = 500
+    # Los eventos más antiguos se borran periódicamente
+    RETENCION = timedelta(hours=1)
+    LECTURAS_ENTRE_PURGAS = 600
+
+    def __init__(self):
+        super().__init__()
+        self._ultimo_id = None
+        self._lecturas = 0
+        self._hilo = None
+        # Suscripciones con Last-Event-ID a las que el hilo lector aún no
+        # reenvió los eventos de la tabla: (suscripcion, ultimo_id)
+        self._pendientes = []
+
+    def publicar(self, tipo, datos):
+        evento = EventoOcupacion.objects.create(tipo=tipo, datos=datos)
+        return {'id': evento.pk, 'tipo': tipo, 'datos': datos}
+
+    def tiene_suscriptores(self):
+        # Puede haber clientes conectados a otros procesos
+        return True
+
+    def suscribir(self, filtro=None, ultimo_id=None):
+        if ultimo_id is None:
+            suscripcion = Suscripcion(filtro)
+        else:
+            # Sin repetir lo que el cliente ya recibió de otro proceso
+            suscripcion = Suscripcion(
+                lambda evento: evento['id'] > ultimo_id and (filtro is None or filtro(evento))
+            )
+        with self._lock:
+            if ultimo_id is None:
+                self._suscripciones.add(suscripcion)
+            else:
+                # Se consulta la tabla desde el hilo lector, no desde el event loop
+                self._pendientes.append((suscripcion, ultimo_id))
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._leer_continuamente, name='eventos-bd', daemon=True
+                )
+                self._hilo.start()
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+            self._pendientes = [p for p in self._pendientes if p[0] is not suscripcion]
+
+    def _leer_continuamente(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._suscripciones and not self._pendientes:
+                        # Sin clientes no se lee; al volver se empieza desde el último evento
+                        self._hilo = None
+                        self._ultimo_id = None
+                        return
+                try:
+                    self.leer_nuevos()
+                except DatabaseError:
+                    logger.exception('Error leyendo eventos de ocupación')
+                time.sleep(self.INTERVALO_LECTURA)
+        finally:
+            connection.close()
+
+    def leer_nuevos(self):
+        """Repartir los eventos insertados desde la última lectura"""
+        if self._ultimo_id is None:
+            self._ultimo_id = EventoOcupacion.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+        else:
+            nuevos = EventoOcupacion.objects.filter(
+                id__gt=self._ultimo_id
+            ).order_by('id').values_list('id', 'tipo', 'datos')[:self.TAMANO_LOTE]
+            for evento_id, tipo, datos in nuevos:
+                self._repartir({'id': evento_id, 'tipo': tipo, 'datos': datos})
+                self._ultimo_id = evento_id
+        self._reenviar_pendientes()
+
+        self._lecturas += 1
+        if self._lecturas % self.LECTURAS_ENTRE_PURGAS == 0:
+            EventoOcupacion.objects.filter(
+                fecha_creacion__lt=timezone.now() - self.RETENCION
+            ).delete()
+
+    def _reenviar_pendientes(self):
+        """
+        Entregar a las suscripciones pendientes los eventos de la tabla entre
+        su Last-Event-ID y la última lectura, y sumarlas a las activas (las
+        siguientes lecturas les entregan el resto en orden).
+        """
+        with self._lock:
+            pendientes = list(self._pendientes)
+        for suscripcion, ultimo_id in pendientes:
+            if ultimo_id < self._ultimo_id:
+                # La purga borra los eventos más antiguos: si el del cliente
+                # sigue en la tabla, ninguno posterior se borró (los ids que
+                # faltan entre medio son de inserciones revertidas)
+                primero = EventoOcupacion.objects.aggregate(primero=Min('id'))['primero']
+                if primero is None or primero > ultimo_id:
+                    # El evento del cliente ya se purgó, y con él quizá los siguientes
+                    suscripcion.marcar_atrasada()
+                else:
+                    eventos = EventoOcupacion.objects.filter(
+                        id__gt=ultimo_id, id__lte=self._ultimo_id
+                    ).order_by('id').values_list('id', 'tipo', 'datos')[:TAMANO_COLA + 1]
+                    for evento_id, tipo, datos in eventos:
+                        evento = {'id': evento_id, 'tipo': tipo, 'datos': datos}
+                        if suscripcion.acepta(evento):
+                            suscripcion.entregar(evento)
+            with self._lock:
+                if (suscripcion, ultimo_id) not in self._pendientes:
+                    # Se canceló mientras tanto
+                    continue
+                self._pendientes.remove((suscripcion, ultimo_id))
+                self._suscripciones.add(suscripcion)
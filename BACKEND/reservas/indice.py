@@ -0,0 +1,230 @@
+"""
+Índice de intervalos en memoria: reservas activas por (salón, fecha).
+
+Cada entrada guarda los intervalos del día ordenados por hora de inicio junto
+con el máximo acumulado de las horas de fin, de modo que saber si una franja
+[a, b) choca con alguna reserva es una búsqueda binaria (O(log n)) y listar
+las que chocan solo recorre las candidatas.
+
+Las entradas se cargan al primer uso (varias a la vez con una sola consulta)
+y se mantienen coherentes así:
+
+- Dentro del proceso, las señales de Reserva descartan las entradas de la
+  reserva guardada o eliminada.
+- Entre procesos, cada entrada recuerda el token de versión de su fecha en el
+  caché compartido (salones.cache.version_fecha), que cambia con cada alta,
+  edición o baja; si no coincide, la entrada se vuelve a cargar.
+- Esto solo es coherente si el caché `default` es compartido por todos los
+  procesos (CACHE_COMPARTIDO, por defecto con CACHE_BACKEND=file). Con
+  locmem cada proceso tiene sus propios tokens y no vería las bajas o
+  cambios hechos en otro, así que sin caché compartido el índice no guarda
+  entradas y cada consulta lee la base de datos.
+- Lo leído dentro de una transacción no se guarda: podría incluir cambios
+  que después se revierten.
+
+El índice acelera validaciones y lecturas; la escritura de una reserva
+vuelve a verificar el solapamiento en la base de datos bajo bloqueo
+(reservas.bloqueos), que sigue siendo la autoridad final.
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import time, timedelta
+from itertools import accumulate
+from django.db import connection
+
+from salones import cache
+from .models import ESTADOS_OCUPAN
+
+
+# Entradas (salón, fecha) que se mantienen en memoria
+MAX_ENTRADAS = 50000
+# Días que se cargan juntos al buscar el siguiente hueco libre
+DIAS_POR_CARGA = 7
+
+_entradas = OrderedDict()
+_lock = threading.Lock()
+
+
+def segundos(t):
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def hora(s):
+    """Segundos desde la medianoche a time (24:00 se representa como 23:59:59)"""
+    if s >= 86400:
+        return time(23, 59, 59)
+    return time(s // 3600, s % 3600 // 60, s % 60)
+
+
+class Intervalos:
+    """Intervalos [inicio, fin) en segundos de las reservas activas de un día (inmutable)"""
+    __slots__ = ('ids', 'inicios', 'fines', 'max_fin', 'version')
+
+    def __init__(self, filas, version=None):
+        filas = sorted((inicio, fin, reserva_id) for reserva_id, inicio, fin in filas if fin > inicio)
+        self.inicios = [inicio for inicio, _, _ in filas]
+        self.fines = [fin for _, fin, _ in filas]
+        self.ids = [reserva_id for _, _, reserva_id in filas]
+        self.max_fin = list(accumulate(self.fines, max))
+        self.version = version
+
+    def __len__(self):
+        return len(self.ids)
+
+    def solapadas(self, inicio, fin, excluir=None):
+        """Ids de las reservas que se solapan con [inicio, fin)"""
+        # Candidatas: las que inician antes de `fin`; entre ellas chocan las
+        # que terminan después de `inicio`, y el máximo acumulado permite
+        # dejar de buscar en cuanto ninguna anterior llega a `inicio`
+        i = bisect_left(self.inicios, fin) - 1
+        encontradas = []
+        while i >= 0 and self.max_fin[i] > inicio:
+            if self.fines[i] > inicio and self.ids[i] != excluir:
+                encontradas.append(self.ids[i])
+            i -= 1
+        return encontradas
+
+    def hay_solapamiento(self, inicio, fin, excluir=None):
+        if excluir is None:
+            i = bisect_left(self.inicios, fin) - 1
+            return i >= 0 and self.max_fin[i] > inicio
+        return bool(self.solapadas(inicio, fin, excluir))
+
+    def pares(self):
+        """(inicio, fin) de cada reserva, por hora de inicio"""
+        return zip(self.inicios, self.fines)
+
+    def huecos(self, apertura, cierre, duracion=1):
+        """Franjas libres [inicio, fin) entre apertura y cierre de al menos `duracion` segundos"""
+        libres = []
+        cursor = apertura
+        for inicio, fin in self.pares():
+            if fin <= cursor:
+                continue
+            if inicio >= cierre:
+                break
+            if inicio - cursor >= duracion:
+                libres.append((cursor, inicio))
+            cursor = max(cursor, fin)
+        if cierre - cursor >= duracion:
+            libres.append((cursor, cierre))
+        return libres
+
+    def siguiente_libre(self, desde, duracion, cierre):
+        """Primer inicio >= desde con `duracion` segundos libres antes del cierre, o None"""
+        for inicio, fin in self.huecos(desde, cierre, duracion):
+            return inicio
+        return None
+
+
+def _filas(salon_ids, fechas):
+    # Importación dentro de la función para evitar ciclos
+    from .models import Reserva
+
+    return Reserva.objects.filter(
+        salon_id__in=salon_ids, fecha__in=fechas, estado__in=ESTADOS_OCUPAN,
+    ).order_by().values_list('salon_id', 'fecha', 'id', 'hora_inicio', 'hora_fin')
+
+
+def _vigente(entrada, version):
+    return entrada is not None and entrada.version == version
+
+
+def intervalos_varios(salon_ids, fechas):
+    """
+    {(salon_id, fecha): Intervalos} de todos los salones y fechas indicados,
+    cargando las entradas faltantes o desactualizadas en una sola consulta.
+    """
+    salon_ids = list(salon_ids)
+    fechas = list(fechas)
+    resultado = {}
+    faltantes = []
+    # Sin caché compartido no hay forma de enterarse de los cambios de otros
+    # procesos: no se guardan entradas y se lee siempre de la base de datos
+    guardar = cache.compartido()
+    if guardar:
+        versiones = {fecha: cache.version_fecha(fecha) for fecha in fechas}
+        with _lock:
+            for fecha in fechas:
+                for salon_id in salon_ids:
+                    entrada = _entradas.get((salon_id, fecha))
+                    if _vigente(entrada, versiones[fecha]):
+                        _entradas.move_to_end((salon_id, fecha))
+                        resultado[(salon_id, fecha)] = entrada
+                    else:
+                        faltantes.append((salon_id, fecha))
+    else:
+        versiones = dict.fromkeys(fechas)
+        faltantes = [(salon_id, fecha) for fecha in fechas for salon_id in salon_ids]
+    if not faltantes:
+        return resultado
+
+    filas = {clave: [] for clave in faltantes}
+    for salon_id, fecha, reserva_id, inicio, fin in _filas(
+        {salon_id for salon_id, _ in faltantes}, {fecha for _, fecha in faltantes}
+    ):
+        if (salon_id, fecha) in filas:
+            filas[(salon_id, fecha)].append((reserva_id, segundos(inicio), segundos(fin)))
+    cargadas = {
+        clave: Intervalos(intervalos, versiones[clave[1]]) for clave, intervalos in filas.items()
+    }
+    resultado.update(cargadas)
+
+    # Lo leído dentro de una transacción puede revertirse: no se guarda
+    if guardar and not connection.in_atomic_block:
+        with _lock:
+            _entradas.update(cargadas)
+            while len(_entradas) > MAX_ENTRADAS:
+                _entradas.popitem(last=False)
+    return resultado
+
+
+def intervalos(salon_id, fecha):
+    return intervalos_varios([salon_id], [fecha])[(salon_id, fecha)]
+
+
+def hay_solapamiento(salon_id, fecha, hora_inicio, hora_fin, excluir=None):
+    """Si alguna reserva activa del salón se solapa con [hora_inicio, hora_fin)"""
+    return intervalos(salon_id, fecha).hay_solapamiento(
+        segundos(hora_inicio), segundos(hora_fin), excluir
+    )
+
+
+def huecos(salon_id, fecha, apertura, cierre, duracion=timedelta(minutes=1)):
+    """Franjas libres [(time, time)] del salón en la fecha entre apertura y cierre"""
+    return [
+        (hora(inicio), hora(fin))
+        for inicio, fin in intervalos(salon_id, fecha).huecos(
+            segundos(apertura), segundos(cierre), int(duracion.total_seconds())
+        )
+    ]
+
+
+def siguiente_libre(salon_id, fecha, desde, duracion, apertura, cierre, dias=31):
+    """
+    Primera franja libre de `duracion` en el salón a partir de `fecha` a las
+    `desde`, dentro del horario de apertura y cierre de cada día y buscando
+    hasta `dias` días. Devuelve (fecha, hora_inicio, hora_fin) o None.
+    """
+    duracion = int(duracion.total_seconds())
+    for bloque in range(0, dias, DIAS_POR_CARGA):
+        fechas = [fecha + timedelta(days=d) for d in range(bloque, min(bloque + DIAS_POR_CARGA, dias))]
+        cargados = intervalos_varios([salon_id], fechas)
+        for dia in fechas:
+            inicio_dia = max(segundos(desde), segundos(apertura)) if dia == fecha else segundos(apertura)
+            inicio = cargados[(salon_id, dia)].siguiente_libre(inicio_dia, duracion, segundos(cierre))
+            if inicio is not None:
+                return dia, hora(inicio), hora(inicio + duracion)
+    return None
+
+
+def descartar(salon_id, fecha):
+    """Quitar la entrada (salón, fecha) del índice de este proceso"""
+    with _lock:
+        _entradas.pop((salon_id, fecha), None)
+
+
+def limpiar():
+    with _lock:
+        _entradas.clear()
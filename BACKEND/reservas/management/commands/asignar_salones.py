@@ -0,0 +1,63 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from reservas.asignacion import planificar, crear_asignadas, resultado
+from reservas.serializers import AsignacionSerializer
+from usuarios.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        'Asignar salones a un lote de demandas leído de un archivo JSON '
+        '(el mismo formato que POST /api/reservas/asignar/)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='JSON con {"demandas": [...]} o directamente la lista')
+        parser.add_argument('--confirmar', action='store_true', help='crear las reservas del plan')
+        parser.add_argument('--usuario', help='usuario a nombre de quien se crean las reservas')
+        parser.add_argument('--salida', help='guardar el resultado completo en este archivo JSON')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'No se pudo leer {options["archivo"]}: {e}')
+        if isinstance(datos, list):
+            datos = {'demandas': datos}
+
+        serializer = AsignacionSerializer(data=datos)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, ensure_ascii=False))
+        demandas = serializer.validated_data['demandas']
+
+        usuario = None
+        if options['confirmar']:
+            if not options['usuario']:
+                raise CommandError('Con --confirmar se debe indicar --usuario')
+            usuario = Usuario.objects.filter(username=options['usuario']).first()
+            if usuario is None:
+                raise CommandError(f'No existe el usuario {options["usuario"]}')
+
+        self.stdout.write(f'Asignando salones a {len(demandas)} demandas...')
+        plan = planificar(demandas)
+        ids = None
+        if usuario is not None:
+            _, ids = crear_asignadas(usuario, demandas, plan)
+        datos = resultado(demandas, plan, ids)
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(datos, archivo, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {datos['asignadas']} de {datos['demandas']} demandas con salón "
+            f"(desperdicio total: {datos['desperdicio']} puestos)"
+            + (' — reservas creadas' if ids is not None else ' — plan sin confirmar')
+        ))
+        for pendiente in datos['sin_asignar']:
+            self.stdout.write(
+                f"  Sin asignar: demanda {pendiente['demanda']} "
+                f"{pendiente['referencia']} ({pendiente['motivo']})"
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from reservas.resumen import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir desde cero el resumen de reservas por salón, fecha, hora y estado'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Reconstruyendo resumen de reservas...')
+        filas = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'✅ Resumen reconstruido: {filas} filas'))
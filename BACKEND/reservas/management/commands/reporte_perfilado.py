@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand
+from gecos_backend.perfilado import obtener_almacen, resumen_endpoints
+
+
+class Command(BaseCommand):
+    help = 'Endpoints más lentos y con más consultas según el perfilado de peticiones (PERFILADO=True)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Endpoints por sección')
+        parser.add_argument('--minutos', type=int, help='Solo las peticiones de los últimos N minutos')
+        parser.add_argument('--limpiar', action='store_true', help='Borrar las mediciones guardadas')
+
+    def handle(self, *args, **options):
+        almacen = obtener_almacen()
+        if options['limpiar']:
+            almacen.limpiar()
+            self.stdout.write(self.style.SUCCESS('✅ Mediciones borradas'))
+            return
+
+        desde = time.time() - options['minutos'] * 60 if options['minutos'] else None
+        filas = almacen.leer(desde)
+        if not filas:
+            self.stdout.write('No hay peticiones perfiladas (activar con PERFILADO=True)')
+            return
+        resumen = resumen_endpoints(filas)
+        top = options['top']
+        self.stdout.write(f'{len(filas)} peticiones perfiladas, {len(resumen)} endpoints\n')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Endpoints más lentos (p95)'))
+        self.stdout.write(f"{'endpoint':<45} {'n':>6} {'media ms':>9} {'p95 ms':>9} {'máx ms':>9} {'db ms':>8} {'ser ms':>8}")
+        for e in sorted(resumen, key=lambda e: e['total_p95'], reverse=True)[:top]:
+            self.stdout.write(
+                f"{e['metodo'] + ' ' + e['endpoint']:<45} {e['peticiones']:>6} {e['total_media']:>9.1f} "
+                f"{e['total_p95']:>9.1f} {e['total_max']:>9.1f} {e['db_media']:>8.1f} {e['serializacion_media']:>8.1f}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Endpoints con más consultas'))
+        self.stdout.write(f"{'endpoint':<45} {'n':>6} {'consultas':>10} {'máx':>6} {'repetidas':>10}")
+        for e in sorted(resumen, key=lambda e: e['consultas_media'], reverse=True)[:top]:
+            self.stdout.write(
+                f"{e['metodo'] + ' ' + e['endpoint']:<45} {e['peticiones']:>6} {e['consultas_media']:>10.1f} "
+                f"{e['consultas_max']:>6} {e['repetidas_media']:>10.1f}"
+            )
+            if e['huella_repetida']:
+                self.stdout.write(f"    repetida: {e['huella_repetida'][:150]}")
@@ -0,0 +1,114 @@
+"""
+Métricas agregadas de reservas.
+
+Calcula en la base de datos (GROUP BY) los conteos que usa el panel de
+métricas: por estado, salón, hora de inicio, día de la semana y mes, a
+partir del resumen precalculado ResumenReserva.
+"""
+from datetime import datetime
+from django.db.models import Sum
+from django.db.models.functions import ExtractIsoWeekDay, TruncMonth
+
+from .models import ESTADOS_OCUPAN, Reserva, ResumenReserva
+
+
+# ISO: 1 = lunes ... 7 = domingo
+DIAS_SEMANA = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+
+class RangoInvalido(ValueError):
+    """Rango de fechas inválido para el cálculo de métricas"""
+
+
+def rango_desde_parametros(params):
+    """Leer ?desde= y ?hasta= (YYYY-MM-DD, opcionales) de los query params"""
+    rango = []
+    for campo in ('desde', 'hasta'):
+        valor = params.get(campo)
+        if not valor:
+            rango.append(None)
+            continue
+        try:
+            rango.append(datetime.strptime(valor, '%Y-%m-%d').date())
+        except ValueError:
+            raise RangoInvalido(f"'{campo}' debe tener el formato YYYY-MM-DD")
+    desde, hasta = rango
+    if desde and hasta and hasta < desde:
+        raise RangoInvalido("'hasta' no puede ser anterior a 'desde'")
+    return desde, hasta
+
+
+def calcular_metricas(desde=None, hasta=None):
+    """
+    Agregados de reservas entre desde y hasta (inclusive).
+
+    Se leen de ResumenReserva, que tiene a lo sumo una fila por salón, hora y
+    estado de cada día, en lugar de recorrer la tabla de reservas.
+    """
+    resumen = ResumenReserva.objects.all()
+    if desde:
+        resumen = resumen.filter(fecha__gte=desde)
+    if hasta:
+        resumen = resumen.filter(fecha__lte=hasta)
+    # Quitar el ordering del modelo para que no entre en el GROUP BY
+    resumen = resumen.order_by()
+    # Filas con reservas que inician en la hora (los conteos se hacen sobre ellas)
+    inicios = resumen.filter(reservas__gt=0)
+
+    por_estado = {estado: 0 for estado, _ in Reserva.ESTADOS}
+    for fila in inicios.values('estado').annotate(total=Sum('reservas')):
+        por_estado[fila['estado']] = fila['total']
+
+    por_salon = [
+        {'salon': fila['salon'], 'nombre': fila['salon__nombre'], 'total': fila['total']}
+        for fila in inicios.values('salon', 'salon__nombre')
+                           .annotate(total=Sum('reservas'))
+                           .order_by('-total', 'salon__nombre')
+    ]
+
+    por_hora = [
+        {'hora': fila['hora'], 'total': fila['total']}
+        for fila in inicios.values('hora')
+                           .annotate(total=Sum('reservas'))
+                           .order_by('hora')
+    ]
+
+    por_dia_semana = {dia: 0 for dia in DIAS_SEMANA}
+    for fila in (inicios.annotate(dia=ExtractIsoWeekDay('fecha'))
+                        .values('dia')
+                        .annotate(total=Sum('reservas'))):
+        por_dia_semana[DIAS_SEMANA[fila['dia'] - 1]] = fila['total']
+
+    por_mes = [
+        {'mes': fila['mes'].strftime('%Y-%m'), 'total': fila['total']}
+        for fila in inicios.annotate(mes=TruncMonth('fecha'))
+                           .values('mes')
+                           .annotate(total=Sum('reservas'))
+                           .order_by('mes')
+    ]
+
+    # Mapa de calor: minutos ocupados por día de la semana y hora
+    mapa_calor = [
+        {'dia': DIAS_SEMANA[fila['dia'] - 1], 'hora': fila['hora'], 'minutos': fila['minutos']}
+        for fila in resumen.filter(estado__in=ESTADOS_OCUPAN)
+                           .annotate(dia=ExtractIsoWeekDay('fecha'))
+                           .values('dia', 'hora')
+                           .annotate(minutos=Sum('minutos'))
+                           .order_by('dia', 'hora')
+    ]
+
+    hora_pico = max(por_hora, key=lambda fila: fila['total'], default=None)
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'total': sum(por_estado.values()),
+        'por_estado': por_estado,
+        'por_salon': por_salon,
+        'por_hora': por_hora,
+        'por_dia_semana': por_dia_semana,
+        'por_mes': por_mes,
+        'mapa_calor': mapa_calor,
+        'salon_mas_usado': por_salon[0]['nombre'] if por_salon else None,
+        'hora_pico': f"{hora_pico['hora']}:00" if hora_pico else None,
+    }
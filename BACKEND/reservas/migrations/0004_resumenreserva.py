@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:26
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TAMANO_LOTE = 1000
+
+
+def poblar_resumen(apps, schema_editor):
+    # Copia del cálculo de reservas.resumen a la fecha de esta migración: la
+    # migración no debe depender del código actual de la aplicación
+    Reserva = apps.get_model('reservas', 'Reserva')
+    ResumenReserva = apps.get_model('reservas', 'ResumenReserva')
+    totales = defaultdict(lambda: [0, 0])
+    filas = Reserva.objects.order_by().values_list(
+        'salon_id', 'fecha', 'hora_inicio', 'hora_fin', 'estado'
+    ).iterator(chunk_size=TAMANO_LOTE)
+    for salon_id, fecha, hora_inicio, hora_fin, estado in filas:
+        inicio = hora_inicio.hour * 60 + hora_inicio.minute
+        fin = hora_fin.hour * 60 + hora_fin.minute
+        if fin <= inicio:
+            continue
+        for hora in range(inicio // 60, (fin - 1) // 60 + 1):
+            total = totales[(salon_id, fecha, hora, estado)]
+            total[0] += 1 if hora == inicio // 60 else 0
+            total[1] += min(fin, (hora + 1) * 60) - max(inicio, hora * 60)
+    ResumenReserva.objects.bulk_create(
+        (
+            ResumenReserva(
+                salon_id=salon_id, fecha=fecha, hora=hora, estado=estado,
+                reservas=reservas, minutos=minutos,
+            )
+            for (salon_id, fecha, hora, estado), (reservas, minutos) in totales.items()
+        ),
+        batch_size=TAMANO_LOTE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0003_asignatura'),
+        ('salones', '0002_salon_imagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenReserva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('hora', models.PositiveSmallIntegerField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('confirmada', 'Confirmada'), ('cancelada', 'Cancelada'), ('completada', 'Completada')], max_length=20)),
+                ('reservas', models.IntegerField(default=0)),
+                ('minutos', models.IntegerField(default=0)),
+                ('salon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='salones.salon')),
+            ],
+            options={
+                'verbose_name': 'Resumen de reservas',
+                'verbose_name_plural': 'Resúmenes de reservas',
+                'ordering': ['fecha', 'hora'],
+                'unique_together': {('salon', 'fecha', 'hora', 'estado')},
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
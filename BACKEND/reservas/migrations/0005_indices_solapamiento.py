@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0004_resumenreserva'),
+        ('salones', '0002_salon_imagen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['salon', 'fecha', 'hora_inicio', 'hora_fin', 'estado'], name='reserva_solape_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha', 'estado'], name='reserva_fecha_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha'], name='reserva_estado_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+SQL_CREAR = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE reservas_reserva ADD CONSTRAINT reserva_sin_solape EXCLUDE USING gist (
+    salon_id WITH =,
+    tsrange(fecha + hora_inicio, fecha + hora_fin) WITH &&
+) WHERE (estado IN ('pendiente', 'confirmada', 'completada'));
+"""
+
+SQL_ELIMINAR = "ALTER TABLE reservas_reserva DROP CONSTRAINT IF EXISTS reserva_sin_solape;"
+
+
+def crear_restriccion(apps, schema_editor):
+    # Restricción de exclusión solo disponible en PostgreSQL; en otros motores
+    # la exclusión mutua la da reservas.bloqueos
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SQL_CREAR)
+
+
+def eliminar_restriccion(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SQL_ELIMINAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0005_indices_solapamiento'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_restriccion, eliminar_restriccion),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0007_reserva_orden_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asignatura',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
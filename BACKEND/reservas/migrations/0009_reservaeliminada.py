@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0008_asignatura_fecha_actualizacion'),
+        ('salones', '0002_salon_imagen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaEliminada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reserva_id', models.PositiveIntegerField()),
+                ('salon_id', models.PositiveIntegerField()),
+                ('usuario_id', models.PositiveIntegerField()),
+                ('fecha', models.DateField()),
+                ('fecha_eliminacion', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Reserva eliminada',
+                'verbose_name_plural': 'Reservas eliminadas',
+                'ordering': ['fecha_eliminacion'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_actualizacion'], name='reserva_actualizacion_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:57
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0009_reservaeliminada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoOcupacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=40)),
+                ('datos', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de ocupación',
+                'verbose_name_plural': 'Eventos de ocupación',
+                'ordering': ['id'],
+            },
+        ),
+    ]
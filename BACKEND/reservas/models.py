@@ -1,8 +1,13 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from salones.models import Salon
 
 
+# Estados de reserva que ocupan un bloque horario
+ESTADOS_OCUPAN = ('confirmada', 'completada', 'pendiente')
+
+
 class Asignatura(models.Model):
     """Modelo de asignatura"""
     nombre = models.CharField(max_length=100, unique=True)
@@ -10,6 +15,7 @@ class Asignatura(models.Model):
     semestre = models.CharField(max_length=20, blank=True, null=True)
     
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = 'Asignatura'
@@ -30,6 +36,28 @@ class Asignatura(models.Model):
         super().save(*args, **kwargs)
 
 
+class ReservaQuerySet(models.QuerySet):
+    """Consultas frecuentes sobre reservas"""
+
+    def solapadas(self, salon, fecha, hora_inicio, hora_fin, excluir=None):
+        """
+        Reservas activas del salón que se solapan con [hora_inicio, hora_fin).
+
+        Un intervalo [A, B] se solapa con [C, D] si A < D y B > C. La consulta
+        se resuelve solo con el índice reserva_solape_idx.
+        """
+        solapadas = self.filter(
+            salon=salon,
+            fecha=fecha,
+            estado__in=ESTADOS_OCUPAN,
+            hora_inicio__lt=hora_fin,
+            hora_fin__gt=hora_inicio,
+        )
+        if excluir is not None:
+            solapadas = solapadas.exclude(pk=excluir)
+        return solapadas
+
+
 class Reserva(models.Model):
     """Modelo de reserva de salón"""
     ESTADOS = (
@@ -55,12 +83,30 @@ class Reserva(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
+    objects = ReservaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Reserva'
         verbose_name_plural = 'Reservas'
         ordering = ['-fecha', '-hora_inicio']
         # Evitar reservas duplicadas en el mismo horario
         unique_together = ['salon', 'fecha', 'hora_inicio']
+        indexes = [
+            # Verificación de solapamiento y horario diario: igualdad en
+            # (salon, fecha), rango en hora_inicio y el resto de columnas
+            # del predicado en el índice para no leer la tabla
+            models.Index(
+                fields=['salon', 'fecha', 'hora_inicio', 'hora_fin', 'estado'],
+                name='reserva_solape_idx',
+            ),
+            # Filtros ?fecha= y ?estado= del listado
+            models.Index(fields=['fecha', 'estado'], name='reserva_fecha_estado_idx'),
+            models.Index(fields=['estado', 'fecha'], name='reserva_estado_fecha_idx'),
+            # Paginación por cursor sobre (-fecha, -hora_inicio, id)
+            models.Index(fields=['-fecha', '-hora_inicio', 'id'], name='reserva_orden_idx'),
+            # Sincronización incremental (/api/reservas/cambios/?desde=)
+            models.Index(fields=['fecha_actualizacion'], name='reserva_actualizacion_idx'),
+        ]
     
     def __str__(self):
         return f"{self.salon.nombre} - {self.fecha} {self.hora_inicio} ({self.usuario.get_full_name()})"
@@ -74,3 +120,76 @@ class Reserva(models.Model):
         # Validar que el número de asistentes no exceda la capacidad del salón
         if self.numero_asistentes > self.salon.capacidad:
             raise ValidationError(f'El número de asistentes ({self.numero_asistentes}) excede la capacidad del salón ({self.salon.capacidad})')
+
+
+class ReservaEliminada(models.Model):
+    """
+    Registro (tombstone) de una reserva eliminada.
+
+    Permite que /api/reservas/cambios/ informe las eliminaciones a los
+    clientes que mantienen una copia local. Guarda solo identificadores para
+    sobrevivir a la eliminación del salón o del usuario.
+    """
+    reserva_id = models.PositiveIntegerField()
+    salon_id = models.PositiveIntegerField()
+    usuario_id = models.PositiveIntegerField()
+    fecha = models.DateField()
+    
+    fecha_eliminacion = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Reserva eliminada'
+        verbose_name_plural = 'Reservas eliminadas'
+        ordering = ['fecha_eliminacion']
+    
+    def __str__(self):
+        return f"Reserva {self.reserva_id} eliminada el {self.fecha_eliminacion}"
+
+
+class ResumenReserva(models.Model):
+    """
+    Resumen precalculado de reservas por salón, fecha, hora y estado.
+
+    Se mantiene de forma incremental con cada alta, edición o baja de una
+    reserva (ver reservas.resumen) y se puede reconstruir con el comando
+    `python manage.py reconstruir_resumen`.
+    """
+    salon = models.ForeignKey(Salon, on_delete=models.CASCADE, related_name='resumenes')
+    fecha = models.DateField()
+    hora = models.PositiveSmallIntegerField()
+    estado = models.CharField(max_length=20, choices=Reserva.ESTADOS)
+    
+    # Reservas que inician en esta hora
+    reservas = models.IntegerField(default=0)
+    # Minutos de esta hora cubiertos por reservas
+    minutos = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Resumen de reservas'
+        verbose_name_plural = 'Resúmenes de reservas'
+        ordering = ['fecha', 'hora']
+        unique_together = ['salon', 'fecha', 'hora', 'estado']
+    
+    def __str__(self):
+        return f"{self.salon_id} - {self.fecha} {self.hora:02d}:00 {self.estado}: {self.reservas}"
+
+
+class EventoOcupacion(models.Model):
+    """
+    Evento en vivo publicado por algún proceso del servidor.
+
+    Con varios procesos cada uno lee los eventos nuevos de esta tabla y los
+    reparte a sus clientes conectados (ver reservas.eventos.BrokerBaseDatos).
+    """
+    tipo = models.CharField(max_length=40)
+    datos = models.JSONField(encoder=DjangoJSONEncoder)
+    
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Evento de ocupación'
+        verbose_name_plural = 'Eventos de ocupación'
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.pk} {self.tipo}"
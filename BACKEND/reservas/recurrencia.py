@@ -0,0 +1,97 @@
+"""
+Reservas recurrentes (por ejemplo, todos los martes de 8 a 10 del semestre).
+
+Todas las ocurrencias se verifican contra las reservas existentes con una
+sola consulta y las que no tienen conflicto se insertan con bulk_create en
+una única transacción.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from salones.cache import invalidar_fechas
+from .bloqueos import bloquear_salones_fechas
+from .models import ESTADOS_OCUPAN, Reserva
+from . import resumen, indice
+from .eventos import publicar_reserva
+
+
+def fechas_recurrencia(fecha_inicio, fecha_fin, dias_semana):
+    """Fechas entre fecha_inicio y fecha_fin cuyo día ISO (1=lunes) está en dias_semana"""
+    dias = set(dias_semana)
+    fechas = []
+    fecha = fecha_inicio
+    while fecha <= fecha_fin:
+        if fecha.isoweekday() in dias:
+            fechas.append(fecha)
+        fecha += timedelta(days=1)
+    return fechas
+
+
+def conflictos_por_fecha(salon, fechas, hora_inicio, hora_fin):
+    """
+    Reservas existentes que impiden cada ocurrencia, en una sola consulta.
+
+    Además del solapamiento con reservas activas se incluye cualquier reserva
+    con la misma hora de inicio, por la restricción única (salon, fecha,
+    hora_inicio). Devuelve {fecha: [id, ...]}.
+    """
+    conflictos = defaultdict(list)
+    if not fechas:
+        return conflictos
+    filas = Reserva.objects.filter(
+        salon=salon,
+        fecha__in=fechas,
+    ).filter(
+        Q(estado__in=ESTADOS_OCUPAN, hora_inicio__lt=hora_fin, hora_fin__gt=hora_inicio)
+        | Q(hora_inicio=hora_inicio)
+    ).order_by().values_list('fecha', 'id')
+    for fecha, reserva_id in filas:
+        conflictos[fecha].append(reserva_id)
+    return conflictos
+
+
+def crear_recurrentes(usuario, salon, fechas, hora_inicio, hora_fin, **datos):
+    """
+    Crear una reserva por fecha, omitiendo las que tienen conflicto.
+
+    Devuelve (reservas_creadas, reporte) donde reporte tiene una entrada por
+    fecha con su resultado ('creada', 'conflicto' o 'pasada').
+    """
+    ahora = timezone.localtime(timezone.now())
+    reporte = []
+    with transaction.atomic():
+        bloquear_salones_fechas((salon.pk, fecha) for fecha in fechas)
+        conflictos = conflictos_por_fecha(salon, fechas, hora_inicio, hora_fin)
+
+        nuevas = []
+        for fecha in fechas:
+            if fecha < ahora.date() or (fecha == ahora.date() and hora_inicio < ahora.time()):
+                reporte.append({'fecha': fecha, 'resultado': 'pasada'})
+            elif fecha in conflictos:
+                reporte.append({'fecha': fecha, 'resultado': 'conflicto', 'reservas': conflictos[fecha]})
+            else:
+                reporte.append({'fecha': fecha, 'resultado': 'creada'})
+                nuevas.append(Reserva(
+                    usuario=usuario, salon=salon, fecha=fecha,
+                    hora_inicio=hora_inicio, hora_fin=hora_fin, **datos
+                ))
+
+        creadas = Reserva.objects.bulk_create(nuevas)
+        # bulk_create no emite señales: actualizar el resumen en un solo paso,
+        # invalidar el caché de los listados y el índice de esas fechas y
+        # avisar a los clientes conectados
+        resumen.aplicar(resumen.agregar_reservas(creadas))
+        invalidar_fechas(*(reserva.fecha for reserva in creadas))
+        for reserva in creadas:
+            indice.descartar(salon.pk, reserva.fecha)
+        for reserva in creadas:
+            publicar_reserva('creada', reserva)
+
+    ids = {reserva.fecha: reserva.pk for reserva in creadas}
+    for entrada in reporte:
+        if entrada['resultado'] == 'creada':
+            entrada['id'] = ids[entrada['fecha']]
+    return creadas, reporte
@@ -0,0 +1,149 @@
+"""
+Mantenimiento incremental de ResumenReserva.
+
+Cada reserva aporta a las filas (salon, fecha, hora, estado) de las horas
+que cubre: una unidad en `reservas` para la hora en que inicia y los minutos
+que ocupa dentro de cada hora en `minutos`. Al crear, editar o eliminar una
+reserva se suman o restan solo sus aportes, sin recorrer la tabla completa.
+"""
+import operator
+from collections import defaultdict
+from functools import reduce
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import Reserva, ResumenReserva
+
+
+# Campos de Reserva de los que depende el resumen
+CAMPOS = ('salon_id', 'fecha', 'hora_inicio', 'hora_fin', 'estado')
+
+TAMANO_LOTE = 1000
+# Tuplas por consulta al leer las filas afectadas (4 parámetros cada una)
+TAMANO_FILTRO = 200
+REINTENTOS = 3
+
+
+def _minutos(t):
+    return t.hour * 60 + t.minute
+
+
+def aportes(salon_id, fecha, hora_inicio, hora_fin, estado):
+    """
+    Aportes de una reserva al resumen.
+
+    Devuelve {(salon_id, fecha, hora, estado): (reservas, minutos)}.
+    """
+    inicio = _minutos(hora_inicio)
+    fin = _minutos(hora_fin)
+    resultado = {}
+    if fin <= inicio:
+        return resultado
+    for hora in range(inicio // 60, (fin - 1) // 60 + 1):
+        minutos = min(fin, (hora + 1) * 60) - max(inicio, hora * 60)
+        resultado[(salon_id, fecha, hora, estado)] = (1 if hora == inicio // 60 else 0, minutos)
+    return resultado
+
+
+def aportes_de(reserva):
+    """Aportes de una instancia de Reserva (o de un dict con CAMPOS)"""
+    if isinstance(reserva, dict):
+        return aportes(*(reserva[campo] for campo in CAMPOS))
+    return aportes(*(getattr(reserva, campo) for campo in CAMPOS))
+
+
+def aplicar(cambios, signo=1):
+    """
+    Sumar (signo=1) o restar (signo=-1) aportes en el resumen.
+
+    Lee y bloquea exactamente las filas afectadas y escribe los cambios con
+    bulk_update/bulk_create, sin importar cuántas reservas se apliquen. Si
+    otra transacción crea al mismo tiempo una de las filas que faltaban
+    (unique_together), se vuelve a intentar: la fila ya existe y se suma.
+    """
+    if not cambios:
+        return
+    for intento in range(REINTENTOS):
+        try:
+            with transaction.atomic():
+                _aplicar(cambios, signo)
+            return
+        except IntegrityError:
+            if intento == REINTENTOS - 1:
+                raise
+
+
+def _filtro_exacto(claves):
+    """Q que selecciona exactamente las tuplas (salon_id, fecha, hora, estado)"""
+    return reduce(operator.or_, (
+        Q(salon_id=salon_id, fecha=fecha, hora=hora, estado=estado)
+        for salon_id, fecha, hora, estado in claves
+    ))
+
+
+def _aplicar(cambios, signo):
+    claves = list(cambios)
+    existentes = {}
+    # Por tramos, para no superar el límite de parámetros por consulta
+    for i in range(0, len(claves), TAMANO_FILTRO):
+        for fila in ResumenReserva.objects.select_for_update().filter(
+            _filtro_exacto(claves[i:i + TAMANO_FILTRO])
+        ).order_by():
+            existentes[(fila.salon_id, fila.fecha, fila.hora, fila.estado)] = fila
+    actualizar = []
+    crear = []
+    for clave, (reservas, minutos) in cambios.items():
+        fila = existentes.get(clave)
+        if fila is not None:
+            fila.reservas += signo * reservas
+            fila.minutos += signo * minutos
+            actualizar.append(fila)
+        elif signo > 0:
+            # Solo se crean filas al sumar; al restar la fila ya debe
+            # existir (o fue eliminada en cascada junto con el salón)
+            salon_id, fecha, hora, estado = clave
+            crear.append(ResumenReserva(
+                salon_id=salon_id, fecha=fecha, hora=hora, estado=estado,
+                reservas=reservas, minutos=minutos,
+            ))
+    if actualizar:
+        ResumenReserva.objects.bulk_update(actualizar, ['reservas', 'minutos'], batch_size=TAMANO_LOTE)
+    if crear:
+        ResumenReserva.objects.bulk_create(crear, batch_size=TAMANO_LOTE)
+
+
+def reemplazar(anteriores, nuevos):
+    """Aplicar la diferencia entre los aportes anteriores y los nuevos de una reserva"""
+    if anteriores == nuevos:
+        return
+    aplicar(anteriores, -1)
+    aplicar(nuevos, 1)
+
+
+def agregar_reservas(filas):
+    """Combinar los aportes de muchas reservas en un solo diccionario"""
+    totales = defaultdict(lambda: [0, 0])
+    for fila in filas:
+        for clave, (reservas, minutos) in aportes_de(fila).items():
+            totales[clave][0] += reservas
+            totales[clave][1] += minutos
+    return totales
+
+
+def reconstruir(queryset=None):
+    """Reconstruir el resumen completo a partir de la tabla de reservas"""
+    reservas = queryset if queryset is not None else Reserva.objects.all()
+    totales = agregar_reservas(reservas.order_by().values(*CAMPOS).iterator(chunk_size=TAMANO_LOTE))
+    with transaction.atomic():
+        ResumenReserva.objects.all().delete()
+        ResumenReserva.objects.bulk_create(
+            (
+                ResumenReserva(
+                    salon_id=salon_id, fecha=fecha, hora=hora, estado=estado,
+                    reservas=reservas, minutos=minutos,
+                )
+                for (salon_id, fecha, hora, estado), (reservas, minutos) in totales.items()
+            ),
+            batch_size=TAMANO_LOTE,
+        )
+    return len(totales)
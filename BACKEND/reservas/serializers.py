@@ -1,10 +1,14 @@
 from rest_framework import serializers
 from .models import Reserva, Asignatura
-from salones.serializers import SalonListSerializer
+from . import indice
+from salones.disponibilidad import RECURSOS
+from salones.models import Salon
+from salones.serializers import SalonResumenSerializer
 from usuarios.serializers import UsuarioSerializer
+from gecos_backend.campos import CamposDinamicosMixin
 
 
-class AsignaturaSerializer(serializers.ModelSerializer):
+class AsignaturaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Asignatura"""
     class Meta:
         model = Asignatura
@@ -12,9 +16,9 @@ class AsignaturaSerializer(serializers.ModelSerializer):
         read_only_fields = ['codigo']
 
 
-class ReservaSerializer(serializers.ModelSerializer):
+class ReservaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer completo para el modelo Reserva"""
-    salon_detalle = SalonListSerializer(source='salon', read_only=True)
+    salon_detalle = SalonResumenSerializer(source='salon', read_only=True)
     usuario_detalle = UsuarioSerializer(source='usuario', read_only=True)
     usuario_nombre = serializers.CharField(source='usuario.get_full_name', read_only=True)
     
@@ -25,6 +29,10 @@ class ReservaSerializer(serializers.ModelSerializer):
                   'numero_asistentes', 'estado', 'fecha_creacion', 'fecha_actualizacion']
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
     
+    dependencias = {
+        'usuario_nombre': ('usuario', 'usuario__first_name', 'usuario__last_name'),
+    }
+    
     def validate(self, attrs):
         from django.utils import timezone
         
@@ -65,20 +73,12 @@ class ReservaSerializer(serializers.ModelSerializer):
             inicio = attrs['hora_inicio']
             fin = attrs['hora_fin']
             
-            # Buscar reservas existentes que se solapen
-            # (StartA < EndB) and (EndA > StartB)
-            solapamientos = Reserva.objects.filter(
-                salon=salon,
-                fecha=fecha,
-                estado__in=['pendiente', 'confirmada', 'completada']
-            ).exclude(
-                id=self.instance.id if self.instance else None
-            ).filter(
-                hora_inicio__lt=fin,
-                hora_fin__gt=inicio
-            )
-            
-            if solapamientos.exists():
+            # Buscar reservas existentes que se solapen en el índice en
+            # memoria; al guardar se verifica de nuevo en la base de datos
+            if indice.hay_solapamiento(
+                salon.pk, fecha, inicio, fin,
+                excluir=self.instance.id if self.instance else None
+            ):
                 raise serializers.ValidationError(
                     {"non_field_errors": ["Ya existe una reserva confirmada o pendiente en este horario para este salón."]}
                 )
@@ -131,18 +131,107 @@ class ReservaCreateSerializer(serializers.ModelSerializer):
         inicio = attrs['hora_inicio']
         fin = attrs['hora_fin']
         
-        solapamientos = Reserva.objects.filter(
-            salon=salon,
-            fecha=fecha,
-            estado__in=['pendiente', 'confirmada', 'completada']
-        ).filter(
-            hora_inicio__lt=fin,
-            hora_fin__gt=inicio
-        )
-        
-        if solapamientos.exists():
+        if indice.hay_solapamiento(salon.pk, fecha, inicio, fin):
             raise serializers.ValidationError(
                 {"non_field_errors": ["Ya existe una reserva confirmada o pendiente en este horario para este salón."]}
             )
         
         return attrs
+
+
+class ReservaRecurrenteSerializer(serializers.Serializer):
+    """Serializer para crear una serie de reservas semanales"""
+    MAX_DIAS = 366
+    
+    salon = serializers.PrimaryKeyRelatedField(queryset=Salon.objects.all())
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    dias_semana = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=7),
+        allow_empty=False,
+        help_text='Días ISO de la semana: 1 = lunes ... 7 = domingo'
+    )
+    hora_inicio = serializers.TimeField()
+    hora_fin = serializers.TimeField()
+    numero_asistentes = serializers.IntegerField(min_value=1)
+    asignatura = serializers.PrimaryKeyRelatedField(queryset=Asignatura.objects.all(), required=False)
+    motivo = serializers.CharField(max_length=200, required=False)
+    descripcion = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, attrs):
+        if attrs['hora_fin'] <= attrs['hora_inicio']:
+            raise serializers.ValidationError(
+                {"hora_fin": "La hora de fin debe ser mayor que la hora de inicio"}
+            )
+        
+        if attrs['fecha_fin'] < attrs['fecha_inicio']:
+            raise serializers.ValidationError(
+                {"fecha_fin": "La fecha de fin no puede ser anterior a la fecha de inicio"}
+            )
+        if (attrs['fecha_fin'] - attrs['fecha_inicio']).days > self.MAX_DIAS:
+            raise serializers.ValidationError(
+                {"fecha_fin": f"La serie no puede abarcar más de {self.MAX_DIAS} días"}
+            )
+        
+        if attrs['numero_asistentes'] > attrs['salon'].capacidad:
+            raise serializers.ValidationError(
+                {"numero_asistentes": f"El número de asistentes excede la capacidad del salón ({attrs['salon'].capacidad})"}
+            )
+        
+        # El motivo por defecto es el nombre de la asignatura, como en el formulario de reserva
+        if not attrs.get('motivo'):
+            if not attrs.get('asignatura'):
+                raise serializers.ValidationError(
+                    {"motivo": "Indique el motivo o la asignatura de la reserva"}
+                )
+            attrs['motivo'] = attrs['asignatura'].nombre
+        
+        return attrs
+
+
+class VentanaSerializer(serializers.Serializer):
+    """Ventana candidata de una demanda de salón"""
+    fecha = serializers.DateField()
+    hora_inicio = serializers.TimeField()
+    hora_fin = serializers.TimeField()
+    
+    def validate(self, attrs):
+        if attrs['hora_fin'] <= attrs['hora_inicio']:
+            raise serializers.ValidationError(
+                {"hora_fin": "La hora de fin debe ser mayor que la hora de inicio"}
+            )
+        return attrs
+
+
+class DemandaSerializer(serializers.Serializer):
+    """Sesión a ubicar: asistentes, recursos requeridos y ventanas candidatas en orden de preferencia"""
+    referencia = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    asistentes = serializers.IntegerField(min_value=1)
+    recursos = serializers.ListField(
+        child=serializers.ChoiceField(choices=RECURSOS), required=False, default=list
+    )
+    ventanas = VentanaSerializer(many=True, allow_empty=False, max_length=50)
+    asignatura = serializers.PrimaryKeyRelatedField(queryset=Asignatura.objects.all(), required=False)
+    motivo = serializers.CharField(max_length=200, required=False)
+    descripcion = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, attrs):
+        if not attrs.get('motivo'):
+            if not attrs.get('asignatura'):
+                raise serializers.ValidationError(
+                    {"motivo": "Indique el motivo o la asignatura de la reserva"}
+                )
+            attrs['motivo'] = attrs['asignatura'].nombre
+        attrs['ventanas'] = [
+            (ventana['fecha'], ventana['hora_inicio'], ventana['hora_fin'])
+            for ventana in attrs['ventanas']
+        ]
+        return attrs
+
+
+class AsignacionSerializer(serializers.Serializer):
+    """Lote de demandas para asignar salones (sin `confirmar` solo se calcula el plan)"""
+    MAX_DEMANDAS = 10000
+    
+    demandas = DemandaSerializer(many=True, allow_empty=False, max_length=MAX_DEMANDAS)
+    confirmar = serializers.BooleanField(default=False)
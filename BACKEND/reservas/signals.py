@@ -0,0 +1,75 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Reserva
+from . import cambios, resumen, indice
+from .eventos import publicar_reserva, publicar_horario
+
+
+@receiver(pre_save, sender=Reserva)
+def guardar_aportes_previos(sender, instance, raw=False, **kwargs):
+    """Recordar los valores y aportes al resumen antes de editar una reserva existente"""
+    instance._valores_previos = None
+    instance._aportes_previos = {}
+    if raw or instance.pk is None:
+        return
+    anterior = Reserva.objects.filter(pk=instance.pk).values(*resumen.CAMPOS).first()
+    if anterior:
+        instance._valores_previos = anterior
+        instance._aportes_previos = resumen.aportes_de(anterior)
+
+
+@receiver(post_save, sender=Reserva)
+def actualizar_resumen(sender, instance, raw=False, **kwargs):
+    """Actualizar ResumenReserva al crear, confirmar o editar una reserva"""
+    if raw:
+        return
+    resumen.reemplazar(getattr(instance, '_aportes_previos', {}), resumen.aportes_de(instance))
+
+
+@receiver(post_delete, sender=Reserva)
+def retirar_del_resumen(sender, instance, **kwargs):
+    """Restar del resumen una reserva eliminada (por ejemplo al cancelarla)"""
+    resumen.aplicar(resumen.aportes_de(instance), -1)
+
+
+@receiver(post_delete, sender=Reserva)
+def registrar_eliminacion(sender, instance, **kwargs):
+    """Dejar constancia de la eliminación para la sincronización incremental"""
+    cambios.registrar_eliminacion(instance)
+
+
+@receiver(post_save, sender=Reserva)
+def actualizar_indice(sender, instance, raw=False, **kwargs):
+    """Descartar del índice en memoria los días afectados (el nuevo y el anterior)"""
+    indice.descartar(instance.salon_id, instance.fecha)
+    previos = getattr(instance, '_valores_previos', None)
+    if previos:
+        indice.descartar(previos['salon_id'], previos['fecha'])
+
+
+@receiver(post_delete, sender=Reserva)
+def retirar_del_indice(sender, instance, **kwargs):
+    indice.descartar(instance.salon_id, instance.fecha)
+
+
+@receiver(post_save, sender=Reserva)
+def publicar_cambio(sender, instance, created=False, raw=False, **kwargs):
+    """Avisar a los clientes conectados de la reserva nueva o editada"""
+    if raw:
+        return
+    previos = getattr(instance, '_valores_previos', None) or {}
+    if created:
+        tipo = 'creada'
+    elif instance.estado == 'confirmada' and previos.get('estado') != 'confirmada':
+        tipo = 'confirmada'
+    else:
+        tipo = 'actualizada'
+    publicar_reserva(tipo, instance)
+    # Si la reserva cambió de salón o de fecha también cambió el horario anterior
+    if previos and (previos['salon_id'], previos['fecha']) != (instance.salon_id, instance.fecha):
+        publicar_horario(previos['salon_id'], previos['fecha'])
+
+
+@receiver(post_delete, sender=Reserva)
+def publicar_cancelacion(sender, instance, **kwargs):
+    publicar_reserva('cancelada', instance)
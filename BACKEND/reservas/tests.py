@@ -1,3 +1,1042 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import threading
+from datetime import date, time, timedelta
+from unittest import mock, skipUnless
+from io import StringIO
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from gecos_backend.eventos import obtener_broker, TAMANO_COLA
+from gecos_backend.perfilado import PerfiladoMiddleware, obtener_almacen
+from salones.cache import invalidar_fechas
+from usuarios.models import Usuario
+from salones.models import Salon
+from .models import ESTADOS_OCUPAN, Reserva, ReservaEliminada, ResumenReserva, Asignatura, EventoOcupacion
+from .resumen import aplicar, reconstruir
+from .eventos import BrokerBaseDatos, filtro_desde_parametros
+from .indice import Intervalos
+from .asignacion import emparejar
+from .bloqueos import ReservaSolapada, guardar_sin_solapamiento
+from .cambios import RETENCION as RETENCION_ELIMINADAS, purgar_eliminadas
+from . import indice
 
-# Create your tests here.
+
+class ReservasTestMixin:
+    """Datos comunes para las pruebas de reservas"""
+
+    @classmethod
+    def crear_usuario(cls, username='docente', **extra):
+        return Usuario.objects.create_user(
+            username=username, password='Docente123!', documento=username, **extra
+        )
+
+    @classmethod
+    def crear_salon(cls, codigo='A1', capacidad=30, **extra):
+        return Salon.objects.create(
+            nombre=f'Aula {codigo}', codigo=codigo, bloque='Bloque A',
+            piso='1', capacidad=capacidad, **extra
+        )
+
+    @classmethod
+    def crear_reserva(cls, usuario, salon, fecha, inicio, fin, estado='confirmada'):
+        return Reserva.objects.create(
+            usuario=usuario, salon=salon, fecha=fecha,
+            hora_inicio=time(*inicio), hora_fin=time(*fin),
+            motivo='Clase', numero_asistentes=10, estado=estado
+        )
+
+
+class MetricasReservasTest(ReservasTestMixin, TestCase):
+    """Pruebas del endpoint de métricas agregadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.a1 = cls.crear_salon('A1')
+        cls.a2 = cls.crear_salon('A2')
+        # 2030-03-04 es lunes
+        cls.crear_reserva(cls.usuario, cls.a1, date(2030, 3, 4), (8, 0), (10, 0))
+        cls.crear_reserva(cls.usuario, cls.a1, date(2030, 3, 5), (8, 0), (9, 0), 'pendiente')
+        cls.crear_reserva(cls.usuario, cls.a2, date(2030, 4, 1), (14, 0), (15, 0), 'cancelada')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_agregados(self):
+        response = self.client.get('/api/reservas/metricas/')
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['por_estado']['confirmada'], 1)
+        self.assertEqual(data['por_estado']['cancelada'], 1)
+        self.assertEqual(data['por_salon'][0], {'salon': self.a1.id, 'nombre': 'Aula A1', 'total': 2})
+        self.assertEqual(data['por_hora'], [{'hora': 8, 'total': 2}, {'hora': 14, 'total': 1}])
+        self.assertEqual(data['por_dia_semana']['Lunes'], 2)
+        self.assertEqual(data['por_dia_semana']['Martes'], 1)
+        self.assertEqual(data['por_mes'], [{'mes': '2030-03', 'total': 2}, {'mes': '2030-04', 'total': 1}])
+        self.assertEqual(data['hora_pico'], '8:00')
+
+    def test_rango_de_fechas(self):
+        response = self.client.get('/api/reservas/metricas/', {'desde': '2030-03-05', 'hasta': '2030-03-31'})
+        self.assertEqual(response.data['total'], 1)
+        response = self.client.get('/api/reservas/metricas/', {'desde': '2030-04-05', 'hasta': '2030-03-31'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ListadoReservasTest(ReservasTestMixin, TestCase):
+    """El listado de reservas no debe hacer consultas por fila"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salones = [cls.crear_salon(f'A{i}') for i in range(10)]
+        for i, salon in enumerate(cls.salones):
+            usuario = cls.crear_usuario(f'docente{i}')
+            cls.crear_reserva(usuario, salon, date(2030, 3, 4), (8, 0), (9, 0))
+            cls.crear_reserva(cls.usuario, salon, date(2030, 3, 5), (8, 0), (9, 0))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_consultas_constantes(self):
+        # Validadores de ETag (reservas, salones y usuarios), conteo y filas
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/reservas/')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIn('nombre', response.data['results'][0]['salon_detalle'])
+        self.assertNotIn('schedule', response.data['results'][0]['salon_detalle'])
+
+    def test_campos_seleccionados(self):
+        with self.assertNumQueries(4) as consultas:
+            response = self.client.get('/api/reservas/', {
+                'fields': 'id,fecha,hora_inicio,salon_detalle.nombre'
+            })
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'fecha', 'hora_inicio', 'salon_detalle'}
+        )
+        self.assertEqual(set(response.data['results'][0]['salon_detalle']), {'nombre'})
+        # Solo se cargan las columnas pedidas
+        self.assertNotIn('"motivo"', consultas.captured_queries[-1]['sql'])
+        self.assertNotIn('"capacidad"', consultas.captured_queries[-1]['sql'])
+
+    def test_expand(self):
+        response = self.client.get('/api/reservas/', {'fields': 'id', 'expand': 'usuario_detalle'})
+        fila = response.data['results'][0]
+        self.assertEqual(set(fila), {'id', 'usuario_detalle'})
+        self.assertIn('username', fila['usuario_detalle'])
+
+    def test_campos_sin_objetos_anidados_no_hacen_join(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get('/api/reservas/', {'fields': 'id,fecha'})
+        self.assertNotIn('JOIN', consultas.captured_queries[-1]['sql'])
+
+    def test_mis_reservas(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reservas/mis_reservas/')
+        self.assertEqual(len(response.data), 10)
+
+
+class PaginacionCursorTest(ReservasTestMixin, TestCase):
+    """Pruebas de la paginación por cursor (keyset)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        salones = [cls.crear_salon(f'A{i}') for i in range(3)]
+        # Varias reservas con la misma fecha y hora para probar los desempates por id
+        for dia in range(1, 6):
+            for salon in salones:
+                cls.crear_reserva(cls.usuario, salon, date(2030, 3, dia), (8, 0), (9, 0))
+                cls.crear_reserva(cls.usuario, salon, date(2030, 3, dia), (10, 0), (11, 0))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_recorrer_hacia_adelante_y_atras(self):
+        esperado = list(
+            Reserva.objects.order_by('-fecha', '-hora_inicio', 'id').values_list('id', flat=True)
+        )
+        vistos = []
+        paginas = []
+        url, params = '/api/reservas/', {'cursor': '', 'page_size': 4, 'count': 'false', 'fields': 'id'}
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertNotIn('count', response.data)
+            vistos += [r['id'] for r in response.data['results']]
+            paginas.append(response.data)
+            url, params = response.data['next'], None
+        self.assertEqual(vistos, esperado)
+
+        anterior = self.client.get(paginas[2]['previous'])
+        self.assertEqual(anterior.data['results'], paginas[1]['results'])
+
+    def test_conteo_y_paginacion_por_numero(self):
+        response = self.client.get('/api/reservas/', {'cursor': ''})
+        self.assertEqual(response.data['count'], 30)
+        response = self.client.get('/api/reservas/', {'page': 2})
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_cursor_invalido(self):
+        response = self.client.get('/api/reservas/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class PeticionCondicionalTest(ReservasTestMixin, TestCase):
+    """Pruebas de ETag / Last-Modified en reservas y asignaturas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salon = cls.crear_salon('A1')
+        cls.reserva = cls.crear_reserva(cls.usuario, cls.salon, date(2030, 3, 4), (8, 0), (9, 0))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_listado_sin_cambios_responde_304(self):
+        response = self.client.get('/api/reservas/', {'salon': self.salon.pk})
+        etag = response['ETag']
+        # Validar el filtro ?salon= y los agregados (reservas, salones y
+        # usuarios), sin cargar reservas
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/reservas/', {'salon': self.salon.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.reserva.estado = 'cancelada'
+        self.reserva.save()
+        response = self.client.get('/api/reservas/', {'salon': self.salon.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cambio_del_usuario_embebido_cambia_etag(self):
+        etag = self.client.get('/api/reservas/')['ETag']
+        self.usuario.first_name = 'Otro'
+        self.usuario.save()
+        response = self.client.get('/api/reservas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['usuario_detalle']['first_name'], 'Otro')
+
+    def test_sin_usuario_embebido_no_lo_valida(self):
+        etag = self.client.get('/api/reservas/', {'fields': 'id,fecha'})['ETag']
+        self.usuario.first_name = 'Otro'
+        self.usuario.save()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reservas/', {'fields': 'id,fecha'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_eliminacion_cambia_etag(self):
+        otra = self.crear_reserva(self.usuario, self.salon, date(2030, 3, 4), (10, 0), (11, 0))
+        etag = self.client.get('/api/reservas/')['ETag']
+        otra.delete()
+        response = self.client.get('/api/reservas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detalle_con_last_modified(self):
+        response = self.client.get(f'/api/reservas/{self.reserva.pk}/')
+        response = self.client.get(
+            f'/api/reservas/{self.reserva.pk}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_asignaturas(self):
+        asignatura = Asignatura.objects.create(nombre='Física')
+        etag = self.client.get('/api/asignaturas/')['ETag']
+        self.assertEqual(self.client.get('/api/asignaturas/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        asignatura.semestre = '2030-1'
+        asignatura.save()
+        self.assertEqual(self.client.get('/api/asignaturas/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CambiosReservasTest(ReservasTestMixin, TestCase):
+    """Pruebas de la sincronización incremental /api/reservas/cambios/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salon = cls.crear_salon('A1')
+        cls.otro_salon = cls.crear_salon('A2')
+        reservas = [
+            cls.crear_reserva(cls.usuario, cls.salon, date(2030, 3, 4), (h, 0), (h + 1, 0))
+            for h in (8, 9, 10)
+        ]
+        cls.sin_cambios, cls.editada, cls.eliminada = reservas
+        Reserva.objects.update(fecha_actualizacion=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_reservas_modificadas_y_eliminadas(self):
+        desde = timezone.now()
+        self.editada.estado = 'cancelada'
+        self.editada.save()
+        nueva = self.crear_reserva(self.usuario, self.otro_salon, date(2030, 3, 5), (8, 0), (9, 0))
+        eliminada_id = self.eliminada.pk
+        self.eliminada.delete()
+
+        response = self.client.get('/api/reservas/cambios/', {'desde': desde.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['id'] for r in response.data['reservas']], [self.editada.pk, nueva.pk])
+        self.assertEqual(response.data['eliminadas'], [eliminada_id])
+
+    def test_filtro_por_salon(self):
+        desde = timezone.now()
+        self.crear_reserva(self.usuario, self.otro_salon, date(2030, 3, 5), (8, 0), (9, 0)).delete()
+        eliminada_id = self.eliminada.pk
+        self.eliminada.delete()
+        response = self.client.get('/api/reservas/cambios/', {
+            'desde': desde.isoformat(), 'salon': self.salon.pk
+        })
+        self.assertEqual(response.data['reservas'], [])
+        self.assertEqual(response.data['eliminadas'], [eliminada_id])
+
+    def test_desde_invalido(self):
+        self.assertEqual(self.client.get('/api/reservas/cambios/').status_code, 400)
+        response = self.client.get('/api/reservas/cambios/', {'desde': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/reservas/cambios/', {'cursor': 'basura'})
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('reservas.cambios.LIMITE', 2)
+    def test_paginas_con_cursor(self):
+        desde = timezone.now()
+        nuevas = [
+            self.crear_reserva(self.usuario, self.otro_salon, date(2030, 3, 5), (h, 0), (h + 1, 0))
+            for h in (8, 9, 10)
+        ]
+        eliminadas = [self.sin_cambios.pk, self.editada.pk, self.eliminada.pk]
+        for reserva in (self.sin_cambios, self.editada, self.eliminada):
+            reserva.delete()
+
+        reservas, ids = [], []
+        params = {'desde': desde.isoformat()}
+        for _ in range(3):
+            response = self.client.get('/api/reservas/cambios/', params)
+            self.assertLessEqual(len(response.data['reservas']), 2)
+            reservas += [r['id'] for r in response.data['reservas']]
+            ids += response.data['eliminadas']
+            if not response.data['siguiente']:
+                break
+            params = {'cursor': response.data['siguiente']}
+        self.assertIsNone(response.data['siguiente'])
+        self.assertEqual(reservas, [r.pk for r in nuevas])
+        self.assertEqual(ids, eliminadas)
+
+    def test_desde_anterior_a_la_retencion(self):
+        desde = timezone.now() - RETENCION_ELIMINADAS - timedelta(minutes=1)
+        response = self.client.get('/api/reservas/cambios/', {'desde': desde.isoformat()})
+        self.assertEqual(response.status_code, 410)
+
+    def test_purga_de_eliminaciones(self):
+        self.eliminada.delete()
+        ReservaEliminada.objects.update(fecha_eliminacion=timezone.now() - RETENCION_ELIMINADAS - timedelta(days=1))
+        editada_id = self.editada.pk
+        self.editada.delete()
+        self.assertEqual(purgar_eliminadas(), 1)
+        self.assertEqual(list(ReservaEliminada.objects.values_list('reserva_id', flat=True)), [editada_id])
+
+
+class EventosOcupacionTest(ReservasTestMixin, TestCase):
+    """Pruebas de los eventos en vivo de reservas (SSE)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salon = cls.crear_salon('A1')
+        cls.otro_salon = cls.crear_salon('A2')
+
+    def crear_y_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_reserva(self.usuario, self.otro_salon, date(2030, 3, 4), (8, 0), (9, 0))
+            reserva = self.crear_reserva(
+                self.usuario, self.salon, date(2030, 3, 4), (8, 0), (10, 0), estado='pendiente'
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.estado = 'confirmada'
+            reserva.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.delete()
+
+    async def test_cambios_de_reserva_filtrados_por_salon(self):
+        broker = obtener_broker()
+        suscripcion = broker.suscribir(filtro_desde_parametros({'salon': str(self.salon.pk)}))
+        try:
+            await sync_to_async(self.crear_y_confirmar)()
+            recibidos = [await asyncio.wait_for(suscripcion.cola.get(), 1) for _ in range(3)]
+        finally:
+            broker.cancelar(suscripcion)
+        self.assertTrue(suscripcion.cola.empty())
+        self.assertEqual(
+            [evento['tipo'] for evento in recibidos],
+            ['reserva_creada', 'reserva_confirmada', 'reserva_cancelada']
+        )
+        horario = {franja['time']: franja['status'] for franja in recibidos[1]['datos']['horario']}
+        self.assertEqual(horario['08:00'], 'occupied')
+        self.assertEqual(horario['10:00'], 'available')
+
+    async def test_eventos_sin_suscriptores_quedan_en_el_historial(self):
+        broker = obtener_broker()
+        marca = broker.publicar('horario', {})
+        self.assertFalse(broker.tiene_suscriptores())
+        with mock.patch('reservas.eventos._horario') as horario:
+            await sync_to_async(self.crear_y_confirmar)()
+        # Sin clientes conectados no se calcula el horario
+        horario.assert_not_called()
+        suscripcion = broker.suscribir(ultimo_id=marca['id'])
+        broker.cancelar(suscripcion)
+        recibidos = [suscripcion.cola.get_nowait() for _ in range(suscripcion.cola.qsize())]
+        self.assertEqual(
+            [evento['tipo'] for evento in recibidos],
+            ['reserva_creada', 'reserva_creada', 'reserva_confirmada', 'reserva_cancelada']
+        )
+        self.assertNotIn('horario', recibidos[0]['datos'])
+        self.assertEqual(recibidos[1]['datos']['reserva']['estado'], 'pendiente')
+
+    async def test_flujo_sse(self):
+        response = await self.async_client.get('/api/eventos/ocupacion/', {'fecha': '2030-03-04'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        contenido = aiter(response.streaming_content)
+        self.assertEqual(await anext(contenido), b'retry: 5000\n\n')
+        broker = obtener_broker()
+        broker.publicar('horario', {'salon': 1, 'fecha': '2030-03-05'})
+        evento = broker.publicar('horario', {'salon': 1, 'fecha': '2030-03-04'})
+        chunk = await asyncio.wait_for(anext(contenido), 1)
+        self.assertTrue(chunk.startswith(f"id: {evento['id']}\nevent: horario\n".encode()))
+        # Al desconectarse el cliente el servidor cancela la tarea en espera
+        tarea = asyncio.ensure_future(anext(contenido))
+        await asyncio.sleep(0)
+        tarea.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await tarea
+        self.assertFalse(broker.tiene_suscriptores())
+
+    def test_parametros_invalidos(self):
+        response = self.client.get('/api/eventos/ocupacion/', {'fecha': 'mañana'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_broker_base_datos_entre_procesos(self):
+        # Dos brokers simulan dos procesos: uno publica y el otro lee la tabla
+        publicador, lector = BrokerBaseDatos(), BrokerBaseDatos()
+        lector._hilo = True  # sin hilo de lectura: se lee a mano
+        suscripcion = lector.suscribir()
+        await sync_to_async(lector.leer_nuevos)()
+        evento = await sync_to_async(publicador.publicar)('horario', {'salon': 1, 'fecha': '2030-03-04'})
+        await sync_to_async(lector.leer_nuevos)()
+        recibido = await asyncio.wait_for(suscripcion.cola.get(), 1)
+        self.assertEqual(recibido, evento)
+
+    async def test_reconexion_a_otro_proceso(self):
+        publicador = BrokerBaseDatos()
+        publicados = [
+            await sync_to_async(publicador.publicar)('horario', {'salon': 1, 'n': i}) for i in range(3)
+        ]
+        # El cliente recibió el primero y se reconecta a un proceso recién iniciado
+        lector = BrokerBaseDatos()
+        lector._hilo = True  # sin hilo de lectura: se lee a mano
+        suscripcion = lector.suscribir(ultimo_id=publicados[0]['id'])
+        await sync_to_async(lector.leer_nuevos)()
+        nuevo = await sync_to_async(publicador.publicar)('horario', {'salon': 1, 'n': 3})
+        await sync_to_async(lector.leer_nuevos)()
+        recibidos = [await asyncio.wait_for(suscripcion.cola.get(), 1) for _ in range(3)]
+        self.assertEqual(recibidos, [*publicados[1:], nuevo])
+        self.assertTrue(suscripcion.cola.empty())
+        self.assertFalse(suscripcion.atrasada)
+
+    async def test_reconexion_con_eventos_purgados(self):
+        publicador = BrokerBaseDatos()
+        publicados = [
+            await sync_to_async(publicador.publicar)('horario', {'salon': 1, 'n': i}) for i in range(3)
+        ]
+        await EventoOcupacion.objects.filter(id__lte=publicados[1]['id']).adelete()
+        lector = BrokerBaseDatos()
+        lector._hilo = True
+        suscripcion = lector.suscribir(ultimo_id=publicados[0]['id'])
+        await sync_to_async(lector.leer_nuevos)()
+        await asyncio.sleep(0)
+        self.assertTrue(suscripcion.atrasada)
+
+    async def test_reconexion_con_ids_salteados(self):
+        publicador = BrokerBaseDatos()
+        publicados = [
+            await sync_to_async(publicador.publicar)('horario', {'salon': 1, 'n': i}) for i in range(3)
+        ]
+        # Un id que nunca llegó a la tabla (inserción revertida) no es un evento perdido
+        await EventoOcupacion.objects.filter(id=publicados[1]['id']).adelete()
+        lector = BrokerBaseDatos()
+        lector._hilo = True
+        suscripcion = lector.suscribir(ultimo_id=publicados[0]['id'])
+        await sync_to_async(lector.leer_nuevos)()
+        self.assertEqual(await asyncio.wait_for(suscripcion.cola.get(), 1), publicados[2])
+        self.assertFalse(suscripcion.atrasada)
+
+    async def test_suscriptor_atrasado(self):
+        broker = obtener_broker()
+        suscripcion = broker.suscribir()
+        try:
+            for i in range(TAMANO_COLA + 5):
+                broker.publicar('horario', {'n': i})
+            await asyncio.sleep(0)
+        finally:
+            broker.cancelar(suscripcion)
+        self.assertTrue(suscripcion.atrasada)
+        self.assertEqual(suscripcion.cola.qsize(), TAMANO_COLA)
+
+
+class MisReservasAsincronoTest(ReservasTestMixin, TestCase):
+    """Pruebas de GET /api/async/reservas/mis_reservas/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        otro = cls.crear_usuario('otro')
+        salon = cls.crear_salon('A1')
+        for hora in (8, 10):
+            cls.crear_reserva(cls.usuario, salon, date(2030, 3, 4), (hora, 0), (hora + 1, 0))
+        cls.crear_reserva(otro, salon, date(2030, 3, 5), (8, 0), (9, 0))
+        cls.token = Token.objects.create(user=cls.usuario)
+
+    async def test_igual_que_la_vista_sincrona(self):
+        cabecera = {'Authorization': f'Token {self.token.key}'}
+        esperado = await sync_to_async(APIClient().get)('/api/reservas/mis_reservas/', headers=cabecera)
+        response = await self.async_client.get('/api/async/reservas/mis_reservas/', headers=cabecera)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(response.json(), json.loads(esperado.content))
+
+    async def test_requiere_autenticacion(self):
+        response = await self.async_client.get('/api/async/reservas/mis_reservas/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            '/api/async/reservas/mis_reservas/', headers={'Authorization': 'Token invalido'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class PerfiladoTest(ReservasTestMixin, TestCase):
+    """Pruebas del middleware de perfilado y su reporte"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.TemporaryDirectory()
+        cls.perfilado = override_settings(
+            PERFILADO=True, PERFILADO_ARCHIVO=Path(cls.directorio.name) / 'perfilado.sqlite3'
+        )
+        cls.perfilado.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.perfilado.disable()
+        cls.directorio.cleanup()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario(rol='admin')
+        salon = cls.crear_salon('A1')
+        for hora in (8, 10, 12):
+            cls.crear_reserva(cls.usuario, salon, date(2030, 3, 4), (hora, 0), (hora + 1, 0))
+        cls.token = Token.objects.create(user=cls.usuario)
+
+    def setUp(self):
+        obtener_almacen().limpiar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_cabecera_server_timing(self):
+        response = self.client.get('/api/reservas/')
+        self.assertEqual(response.status_code, 200)
+        metricas = response['Server-Timing']
+        for nombre in ('total;dur=', 'db;dur=', 'serializer;dur=', 'repetidas;'):
+            self.assertIn(nombre, metricas)
+        self.assertRegex(metricas, r'db;dur=[\d.]+;desc="\d+ consultas"')
+
+    def test_guarda_peticion_y_reporta(self):
+        self.client.get('/api/reservas/')
+        self.client.get('/api/reservas/')
+        filas = obtener_almacen().leer()
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(filas[0]['endpoint'], 'reserva-list')
+        self.assertGreater(filas[0]['consultas'], 0)
+
+        salida = StringIO()
+        call_command('reporte_perfilado', stdout=salida)
+        self.assertIn('GET reserva-list', salida.getvalue())
+        self.assertIn('2 peticiones perfiladas', salida.getvalue())
+
+        call_command('reporte_perfilado', '--limpiar', stdout=StringIO())
+        self.assertEqual(obtener_almacen().leer(), [])
+
+    async def test_vista_asincrona(self):
+        response = await self.async_client.get(
+            '/api/async/reservas/mis_reservas/', headers={'Authorization': f'Token {self.token.key}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        # Las consultas se ejecutan en otro hilo (sync_to_async) y también se cuentan
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* consultas"')
+        filas = await sync_to_async(obtener_almacen().leer)()
+        self.assertEqual(len(filas), 1)
+        self.assertGreater(filas[0]['consultas'], 0)
+
+    async def test_consultas_desde_otros_hilos(self):
+        async def vista(request):
+            # Una consulta en un hilo distinto del de la petición
+            await sync_to_async(Reserva.objects.count, thread_sensitive=False)()
+            return HttpResponse()
+
+        middleware = PerfiladoMiddleware(vista)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/api/async/reservas/mis_reservas/'))
+        self.assertIn('desc="1 consultas"', response['Server-Timing'])
+
+
+class ResumenReservaTest(ReservasTestMixin, TestCase):
+    """Pruebas del mantenimiento incremental de ResumenReserva"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salon = cls.crear_salon('A1')
+
+    def filas(self):
+        return sorted(
+            ResumenReserva.objects.exclude(reservas=0, minutos=0)
+                                  .values_list('hora', 'estado', 'reservas', 'minutos')
+        )
+
+    def test_alta_edicion_y_baja(self):
+        reserva = self.crear_reserva(self.usuario, self.salon, date(2030, 3, 4), (8, 30), (10, 0), 'pendiente')
+        self.assertEqual(self.filas(), [(8, 'pendiente', 1, 30), (9, 'pendiente', 0, 60)])
+
+        reserva.estado = 'confirmada'
+        reserva.save()
+        self.assertEqual(self.filas(), [(8, 'confirmada', 1, 30), (9, 'confirmada', 0, 60)])
+
+        reserva.delete()
+        self.assertEqual(self.filas(), [])
+
+    def test_reconstruir_coincide_con_incremental(self):
+        self.crear_reserva(self.usuario, self.salon, date(2030, 3, 4), (8, 0), (9, 15))
+        self.crear_reserva(self.usuario, self.salon, date(2030, 3, 4), (14, 0), (15, 0), 'cancelada')
+        incremental = self.filas()
+        reconstruir()
+        self.assertEqual(self.filas(), incremental)
+
+    def test_solo_bloquea_las_filas_afectadas(self):
+        otro = self.crear_salon('B2')
+        lunes, martes = date(2030, 3, 4), date(2030, 3, 5)
+        afectada = ResumenReserva.objects.create(salon=self.salon, fecha=lunes, hora=8, estado='confirmada')
+        # Filas de la combinación cruzada (salón, fecha) que no deben bloquearse
+        cruzadas = {
+            ResumenReserva.objects.create(salon=self.salon, fecha=martes, hora=8, estado='confirmada').pk,
+            ResumenReserva.objects.create(salon=otro, fecha=lunes, hora=8, estado='confirmada').pk,
+        }
+        with CaptureQueriesContext(connection) as consultas:
+            aplicar({
+                (self.salon.pk, lunes, 8, 'confirmada'): (1, 60),
+                (otro.pk, martes, 8, 'confirmada'): (1, 60),
+            })
+        lectura = next(c['sql'] for c in consultas if c['sql'].startswith('SELECT'))
+        with connection.cursor() as cursor:
+            cursor.execute(lectura)
+            bloqueadas = {fila[0] for fila in cursor.fetchall()}
+        self.assertIn(afectada.pk, bloqueadas)
+        self.assertFalse(bloqueadas & cruzadas)
+
+    def test_fila_creada_al_mismo_tiempo(self):
+        fecha = date(2030, 3, 4)
+        ResumenReserva.objects.create(salon=self.salon, fecha=fecha, hora=8, estado='confirmada', reservas=1, minutos=60)
+        # La primera lectura no ve la fila que otra transacción acaba de crear
+        select_for_update = ResumenReserva.objects.select_for_update
+        with mock.patch.object(ResumenReserva.objects, 'select_for_update', side_effect=[
+            ResumenReserva.objects.none(), select_for_update(),
+        ]):
+            aplicar({(self.salon.pk, fecha, 8, 'confirmada'): (1, 30)})
+        self.assertEqual(self.filas(), [(8, 'confirmada', 2, 90)])
+
+
+class ReservaRecurrenteTest(ReservasTestMixin, TestCase):
+    """Pruebas de la creación de series de reservas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salon = cls.crear_salon('A1')
+        cls.asignatura = Asignatura.objects.create(nombre='Cálculo')
+        # 2030-03-05 es martes
+        cls.existente = cls.crear_reserva(cls.usuario, cls.salon, date(2030, 3, 12), (9, 0), (11, 0))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_serie_semestral_con_conflicto(self):
+        datos = {
+            'salon': self.salon.pk,
+            'fecha_inicio': '2030-03-04',
+            'fecha_fin': '2030-06-23',
+            'dias_semana': [2],
+            'hora_inicio': '08:00',
+            'hora_fin': '10:00',
+            'numero_asistentes': 20,
+            'asignatura': self.asignatura.pk,
+        }
+        # Las consultas no dependen del número de ocurrencias (en SQLite un
+        # solo bloqueo de escritura cubre toda la serie)
+        with self.assertNumQueries(11):
+            response = self.client.post('/api/reservas/recurrente/', datos, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 15)
+        conflicto = [f for f in response.data['fechas'] if f['resultado'] == 'conflicto']
+        self.assertEqual(conflicto, [{'fecha': date(2030, 3, 12), 'resultado': 'conflicto', 'reservas': [self.existente.pk]}])
+        self.assertEqual(Reserva.objects.filter(motivo='Cálculo').count(), 15)
+        self.assertEqual(ResumenReserva.objects.filter(hora=8, estado='pendiente').count(), 15)
+
+    def test_serie_sin_fechas_libres(self):
+        response = self.client.post('/api/reservas/recurrente/', {
+            'salon': self.salon.pk,
+            'fecha_inicio': '2030-03-12',
+            'fecha_fin': '2030-03-12',
+            'dias_semana': [2],
+            'hora_inicio': '10:00',
+            'hora_fin': '12:00',
+            'numero_asistentes': 20,
+            'motivo': 'Taller',
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+
+
+class AsignacionSalonesTest(ReservasTestMixin, TestCase):
+    """Pruebas de la asignación de salones a un lote de demandas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario(rol='admin')
+        cls.con_proyector = cls.crear_salon('P30', capacidad=30, tiene_proyector=True)
+        cls.grande = cls.crear_salon('G40', capacidad=40)
+        cls.auditorio = cls.crear_salon('AUD', capacidad=100)
+        cls.crear_reserva(cls.usuario, cls.grande, date(2030, 3, 5), (10, 0), (12, 0))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def demanda(self, asistentes, *ventanas, **extra):
+        return {
+            'asistentes': asistentes, 'motivo': 'Clase',
+            'ventanas': [
+                {'fecha': '2030-03-05', 'hora_inicio': inicio, 'hora_fin': fin}
+                for inicio, fin in ventanas
+            ],
+            **extra,
+        }
+
+    def asignar(self, demandas, confirmar=False):
+        return self.client.post(
+            '/api/reservas/asignar/', {'demandas': demandas, 'confirmar': confirmar}, format='json'
+        )
+
+    def test_solo_administradores(self):
+        demandas = [self.demanda(25, ('08:00', '10:00'))]
+        antes = Reserva.objects.count()
+        self.client.force_authenticate(self.crear_usuario('otro_docente'))
+        self.assertEqual(self.asignar(demandas).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.asignar(demandas, confirmar=True).status_code, 401)
+        self.assertEqual(Reserva.objects.count(), antes)
+
+    def test_atiende_a_todas_con_el_menor_desperdicio(self):
+        # Ubicarlas en orden daría el salón con proyector a la primera y la
+        # segunda se quedaría sin salón (o en el auditorio)
+        response = self.asignar([
+            self.demanda(25, ('08:00', '10:00'), referencia='A'),
+            self.demanda(28, ('08:00', '10:00'), referencia='B', recursos=['tiene_proyector']),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['asignadas'], 2)
+        salones = {a['referencia']: a['salon'] for a in response.data['asignaciones']}
+        self.assertEqual(salones, {'A': self.grande.pk, 'B': self.con_proyector.pk})
+        self.assertEqual(response.data['desperdicio'], 15 + 2)
+        self.assertFalse(Reserva.objects.filter(fecha=date(2030, 3, 5), hora_inicio=time(8, 0)).exists())
+
+    def test_respeta_reservas_existentes_y_prefiere_la_primera_ventana(self):
+        response = self.asignar([
+            self.demanda(35, ('10:00', '12:00'), ('14:00', '16:00')),
+            self.demanda(35, ('14:00', '16:00'), ('10:00', '12:00')),
+            self.demanda(200, ('08:00', '10:00')),
+        ])
+        asignaciones = response.data['asignaciones']
+        self.assertEqual(
+            [(a['demanda'], a['salon'], a['hora_inicio']) for a in asignaciones],
+            [(0, self.auditorio.pk, time(10, 0)), (1, self.grande.pk, time(14, 0))]
+        )
+        self.assertEqual(response.data['sin_asignar'], [{'demanda': 2, 'referencia': '', 'motivo': 'sin_salon'}])
+
+    def test_confirmar_crea_las_reservas_en_bloque(self):
+        demandas = [self.demanda(20, ('08:00', '10:00')) for _ in range(3)]
+        response = self.asignar(demandas, confirmar=True)
+        self.assertEqual(response.status_code, 201)
+        ids = [a['id'] for a in response.data['asignaciones']]
+        self.assertEqual(len(ids), 3)
+        creadas = Reserva.objects.filter(pk__in=ids)
+        self.assertEqual(
+            sorted(creadas.values_list('salon__codigo', flat=True)), ['AUD', 'G40', 'P30']
+        )
+        self.assertEqual(ResumenReserva.objects.filter(hora=8, estado='pendiente').count(), 3)
+        # Un segundo lote en la misma franja ya no encuentra salones
+        response = self.asignar(demandas[:1], confirmar=True)
+        self.assertEqual(response.status_code, 409)
+
+    def test_comando_con_archivo(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as archivo:
+            json.dump([self.demanda(20, ('08:00', '10:00'))], archivo)
+        salida = StringIO()
+        call_command('asignar_salones', archivo.name, '--confirmar', '--usuario', 'docente', stdout=salida)
+        self.assertIn('1 de 1 demandas', salida.getvalue())
+        self.assertTrue(Reserva.objects.filter(salon=self.con_proyector, hora_inicio=time(8, 0)).exists())
+        Path(archivo.name).unlink()
+
+
+class EmparejamientoTest(SimpleTestCase):
+    """Pruebas del emparejamiento de costo mínimo"""
+
+    def test_maxima_cardinalidad_antes_que_costo(self):
+        # La demanda 0 prefiere el nodo 0, pero solo así se atiende a las dos
+        self.assertEqual(emparejar([[(0, 0), (1, 5)], [(0, 1)]], 2), [1, 0])
+
+    def test_costo_minimo(self):
+        adyacencia = [[(0, 4), (1, 1), (2, 3)], [(0, 2), (1, 0), (2, 5)], [(0, 3), (1, 2), (2, 2)]]
+        pareja = emparejar(adyacencia, 3)
+        self.assertEqual(sorted(pareja), [0, 1, 2])
+        self.assertEqual(sum(dict(adyacencia[u])[v] for u, v in enumerate(pareja)), 5)
+
+
+class PlanConsultaReservasTest(ReservasTestMixin, TestCase):
+    """Las consultas de solapamiento y horario deben resolverse con índices"""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = cls.crear_usuario()
+        cls.salones = [cls.crear_salon(f'A{i}') for i in range(20)]
+        for salon in cls.salones:
+            for dia in range(1, 11):
+                cls.crear_reserva(usuario, salon, date(2030, 3, dia), (8, 0), (10, 0))
+        # Con estadísticas (ANALYZE) el planificador elige como en una base real
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def consultas(self):
+        salon = self.salones[0]
+        propia = Reserva.objects.get(salon=salon, fecha=date(2030, 3, 4))
+        return {
+            'solapamiento': Reserva.objects.solapadas(
+                salon, date(2030, 3, 4), time(9, 0), time(11, 0), excluir=propia.pk
+            ),
+            'horario': Reserva.objects.filter(
+                salon_id__in=[s.pk for s in self.salones[:5]],
+                fecha=date(2030, 3, 4),
+                estado__in=ESTADOS_OCUPAN,
+            ).order_by().values_list('salon_id', 'hora_inicio', 'hora_fin'),
+        }
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plan específico de SQLite')
+    def test_sqlite_usa_indice(self):
+        for nombre, consulta in self.consultas().items():
+            plan = consulta.explain()
+            lineas = [l for l in plan.splitlines() if 'reservas_reserva' in l]
+            self.assertTrue(lineas, f'{nombre}: {plan}')
+            for linea in lineas:
+                # SEARCH (no SCAN) por el índice de solapamiento
+                self.assertRegex(
+                    linea, r'SEARCH reservas_reserva USING (COVERING )?INDEX reserva_solape_idx ',
+                    f'{nombre} no usa reserva_solape_idx: {plan}',
+                )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Plan específico de PostgreSQL')
+    def test_postgresql_usa_indice(self):
+        with connection.cursor() as cursor:
+            # Con tablas pequeñas el planificador prefiere Seq Scan; se
+            # desactiva para comprobar que existe un plan por índice
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for nombre, consulta in self.consultas().items():
+            plan = consulta.explain()
+            self.assertNotIn('Seq Scan', plan, f'{nombre}: {plan}')
+            self.assertIn('Index', plan, f'{nombre}: {plan}')
+
+
+class IntervalosTest(SimpleTestCase):
+    """Consultas del índice de intervalos sobre un día"""
+
+    def setUp(self):
+        hora = 3600
+        # (id, inicio, fin) en segundos; la 3 está contenida en la 2
+        self.dia = Intervalos([
+            (1, 8 * hora, 10 * hora), (2, 11 * hora, 15 * hora),
+            (3, 12 * hora, 13 * hora), (4, 16 * hora, 17 * hora),
+        ])
+
+    def test_solapadas(self):
+        hora = 3600
+        self.assertEqual(sorted(self.dia.solapadas(9 * hora, 12 * hora + 1)), [1, 2, 3])
+        self.assertEqual(self.dia.solapadas(14 * hora, 16 * hora), [2])
+        self.assertEqual(self.dia.solapadas(10 * hora, 11 * hora), [])
+        self.assertTrue(self.dia.hay_solapamiento(14 * hora, 16 * hora))
+        self.assertFalse(self.dia.hay_solapamiento(14 * hora, 16 * hora, excluir=2))
+        self.assertFalse(self.dia.hay_solapamiento(17 * hora, 18 * hora))
+
+    def test_huecos_y_siguiente_libre(self):
+        hora = 3600
+        self.assertEqual(self.dia.huecos(6 * hora, 22 * hora, hora), [
+            (6 * hora, 8 * hora), (10 * hora, 11 * hora), (15 * hora, 16 * hora), (17 * hora, 22 * hora),
+        ])
+        self.assertEqual(self.dia.siguiente_libre(9 * hora, 2 * hora, 22 * hora), 17 * hora)
+        self.assertIsNone(self.dia.siguiente_libre(9 * hora, 6 * hora, 22 * hora))
+
+
+@override_settings(CACHE_COMPARTIDO=True)
+class IndiceIntervalosTest(ReservasTestMixin, TransactionTestCase):
+    """Coherencia del índice en memoria (fuera de transacciones, donde guarda entradas)"""
+
+    def setUp(self):
+        indice.limpiar()
+        self.usuario = self.crear_usuario()
+        self.salon = self.crear_salon('A1')
+        self.fecha = date(2030, 3, 4)
+        self.crear_reserva(self.usuario, self.salon, self.fecha, (8, 0), (10, 0))
+
+    def test_lecturas_en_memoria(self):
+        self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(9), time(11)))
+        with self.assertNumQueries(0):
+            self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(9), time(11)))
+            self.assertFalse(indice.hay_solapamiento(self.salon.pk, self.fecha, time(10), time(11)))
+
+    def test_senales_mantienen_coherencia(self):
+        self.assertFalse(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+        reserva = self.crear_reserva(self.usuario, self.salon, self.fecha, (12, 0), (14, 0))
+        self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+        reserva.delete()
+        self.assertFalse(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+
+    def test_cambios_de_otro_proceso(self):
+        self.assertFalse(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+        # Otro proceso inserta (sin señales en este) y renueva el token de la fecha
+        Reserva.objects.bulk_create([Reserva(
+            usuario=self.usuario, salon=self.salon, fecha=self.fecha,
+            hora_inicio=time(12), hora_fin=time(14), motivo='Clase', numero_asistentes=5,
+            estado='confirmada',
+        )])
+        invalidar_fechas(self.fecha)
+        self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+
+    @override_settings(CACHE_COMPARTIDO=False)
+    def test_sin_cache_compartido_lee_la_base_de_datos(self):
+        # Otro proceso no podría avisar sus cambios: no se guardan entradas
+        self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(9), time(11)))
+        with self.assertNumQueries(1):
+            self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(9), time(11)))
+        Reserva.objects.filter(salon=self.salon).update(estado='cancelada')
+        self.assertFalse(indice.hay_solapamiento(self.salon.pk, self.fecha, time(9), time(11)))
+
+    def test_no_guarda_lecturas_de_transacciones(self):
+        with transaction.atomic():
+            self.crear_reserva(self.usuario, self.salon, self.fecha, (12, 0), (14, 0))
+            self.assertTrue(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+            transaction.set_rollback(True)
+        self.assertFalse(indice.hay_solapamiento(self.salon.pk, self.fecha, time(12), time(13)))
+
+
+class GuardarSinSolapamientoTest(ReservasTestMixin, TestCase):
+    """Traducción de los errores de integridad al guardar una reserva"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = cls.crear_usuario()
+        cls.salon = cls.crear_salon()
+
+    def serializer_que_falla(self, inicio, fin):
+        # Simula la violación de una restricción durante el INSERT
+        serializer = mock.Mock(instance=None, validated_data={
+            'salon': self.salon, 'fecha': date(2030, 3, 4),
+            'hora_inicio': time(*inicio), 'hora_fin': time(*fin),
+        })
+        serializer.save.side_effect = IntegrityError('UNIQUE constraint failed')
+        return serializer
+
+    def test_otra_violacion_se_propaga(self):
+        with self.assertRaises(IntegrityError):
+            guardar_sin_solapamiento(self.serializer_que_falla((8, 0), (9, 0)))
+
+    def test_solapamiento_se_traduce(self):
+        serializer = self.serializer_que_falla((8, 0), (9, 0))
+        # Otra reserva activa ocupa la franja cuando se vuelve a verificar
+        solapadas = mock.Mock()
+        solapadas.exists.side_effect = [False, True]
+        with mock.patch.object(Reserva.objects, 'solapadas', return_value=solapadas):
+            with self.assertRaises(ReservaSolapada):
+                guardar_sin_solapamiento(serializer)
+
+
+class ReservaConcurrenteTest(ReservasTestMixin, TransactionTestCase):
+    """Reservas simultáneas del mismo salón no deben solaparse"""
+
+    HILOS = 12
+
+    def setUp(self):
+        self.usuarios = [self.crear_usuario(f'docente{i}') for i in range(self.HILOS)]
+        self.salones = [self.crear_salon('A1'), self.crear_salon('A2')]
+
+    def reservar_en_paralelo(self, peticiones):
+        barrera = threading.Barrier(len(peticiones))
+        respuestas = [None] * len(peticiones)
+
+        def reservar(i, usuario, datos):
+            client = APIClient()
+            client.force_authenticate(usuario)
+            try:
+                barrera.wait()
+                respuestas[i] = client.post('/api/reservas/', datos, format='json').status_code
+            finally:
+                connections.close_all()
+
+        hilos = [
+            threading.Thread(target=reservar, args=(i, usuario, datos))
+            for i, (usuario, datos) in enumerate(peticiones)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return respuestas
+
+    def test_sin_reservas_dobles(self):
+        # Todas las franjas se solapan entre sí (08:00-09:00, 08:05-09:05, ...)
+        peticiones = [
+            (usuario, {
+                'salon': self.salones[i % 2].pk,
+                'fecha': '2030-03-04',
+                'hora_inicio': f'08:{(i // 2) * 5:02d}',
+                'hora_fin': f'09:{(i // 2) * 5:02d}',
+                'motivo': 'Clase',
+                'numero_asistentes': 10,
+            })
+            for i, usuario in enumerate(self.usuarios)
+        ]
+        respuestas = self.reservar_en_paralelo(peticiones)
+
+        self.assertEqual(respuestas.count(201), 2, respuestas)
+        self.assertEqual(respuestas.count(400), self.HILOS - 2, respuestas)
+        for salon in self.salones:
+            reservas = list(Reserva.objects.filter(salon=salon).order_by('hora_inicio'))
+            self.assertEqual(len(reservas), 1)
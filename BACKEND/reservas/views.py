@@ -4,11 +4,26 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from gecos_backend.eventos import flujo_sse
+from gecos_backend.campos import CamposDinamicosViewSetMixin
+from gecos_backend.condicional import ValidacionCondicionalMixin
+from gecos_backend.paginacion import KeysetPagination
+from usuarios.views import IsAdmin
 from .models import Reserva, Asignatura
-from .serializers import ReservaSerializer, ReservaCreateSerializer, AsignaturaSerializer
+from .serializers import (
+    ReservaSerializer, ReservaCreateSerializer, ReservaRecurrenteSerializer, AsignaturaSerializer,
+    AsignacionSerializer,
+)
+from .recurrencia import fechas_recurrencia, crear_recurrentes
+from .asignacion import planificar, crear_asignadas, resultado
+from .bloqueos import guardar_sin_solapamiento
+from .metricas import calcular_metricas, rango_desde_parametros, RangoInvalido
+from .cambios import cambios_desde, ventana_desde_parametros, CambiosInvalidos, CambiosVencidos
+from .eventos import filtro_desde_parametros
 
 
-class AsignaturaViewSet(viewsets.ModelViewSet):
+class AsignaturaViewSet(ValidacionCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar asignaturas"""
     queryset = Asignatura.objects.all()
     serializer_class = AsignaturaSerializer
@@ -17,45 +32,154 @@ class AsignaturaViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
 
 
-class ReservaViewSet(viewsets.ModelViewSet):
+class ReservaViewSet(ValidacionCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar reservas"""
-    queryset = Reserva.objects.all()
+    # Cargar salón y usuario en la misma consulta para los datos embebidos
+    queryset = Reserva.objects.select_related('salon', 'usuario')
     serializer_class = ReservaSerializer
     permission_classes = [AllowAny]  # Temporalmente permitir acceso sin autenticación
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['salon', 'fecha', 'estado', 'usuario']
+    pagination_class = KeysetPagination
+    # Orden total para la paginación por cursor (?cursor=)
+    orden_keyset = ('-fecha', '-hora_inicio', 'id')
     
     def get_serializer_class(self):
         if self.action == 'create':
             return ReservaCreateSerializer
+        if self.action == 'recurrente':
+            return ReservaRecurrenteSerializer
+        if self.action == 'asignar':
+            return AsignacionSerializer
         return ReservaSerializer
     
+    def validadores_extra(self, request, detalle=False):
+        # Datos embebidos en cada reserva: el resumen de su salón y su usuario
+        from salones.models import Salon
+        from usuarios.models import Usuario
+        campos = self.get_serializer().fields
+        extra = []
+        if 'salon_detalle' in campos:
+            extra.append(Salon.objects.all())
+        if 'usuario_detalle' in campos or 'usuario_nombre' in campos:
+            extra.append(Usuario.objects.all())
+        return extra
+    
+    def get_usuario_reserva(self):
+        """El usuario actual, o un usuario temporal si no está autenticado"""
+        if self.request.user.is_authenticated:
+            return self.request.user
+        # Para pruebas: usar el primer usuario disponible
+        from usuarios.models import Usuario
+        usuario = Usuario.objects.first()
+        if not usuario:
+            # Crear un usuario temporal si no existe ninguno
+            usuario = Usuario.objects.create_user(
+                email='usuario@demo.com',
+                nombre='Usuario Demo',
+                password='demo123'
+            )
+        return usuario
+    
     def perform_create(self, serializer):
         """Asignar el usuario actual a la reserva, o crear un usuario temporal si no está autenticado"""
-        if self.request.user.is_authenticated:
-            serializer.save(usuario=self.request.user)
-        else:
-            # Para pruebas: usar el primer usuario disponible
-            from usuarios.models import Usuario
-            usuario = Usuario.objects.first()
-            if usuario:
-                serializer.save(usuario=usuario)
-            else:
-                # Crear un usuario temporal si no existe ninguno
-                usuario = Usuario.objects.create_user(
-                    email='usuario@demo.com',
-                    nombre='Usuario Demo',
-                    password='demo123'
-                )
-                serializer.save(usuario=usuario)
+        guardar_sin_solapamiento(serializer, usuario=self.get_usuario_reserva())
+    
+    def perform_update(self, serializer):
+        """Editar la reserva verificando el solapamiento bajo bloqueo"""
+        guardar_sin_solapamiento(serializer)
     
     @action(detail=False, methods=['get'])
     def mis_reservas(self, request):
         """Obtener reservas del usuario actual"""
-        reservas = self.queryset.filter(usuario=request.user)
+        reservas = self.get_queryset().filter(usuario=request.user)
         serializer = self.get_serializer(reservas, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'])
+    def recurrente(self, request):
+        """
+        Crear una reserva por cada día de la semana indicado entre fecha_inicio
+        y fecha_fin. Las fechas con conflicto se omiten y se reportan.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        fechas = fechas_recurrencia(datos['fecha_inicio'], datos['fecha_fin'], datos['dias_semana'])
+        creadas, reporte = crear_recurrentes(
+            self.get_usuario_reserva(), datos['salon'], fechas,
+            datos['hora_inicio'], datos['hora_fin'],
+            motivo=datos['motivo'],
+            descripcion=datos['descripcion'],
+            numero_asistentes=datos['numero_asistentes'],
+        )
+        
+        return Response(
+            {
+                'creadas': len(creadas),
+                'conflictos': sum(1 for r in reporte if r['resultado'] != 'creada'),
+                'fechas': reporte,
+            },
+            status=status.HTTP_201_CREATED if creadas else status.HTTP_409_CONFLICT
+        )
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdmin])
+    def asignar(self, request):
+        """
+        Asignar salones a un lote de demandas (asistentes, recursos y ventanas
+        candidatas) atendiendo la mayor cantidad con el menor desperdicio de
+        capacidad. Con confirmar=true las reservas se crean en bloque a nombre
+        del administrador. Solo para administradores.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        demandas = serializer.validated_data['demandas']
+        plan = planificar(demandas)
+        if not serializer.validated_data['confirmar']:
+            return Response(resultado(demandas, plan))
+        creadas, ids = crear_asignadas(self.get_usuario_reserva(), demandas, plan)
+        return Response(
+            resultado(demandas, plan, ids),
+            status=status.HTTP_201_CREATED if creadas else status.HTTP_409_CONFLICT
+        )
+    
+    @action(detail=False, methods=['get'])
+    def metricas(self, request):
+        """Conteos agregados de reservas para el panel de métricas (?desde=&hasta=)"""
+        try:
+            desde, hasta = rango_desde_parametros(request.query_params)
+        except RangoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(calcular_metricas(desde, hasta))
+    
+    @action(detail=False, methods=['get'])
+    def cambios(self, request):
+        """
+        Reservas creadas o modificadas y reservas eliminadas desde ?desde=
+        (acepta los mismos filtros que el listado), por páginas con ?cursor=
+        """
+        try:
+            ventana = ventana_desde_parametros(request.query_params)
+        except CambiosInvalidos as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except CambiosVencidos:
+            return Response(
+                {'error': "'desde' es anterior al historial de eliminaciones; vuelve a cargar las reservas"},
+                status=status.HTTP_410_GONE
+            )
+        reservas, eliminadas, siguiente = cambios_desde(
+            self.filter_queryset(self.get_queryset()), ventana, request.query_params
+        )
+        serializer = self.get_serializer(reservas, many=True)
+        return Response({
+            'desde': ventana['desde'],
+            'hasta': ventana['hasta'],
+            'reservas': serializer.data,
+            'eliminadas': eliminadas,
+            'siguiente': siguiente,
+        })
+    
     @action(detail=True, methods=['post', 'delete'])
     def cancelar(self, request, pk=None):
         """Eliminar una reserva permanentemente"""
@@ -87,3 +211,25 @@ class ReservaViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(reserva)
         return Response(serializer.data)
+
+
+async def eventos_ocupacion(request):
+    """
+    Flujo de eventos (Server-Sent Events) de reservas y ocupación, filtrado
+    opcionalmente por ?fecha= y ?salon=. Requiere servir la aplicación por
+    ASGI (gecos_backend.asgi) para mantener muchas conexiones abiertas.
+    """
+    try:
+        filtro = filtro_desde_parametros(request.GET)
+        ultimo_id = request.headers.get('Last-Event-ID')
+        ultimo_id = int(ultimo_id) if ultimo_id else None
+    except ValueError:
+        return JsonResponse(
+            {'error': "Parámetros inválidos: 'fecha' debe ser YYYY-MM-DD y 'salon' un id"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    response = StreamingHttpResponse(flujo_sse(filtro, ultimo_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evitar que un proxy (nginx) acumule el flujo
+    response['X-Accel-Buffering'] = 'no'
+    return response
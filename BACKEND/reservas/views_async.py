@@ -0,0 +1,21 @@
+"""
+Versiones asíncronas de las lecturas de reservas (ver gecos_backend.asincrono).
+
+    GET /api/async/reservas/mis_reservas/
+"""
+from gecos_backend.asincrono import respuesta_json, usuario_de_peticion
+from .models import Reserva
+from .serializers import ReservaSerializer
+
+
+async def mis_reservas(request):
+    """Reservas del usuario autenticado"""
+    usuario = await usuario_de_peticion(request)
+    if usuario is None:
+        return respuesta_json({'error': 'Se requiere autenticación'}, status=401)
+    reservas = [
+        reserva async for reserva in
+        Reserva.objects.select_related('salon', 'usuario').filter(usuario=usuario)
+    ]
+    serializer = ReservaSerializer(reservas, many=True, context={'request': request})
+    return respuesta_json(serializer.data)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SalonesConfig(AppConfig):
     name = 'salones'
+
+    def ready(self):
+        from . import signals  # noqa: F401
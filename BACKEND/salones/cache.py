@@ -0,0 +1,176 @@
+"""
+Caché de respuestas de /api/salones/ y /api/salones/{id}/.
+
+Las claves incluyen el endpoint, los query params, la fecha consultada y un
+token de versión. Invalidar es reemplazar el token, de modo que:
+
+- Una reserva creada, editada o eliminada invalida solo los listados de su
+  fecha (el horario del día es lo único que depende de las reservas).
+- Un cambio en un salón invalida su detalle y los listados (todos muestran
+  sus datos), pero no el detalle de los demás salones.
+
+Usa el caché `default` de Django (memoria local o archivo, ver CACHES en
+settings). Con varios procesos se debe usar el backend de archivo para que
+la invalidación llegue a todos.
+"""
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .horarios import resolver_fecha
+
+
+PREFIJO = 'salones'
+
+
+def _version(clave):
+    """Token de versión actual de `clave`; se crea uno nuevo si no existe"""
+    version = cache.get(clave)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() evita pisar un token creado por otro proceso al mismo tiempo
+        if not cache.add(clave, version, timeout=None):
+            version = cache.get(clave, version)
+    return version
+
+
+async def _aversion(clave):
+    """_version() para las vistas asíncronas (aget/aadd del caché)"""
+    version = await cache.aget(clave)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not await cache.aadd(clave, version, timeout=None):
+            version = await cache.aget(clave, version)
+    return version
+
+
+def _renovar(clave):
+    cache.set(clave, uuid.uuid4().hex, timeout=None)
+
+
+def _version_salones():
+    return _version(f'{PREFIJO}:v')
+
+
+def _version_salon(salon_id):
+    return _version(f'{PREFIJO}:v:salon:{salon_id}')
+
+
+def _version_fecha(fecha):
+    return _version(f'{PREFIJO}:v:fecha:{fecha.isoformat()}')
+
+
+def version_fecha(fecha):
+    """
+    Token de versión de las reservas de `fecha` (cambia con cada alta, edición
+    o baja en esa fecha, en cualquier proceso), o None con el caché desactivado.
+    """
+    if isinstance(caches['default'], DummyCache):
+        return None
+    return _version_fecha(fecha)
+
+
+def compartido():
+    """
+    Si el caché `default` es compartido por todos los procesos
+    (CACHE_COMPARTIDO), de modo que version_fecha() refleja sus cambios.
+    """
+    return getattr(settings, 'CACHE_COMPARTIDO', False) and not isinstance(
+        caches['default'], DummyCache
+    )
+
+
+def _hash_params(request):
+    params = sorted(request.GET.lists())
+    texto = f'{request.get_host()}|{params}'
+    return hashlib.sha1(texto.encode()).hexdigest()
+
+
+def clave_lista(request, accion='lista'):
+    fecha = resolver_fecha(request)
+    return ':'.join([
+        PREFIJO, accion, _version_salones(),
+        fecha.isoformat(), _version_fecha(fecha), _hash_params(request),
+    ])
+
+
+async def aclave_lista(request, accion='lista'):
+    """clave_lista() sin E/S síncrona, para las vistas asíncronas"""
+    fecha = resolver_fecha(request)
+    return ':'.join([
+        PREFIJO, accion, await _aversion(f'{PREFIJO}:v'),
+        fecha.isoformat(), await _aversion(f'{PREFIJO}:v:fecha:{fecha.isoformat()}'),
+        _hash_params(request),
+    ])
+
+
+def clave_detalle(request, salon_id):
+    return ':'.join([
+        PREFIJO, 'detalle', str(salon_id), _version_salon(salon_id), _hash_params(request),
+    ])
+
+
+def respuesta_cacheada(clave, calcular):
+    """Devolver la respuesta guardada en `clave` o calcularla y guardarla"""
+    data = cache.get(clave)
+    if data is not None:
+        return Response(data)
+    response = calcular()
+    if response.status_code == 200:
+        cache.set(clave, response.data)
+    return response
+
+
+def _ahora_y_al_confirmar(funcion, *args):
+    # Invalidar de inmediato y otra vez al confirmar la transacción, para que
+    # una lectura concurrente no vuelva a guardar datos previos al commit
+    funcion(*args)
+    transaction.on_commit(lambda: funcion(*args))
+
+
+def invalidar_fechas(*fechas):
+    """Invalidar los listados de salones de las fechas indicadas"""
+    for fecha in set(f for f in fechas if f is not None):
+        _ahora_y_al_confirmar(_renovar, f'{PREFIJO}:v:fecha:{fecha.isoformat()}')
+
+
+def invalidar_salon(salon_id):
+    """Invalidar el detalle de un salón y los listados"""
+    _ahora_y_al_confirmar(_renovar, f'{PREFIJO}:v:salon:{salon_id}')
+    _ahora_y_al_confirmar(_renovar, f'{PREFIJO}:v')
+
+
+def invalidar_listados():
+    """Invalidar todos los listados (por ejemplo tras una carga masiva)"""
+    _ahora_y_al_confirmar(_renovar, f'{PREFIJO}:v')
+
+
+def etag(request, salon_id=None):
+    """
+    ETag débil del listado (o del detalle de `salon_id`) derivado de su clave:
+    los tokens de versión cambian con cada modificación relevante, así que no
+    hace falta consultar la base de datos.
+    """
+    clave = clave_lista(request) if salon_id is None else clave_detalle(request, salon_id)
+    texto = f"{clave}|{request.META.get('HTTP_ACCEPT', '')}"
+    return 'W/"%s"' % hashlib.sha1(texto.encode()).hexdigest()
+
+
+class CacheSalonesMixin:
+    """Mixin para SalonViewSet: list y retrieve servidos desde el caché"""
+
+    def list(self, request, *args, **kwargs):
+        return respuesta_cacheada(
+            clave_lista(request),
+            lambda: super(CacheSalonesMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return respuesta_cacheada(
+            clave_detalle(request, kwargs[self.lookup_url_kwarg or self.lookup_field]),
+            lambda: super(CacheSalonesMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -0,0 +1,203 @@
+"""
+Búsqueda de salones libres en una franja horaria.
+
+Responde "qué salones están libres en esta ventana, con capacidad >= N y
+estos recursos" con una sola consulta: el filtro de ocupación es un
+anti-join (NOT EXISTS) contra las reservas que se solapan con la ventana.
+"""
+from datetime import datetime, timedelta
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from reservas.models import ESTADOS_OCUPAN
+from .horarios import GRANULARIDADES, jornada_de
+from .models import Salon
+
+
+# Recursos que se pueden exigir como filtro (?tiene_proyector=true, ...)
+RECURSOS = (
+    'tiene_proyector',
+    'tiene_computadores',
+    'tiene_aire_acondicionado',
+    'tiene_smart_tv',
+    'tiene_audio',
+    'tiene_wifi',
+)
+
+# Máximo de días que puede abarcar una búsqueda
+MAX_DIAS_BUSQUEDA = 31
+
+# Duración por defecto (minutos) de la franja pedida en /libres/
+DURACION_POR_DEFECTO = 60
+
+
+class BusquedaInvalida(ValueError):
+    """Parámetros de búsqueda de disponibilidad inválidos"""
+
+
+def _parse_fecha(valor, campo):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise BusquedaInvalida(f"'{campo}' debe tener el formato YYYY-MM-DD")
+
+
+def _parse_hora(valor, campo):
+    for formato in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(valor, formato).time()
+        except (TypeError, ValueError):
+            continue
+    raise BusquedaInvalida(f"'{campo}' debe tener el formato HH:MM")
+
+
+def _es_verdadero(valor):
+    return str(valor).lower() in ('1', 'true', 'si', 'sí', 'yes')
+
+
+def salones_libres(fecha, hora_inicio, hora_fin, fecha_hasta=None,
+                   capacidad=None, recursos=(), queryset=None):
+    """
+    Salones sin reservas activas que se solapen con [hora_inicio, hora_fin)
+    en ninguno de los días entre fecha y fecha_hasta (inclusive).
+
+    Los resultados se ordenan por mejor ajuste de capacidad: primero el
+    salón más pequeño que cumple con la capacidad pedida.
+    """
+    # Importación dentro de la función para evitar ciclos
+    from reservas.models import Reserva
+
+    if queryset is None:
+        queryset = Salon.objects.all()
+
+    ocupado = Reserva.objects.filter(
+        salon=OuterRef('pk'),
+        fecha__range=(fecha, fecha_hasta or fecha),
+        estado__in=ESTADOS_OCUPAN,
+        hora_inicio__lt=hora_fin,
+        hora_fin__gt=hora_inicio,
+    )
+
+    salones = filtrar_salones(queryset, capacidad, recursos)
+    return salones.filter(~Exists(ocupado))
+
+
+def filtrar_salones(queryset, capacidad=None, recursos=()):
+    """Salones disponibles con la capacidad y recursos pedidos, por mejor ajuste"""
+    salones = queryset.filter(estado='disponible')
+    if capacidad:
+        salones = salones.filter(capacidad__gte=capacidad)
+    for recurso in recursos:
+        salones = salones.filter(**{recurso: True})
+    return salones.order_by('capacidad', 'nombre')
+
+
+def buscar_desde_parametros(params, queryset=None):
+    """
+    Ejecutar la búsqueda a partir de los query params de la petición.
+
+    Parámetros: fecha, hora_inicio, hora_fin (obligatorios juntos), hasta,
+    capacidad y cualquiera de los flags tiene_*. Sin ventana horaria solo se
+    filtran los salones en estado disponible.
+    """
+    capacidad = params.get('capacidad')
+    if capacidad:
+        try:
+            capacidad = int(capacidad)
+        except ValueError:
+            raise BusquedaInvalida("'capacidad' debe ser un número entero")
+    recursos = [r for r in RECURSOS if _es_verdadero(params.get(r, ''))]
+
+    ventana = [params.get(c) for c in ('fecha', 'hora_inicio', 'hora_fin')]
+    if not any(ventana):
+        return filtrar_salones(
+            queryset if queryset is not None else Salon.objects.all(),
+            capacidad, recursos,
+        )
+    if not all(ventana):
+        raise BusquedaInvalida("Se requieren 'fecha', 'hora_inicio' y 'hora_fin'")
+
+    fecha = _parse_fecha(params['fecha'], 'fecha')
+    hora_inicio = _parse_hora(params['hora_inicio'], 'hora_inicio')
+    hora_fin = _parse_hora(params['hora_fin'], 'hora_fin')
+    if hora_fin <= hora_inicio:
+        raise BusquedaInvalida('La hora de fin debe ser mayor que la hora de inicio')
+
+    fecha_hasta = None
+    if params.get('hasta'):
+        fecha_hasta = _parse_fecha(params['hasta'], 'hasta')
+        if fecha_hasta < fecha:
+            raise BusquedaInvalida("'hasta' no puede ser anterior a 'fecha'")
+        if fecha_hasta - fecha > timedelta(days=MAX_DIAS_BUSQUEDA):
+            raise BusquedaInvalida(f'La búsqueda no puede abarcar más de {MAX_DIAS_BUSQUEDA} días')
+
+    return salones_libres(
+        fecha, hora_inicio, hora_fin,
+        fecha_hasta=fecha_hasta,
+        capacidad=capacidad,
+        recursos=recursos,
+        queryset=queryset,
+    )
+
+
+def libres_desde_parametros(salon, params):
+    """
+    Huecos libres de un salón en ?fecha= (hoy por defecto) de al menos
+    ?duracion= minutos dentro de su horario de operación, y la siguiente franja
+    libre de esa duración desde ?desde= (HH:MM) buscando hasta
+    MAX_DIAS_BUSQUEDA días. Se responde con el índice de intervalos en memoria.
+    """
+    # Importación dentro de la función para evitar ciclos
+    from reservas import indice
+
+    fecha = _parse_fecha(params['fecha'], 'fecha') if params.get('fecha') else timezone.localdate()
+    try:
+        duracion = int(params.get('duracion', DURACION_POR_DEFECTO))
+    except ValueError:
+        raise BusquedaInvalida("'duracion' debe ser un número entero de minutos")
+    jornada = jornada_de(salon)
+    apertura, cierre = jornada.apertura, jornada.cierre
+    if not 0 < duracion <= jornada.minutos:
+        raise BusquedaInvalida("'duracion' debe caber en el horario de operación")
+    duracion = timedelta(minutes=duracion)
+    desde = _parse_hora(params['desde'], 'desde') if params.get('desde') else apertura
+
+    siguiente = indice.siguiente_libre(
+        salon.pk, fecha, desde, duracion, apertura, cierre, dias=MAX_DIAS_BUSQUEDA
+    )
+    return {
+        'salon': salon.pk,
+        'fecha': fecha,
+        'duracion': int(duracion.total_seconds() // 60),
+        'huecos': [
+            {'hora_inicio': inicio, 'hora_fin': fin}
+            for inicio, fin in indice.huecos(salon.pk, fecha, apertura, cierre, duracion)
+        ],
+        'siguiente': siguiente and {
+            'fecha': siguiente[0], 'hora_inicio': siguiente[1], 'hora_fin': siguiente[2],
+        },
+    }
+
+
+def ocupacion_desde_parametros(salon_ids, params):
+    """
+    Rejilla de ocupación de los salones entre ?desde= (hoy por defecto) y
+    ?hasta= (igual a desde por defecto), con ?granularidad= minutos por franja.
+    """
+    # Importación dentro de la función para evitar ciclos
+    from . import ocupacion
+
+    desde = _parse_fecha(params['desde'], 'desde') if params.get('desde') else timezone.localdate()
+    hasta = _parse_fecha(params['hasta'], 'hasta') if params.get('hasta') else desde
+    if hasta < desde:
+        raise BusquedaInvalida("'hasta' no puede ser anterior a 'desde'")
+    if hasta - desde >= timedelta(days=MAX_DIAS_BUSQUEDA):
+        raise BusquedaInvalida(f'La rejilla no puede abarcar más de {MAX_DIAS_BUSQUEDA} días')
+    try:
+        granularidad = int(params.get('granularidad', ocupacion.GRANULARIDAD))
+    except ValueError:
+        granularidad = None
+    if granularidad not in GRANULARIDADES:
+        opciones = ', '.join(str(g) for g in GRANULARIDADES)
+        raise BusquedaInvalida(f"'granularidad' debe ser uno de: {opciones}")
+    return ocupacion.rejilla(salon_ids, desde, hasta, granularidad)
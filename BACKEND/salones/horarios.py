@@ -0,0 +1,196 @@
+"""
+Motor de horarios diarios de salones.
+
+Calcula la franja horaria de varios salones para una fecha con a lo sumo una
+consulta a la base de datos, en lugar de una por salón.
+
+El horario de operación de cada salón es una Jornada: apertura, cierre y
+minutos por franja. Sale, en este orden, de las horas propias del salón
+(hora_apertura / hora_cierre), del horario de su bloque (HORARIOS_BLOQUE) o
+del horario general (HORARIO_APERTURA / HORARIO_CIERRE). La granularidad
+por defecto es HORARIO_GRANULARIDAD y se puede pedir otra con ?granularidad=.
+"""
+from datetime import datetime, time
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+
+# Horario de operación extendido por defecto (6 AM - 10 PM)
+HORA_APERTURA = 6
+HORA_CIERRE = 22
+
+# Minutos por franja aceptados (dividen la hora)
+GRANULARIDADES = (5, 10, 15, 20, 30, 60)
+
+
+def _segundos(t):
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def _hora(valor):
+    return valor if isinstance(valor, time) else time.fromisoformat(valor)
+
+
+class Jornada:
+    """Horario de operación [apertura, cierre) dividido en franjas de `granularidad` minutos"""
+    __slots__ = ('apertura', 'cierre', 'granularidad', 'inicios', '_etiquetas')
+
+    def __init__(self, apertura, cierre, granularidad=60):
+        self.apertura = _hora(apertura)
+        self.cierre = _hora(cierre)
+        self.granularidad = granularidad
+        paso = granularidad * 60
+        # Segundos desde la medianoche del inicio de cada franja; la última
+        # se recorta al cierre si la jornada no es múltiplo de la granularidad
+        self.inicios = list(range(_segundos(self.apertura), _segundos(self.cierre), paso))
+        self._etiquetas = [f'{s // 3600:02d}:{s % 3600 // 60:02d}' for s in self.inicios]
+
+    def __len__(self):
+        return len(self.inicios)
+
+    @property
+    def minutos(self):
+        return (_segundos(self.cierre) - _segundos(self.apertura)) // 60
+
+    def etiquetas(self):
+        """Hora de inicio (HH:MM) de cada franja"""
+        return self._etiquetas
+
+    def ocupadas(self, intervalos):
+        """
+        [bool] por franja a partir de pares (inicio, fin) en segundos ordenados
+        por inicio, en un solo recorrido de franjas y reservas: una franja
+        [a, b) está ocupada si alguna reserva cumple a < fin y b > inicio.
+        """
+        inicios = self.inicios
+        n = len(inicios)
+        paso = self.granularidad * 60
+        cierre = _segundos(self.cierre)
+        ocupadas = [False] * n
+        # i: primera franja que termina después del inicio de la reserva
+        # actual (no retrocede porque las reservas vienen ordenadas); todas
+        # las franjas entre i y `marcadas` ya están ocupadas. La última
+        # franja termina en el cierre aunque sea más corta que `paso`
+        i = marcadas = 0
+        for inicio, fin in intervalos:
+            if fin <= inicio:
+                continue
+            while i < n and min(inicios[i] + paso, cierre) <= inicio:
+                i += 1
+            j = max(i, marcadas)
+            while j < n and inicios[j] < fin:
+                ocupadas[j] = True
+                j += 1
+            marcadas = max(marcadas, j)
+        return ocupadas
+
+    def marcar(self, intervalos):
+        """Franjas [{'time', 'status'}] con las ocupadas por `intervalos` (ver ocupadas)"""
+        return [
+            {'time': etiqueta, 'status': 'occupied' if ocupada else 'available'}
+            for etiqueta, ocupada in zip(self.etiquetas(), self.ocupadas(intervalos))
+        ]
+
+
+@lru_cache(maxsize=256)
+def _jornada(apertura, cierre, granularidad):
+    # Las jornadas no cambian: los salones con el mismo horario comparten una
+    return Jornada(apertura, cierre, granularidad)
+
+
+def granularidad_por_defecto():
+    return getattr(settings, 'HORARIO_GRANULARIDAD', 60)
+
+
+def jornada_general(granularidad=None):
+    """Jornada del horario general de operación"""
+    return _jornada(
+        getattr(settings, 'HORARIO_APERTURA', time(HORA_APERTURA)),
+        getattr(settings, 'HORARIO_CIERRE', time(HORA_CIERRE)),
+        granularidad or granularidad_por_defecto(),
+    )
+
+
+def jornada_de(salon, granularidad=None):
+    """Jornada de un salón: sus horas propias, las de su bloque o las generales"""
+    granularidad = granularidad or granularidad_por_defecto()
+    if salon.hora_apertura and salon.hora_cierre:
+        return _jornada(salon.hora_apertura, salon.hora_cierre, granularidad)
+    bloque = getattr(settings, 'HORARIOS_BLOQUE', {}).get(salon.bloque)
+    if bloque:
+        return _jornada(*bloque, granularidad)
+    return jornada_general(granularidad)
+
+
+def jornadas_de(salones, granularidad=None):
+    """
+    {salon_id: Jornada} de una lista de salones (instancias o ids; los ids
+    se consultan juntos y los que no existen usan el horario general).
+    """
+    # Importación dentro de la función para evitar ciclos
+    from .models import Salon
+
+    jornadas = {}
+    ids = []
+    for salon in salones:
+        if isinstance(salon, Salon):
+            jornadas[salon.pk] = jornada_de(salon, granularidad)
+        else:
+            ids.append(salon)
+    if ids:
+        for salon in Salon.objects.filter(pk__in=ids).only('bloque', 'hora_apertura', 'hora_cierre'):
+            jornadas[salon.pk] = jornada_de(salon, granularidad)
+        for salon_id in ids:
+            jornadas.setdefault(salon_id, jornada_general(granularidad))
+    return jornadas
+
+
+def resolver_fecha(request):
+    """Obtener la fecha del query param ?fecha=YYYY-MM-DD o la fecha local de hoy"""
+    # Usar .GET en lugar de .query_params para compatibilidad con requests de Django puro y DRF
+    fecha_param = request.GET.get('fecha') if request else None
+    if fecha_param:
+        try:
+            return datetime.strptime(fecha_param, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return timezone.localtime(timezone.now()).date()
+
+
+def resolver_granularidad(request):
+    """Minutos por franja de ?granularidad= si es válida, o None (la de por defecto)"""
+    valor = request.GET.get('granularidad') if request else None
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return valor if valor in GRANULARIDADES else None
+
+
+def construir_horarios(salones, fecha, granularidad=None):
+    """
+    Construir el horario de cada salón para una fecha.
+
+    `salones` son instancias de Salon o ids. Las reservas del día salen del
+    índice de intervalos en memoria (reservas.indice), que carga las que
+    falten en una sola consulta, y cada jornada marca sus franjas ocupadas en
+    un solo recorrido. Devuelve un diccionario {salon_id: [{'time', 'status'}, ...]}.
+    """
+    # Importación dentro de la función para evitar ciclos
+    from reservas import indice
+
+    jornadas = jornadas_de(salones, granularidad)
+    if not jornadas:
+        return {}
+    intervalos = indice.intervalos_varios(jornadas, [fecha])
+    return {
+        salon_id: jornada.marcar(intervalos[(salon_id, fecha)].pares())
+        for salon_id, jornada in jornadas.items()
+    }
+
+
+async def aconstruir_horarios(salones, fecha, granularidad=None):
+    """Versión asíncrona de construir_horarios"""
+    return await sync_to_async(construir_horarios)(salones, fecha, granularidad)
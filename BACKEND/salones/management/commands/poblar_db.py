@@ -1,275 +1,78 @@
-from django.core.management.base import BaseCommand
-from django.contrib.auth import get_user_model
-from salones.models import Salon
-from reservas.models import Reserva
-from datetime import datetime, date, timedelta
-
-Usuario = get_user_model()
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from salones.poblado import HashesCompartidos, poblar_iniciales, generar_sintetico, TAMANO_LOTE
 
 
 class Command(BaseCommand):
-    help = 'Poblar la base de datos con datos iniciales para testing'
+    help = (
+        'Poblar la base de datos con los datos iniciales y, opcionalmente, un campus '
+        'sintético (--salones, --docentes, --reservas). Se puede ejecutar en cada '
+        'arranque: solo crea lo que falta.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salones', type=int, default=0, help='Salones sintéticos')
+        parser.add_argument('--docentes', type=int, default=0, help='Docentes sintéticos')
+        parser.add_argument('--reservas', type=int, default=0, help='Reservas sintéticas (aproximado)')
+        parser.add_argument('--anios', type=int, default=1, help='Años de reservas sintéticas')
+        parser.add_argument('--inicio', default=f'{date.today().year}-01-01',
+                            help='Primer día de las reservas sintéticas (YYYY-MM-DD)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por transacción')
+        parser.add_argument('--sin-iniciales', action='store_true',
+                            help='No crear los usuarios, salones y reservas de demostración')
+
+    def handle(self, *args, **options):
+        try:
+            inicio = date.fromisoformat(options['inicio'])
+        except ValueError:
+            raise CommandError("'--inicio' debe tener el formato YYYY-MM-DD")
+        if options['anios'] < 1:
+            raise CommandError("'--anios' debe ser al menos 1")
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Poblando base de datos...')
-        
-        # Crear usuarios
-        self.stdout.write('Creando usuarios...')
-        
-        # Admin
-        admin, created = Usuario.objects.get_or_create(
-            username='admin',
-            defaults={
-                'email': 'admin@fesc.edu.co',
-                'first_name': 'Administrador',
-                'last_name': 'Sistema',
-                'rol': 'admin',
-                'documento': '1000000001',
-                'telefono': '3001234567',
-                'is_staff': True,
-                'is_superuser': True,
-            }
-        )
-        if created:
-            admin.set_password('Admin123!')
-            admin.save()
-            self.stdout.write(self.style.SUCCESS(f'✅ Usuario admin creado'))
-        
-        # Docente
-        docente, created = Usuario.objects.get_or_create(
-            username='docente1',
-            defaults={
-                'email': 'docente1@fesc.edu.co',
-                'first_name': 'Carlos',
-                'last_name': 'Martínez',
-                'rol': 'docente',
-                'documento': '1000000002',
-                'telefono': '3009876543',
-            }
-        )
-        if created:
-            docente.set_password('Docente123!')
-            docente.save()
-            self.stdout.write(self.style.SUCCESS(f'✅ Usuario docente1 creado'))
-        
-        # Crear salones
-        self.stdout.write('Creando salones...')
-        
-        salones_data = [
-            {
-                'nombre': 'Aula A-204',
-                'codigo': 'A204',
-                'tipo': 'aula',
-                'bloque': 'Bloque A',
-                'piso': '2º Piso',
-                'capacidad': 30,
-                'descripcion': 'Aula estándar para clases magistrales',
-                'tiene_proyector': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1562774053-701939374585?w=500&q=80'
-            },
-            {
-                'nombre': 'Lab. Informática 1',
-                'codigo': 'LAB301',
-                'tipo': 'laboratorio',
-                'bloque': 'Bloque B',
-                'piso': '3º Piso',
-                'capacidad': 25,
-                'descripcion': 'Laboratorio de computación con 25 equipos',
-                'tiene_computadores': True,
-                'tiene_proyector': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1498050108023-c5249f4df085?w=500&q=80'
-            },
-            {
-                'nombre': 'Auditorio Magna',
-                'codigo': 'AUD01',
-                'tipo': 'auditorio',
-                'bloque': 'Planta Baja',
-                'piso': 'PB',
-                'capacidad': 120,
-                'descripcion': 'Auditorio principal para eventos y conferencias',
-                'tiene_proyector': True,
-                'tiene_smart_tv': True,
-                'tiene_audio': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=500&q=80'
-            },
-            {
-                'nombre': 'Sala de Conferencias 1',
-                'codigo': 'CONF401',
-                'tipo': 'sala_conferencias',
-                'bloque': 'Bloque C',
-                'piso': '4º Piso',
-                'capacidad': 15,
-                'descripcion': 'Sala para reuniones y conferencias pequeñas',
-                'tiene_smart_tv': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1497366754035-f200968a6e72?w=500&q=80'
-            },
-            {
-                'nombre': 'Aula B-105',
-                'codigo': 'B105',
-                'tipo': 'aula',
-                'bloque': 'Bloque B',
-                'piso': '1º Piso',
-                'capacidad': 40,
-                'descripcion': 'Aula amplia con capacidad para 40 estudiantes',
-                'tiene_proyector': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1562774053-701939374585?w=500&q=80'
-            },
-            {
-                'nombre': 'Lab. Física',
-                'codigo': 'LAB201',
-                'tipo': 'laboratorio',
-                'bloque': 'Bloque A',
-                'piso': '2º Piso',
-                'capacidad': 20,
-                'descripcion': 'Laboratorio equipado para prácticas de física',
-                'tiene_proyector': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1532094349884-543bc11b234d?w=500&q=80'
-            },
-            {
-                'nombre': 'Aula C-302',
-                'codigo': 'C302',
-                'tipo': 'aula',
-                'bloque': 'Bloque C',
-                'piso': '3º Piso',
-                'capacidad': 35,
-                'descripcion': 'Aula moderna con tecnología audiovisual',
-                'tiene_proyector': True,
-                'tiene_smart_tv': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1497366811353-6870744d04b2?w=500&q=80'
-            },
-            {
-                'nombre': 'Lab. Química',
-                'codigo': 'LAB202',
-                'tipo': 'laboratorio',
-                'bloque': 'Bloque A',
-                'piso': '2º Piso',
-                'capacidad': 18,
-                'descripcion': 'Laboratorio especializado en química',
-                'tiene_proyector': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'mantenimiento',
-                'imagen_url': 'https://images.unsplash.com/photo-1532187863486-abf9dbad1b69?w=500&q=80'
-            },
-            {
-                'nombre': 'Aula D-101',
-                'codigo': 'D101',
-                'tipo': 'aula',
-                'bloque': 'Bloque D',
-                'piso': '1º Piso',
-                'capacidad': 50,
-                'descripcion': 'Aula grande para clases numerosas',
-                'tiene_proyector': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_audio': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1524178232363-1fb2b075b655?w=500&q=80'
-            },
-            {
-                'nombre': 'Sala Multimedia',
-                'codigo': 'MULT501',
-                'tipo': 'sala_conferencias',
-                'bloque': 'Bloque C',
-                'piso': '5º Piso',
-                'capacidad': 25,
-                'descripcion': 'Sala equipada con tecnología multimedia avanzada',
-                'tiene_proyector': True,
-                'tiene_smart_tv': True,
-                'tiene_audio': True,
-                'tiene_aire_acondicionado': True,
-                'tiene_wifi': True,
-                'estado': 'disponible',
-                'imagen_url': 'https://images.unsplash.com/photo-1505373877841-8d25f7d46678?w=500&q=80'
-            },
-        ]
-        
-        salones_creados = []
-        for salon_data in salones_data:
-            salon, created = Salon.objects.get_or_create(
-                codigo=salon_data['codigo'],
-                defaults=salon_data
-            )
-            # Siempre recuperar el objeto salón referenciado
-            if not created: 
-                salon = Salon.objects.get(codigo=salon_data['codigo'])
-            salones_creados.append(salon)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f'✅ Salón {salon.nombre} creado'))
+        hashes = HashesCompartidos()
+        comienzo = time.perf_counter()
 
-        # Crear reservaciones de ejemplo para hoy
-        self.stdout.write('Creando reservas de prueba...')
-        today = date.today()
-        
-        # Reservas para el primer salón (ej: A-101)
-        if salones_creados:
-            s1 = salones_creados[0]
-            # Reserva 8-10 AM
-            Reserva.objects.get_or_create(
-                salon=s1,
-                fecha=today,
-                hora_inicio=datetime.strptime('08:00', '%H:%M').time(),
-                hora_fin=datetime.strptime('10:00', '%H:%M').time(),
-                defaults={
-                    'usuario': docente,
-                    'motivo': 'Clase de Programación',
-                    'descripcion': 'Intro a Python',
-                    'numero_asistentes': 20,
-                    'estado': 'confirmada'
-                }
-            )
-            self.stdout.write(self.style.SUCCESS(f'✅ Reservas creadas para {s1.nombre}'))
-            
-            # Reserva para el segundo salón
-            if len(salones_creados) > 1:
-                s2 = salones_creados[1]
-                Reserva.objects.get_or_create(
-                    salon=s2,
-                    fecha=today,
-                    hora_inicio=datetime.strptime('09:00', '%H:%M').time(),
-                    hora_fin=datetime.strptime('12:00', '%H:%M').time(),
-                    defaults={
-                        'usuario': admin,
-                        'motivo': 'Mantenimiento Preventivo',
-                        'descripcion': 'Revisión proyectores',
-                        'numero_asistentes': 2,
-                        'estado': 'confirmada'
-                    }
+        if not options['sin_iniciales']:
+            self.stdout.write('Poblando datos iniciales...')
+            creados = poblar_iniciales(hashes)
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {creados['usuarios']} usuarios, {creados['salones']} salones y "
+                f"{creados['reservas']} reservas de demostración nuevos"
+            ))
+
+        if options['salones'] or options['docentes'] or options['reservas']:
+            self.stdout.write('Generando campus sintético...')
+            try:
+                creados = generar_sintetico(
+                    options['salones'], options['docentes'], options['reservas'],
+                    inicio, anios=options['anios'], semilla=options['semilla'],
+                    tamano_lote=options['lote'], hashes=hashes,
+                    progreso=lambda n: self.stdout.write(f'   {n} reservas'),
                 )
-                self.stdout.write(self.style.SUCCESS(f'✅ Reservas creadas para {s2.nombre}'))
-        
-        self.stdout.write(self.style.SUCCESS(f'\n✅ Base de datos poblada exitosamente!'))
-        self.stdout.write(self.style.SUCCESS(f'📊 Total: {len(salones_creados)} salones creados'))
-        
-        # Mostrar credenciales
-        self.stdout.write('\n' + '='*60)
-        self.stdout.write(self.style.SUCCESS('🔑 CREDENCIALES DE ACCESO'))
-        self.stdout.write('='*60)
-        self.stdout.write(f'\n1. Administrador:')
-        self.stdout.write(f'   Usuario: admin')
-        self.stdout.write(f'   Contraseña: Admin123!')
-        self.stdout.write(f'\n2. Docente:')
-        self.stdout.write(f'   Usuario: docente1')
-        self.stdout.write(f'   Contraseña: Docente123!')
-        self.stdout.write('\n' + '='*60 + '\n')
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {creados['salones']} salones, {creados['docentes']} docentes y "
+                f"{creados['reservas']} reservas sintéticos nuevos"
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'📊 Base de datos poblada en {time.perf_counter() - comienzo:.1f} s'
+        ))
+
+        if not options['sin_iniciales']:
+            # Mostrar credenciales
+            self.stdout.write('\n' + '='*60)
+            self.stdout.write(self.style.SUCCESS('🔑 CREDENCIALES DE ACCESO'))
+            self.stdout.write('='*60)
+            self.stdout.write(f'\n1. Administrador:')
+            self.stdout.write(f'   Usuario: admin')
+            self.stdout.write(f'   Contraseña: Admin123!')
+            self.stdout.write(f'\n2. Docente:')
+            self.stdout.write(f'   Usuario: docente1')
+            self.stdout.write(f'   Contraseña: Docente123!')
+            if options['docentes']:
+                self.stdout.write(f'\n3. Docentes sintéticos: docente00001 ... (contraseña Docente123!)')
+            self.stdout.write('\n' + '='*60 + '\n')
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salones', '0002_salon_imagen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='hora_apertura',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salon',
+            name='hora_cierre',
+            field=models.TimeField(blank=True, null=True),
+        ),
+    ]
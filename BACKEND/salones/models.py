@@ -32,6 +32,10 @@ class Salon(models.Model):
     tiene_audio = models.BooleanField(default=False)
     tiene_wifi = models.BooleanField(default=False)
     
+    # Horario de operación propio (vacío = el de su bloque o el general)
+    hora_apertura = models.TimeField(blank=True, null=True)
+    hora_cierre = models.TimeField(blank=True, null=True)
+    
     estado = models.CharField(max_length=20, choices=ESTADOS, default='disponible')
     imagen_url = models.URLField(blank=True, null=True)
     imagen = models.ImageField(upload_to='salones/', blank=True, null=True)
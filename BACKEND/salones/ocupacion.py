@@ -0,0 +1,144 @@
+"""
+Ocupación compacta de salones por día, para vistas de semana y mes.
+
+Cada (salón, día) es una máscara de bits de ancho fijo: el bit i (contando
+desde el menos significativo) indica que la franja i de `granularidad`
+minutos a partir de la apertura general (salones.horarios.jornada_general)
+está ocupada por alguna reserva activa. Con 15 minutos entre las 6:00 y las
+22:00 son 64 franjas, un entero por día.
+
+Las máscaras son enteros de Python: marcar una reserva es un OR con un bloque
+de unos desplazado, y combinar salones o días es una operación de bits. Las
+de cada día se calculan para todos los salones con una sola consulta y se
+guardan en el caché con el token de versión de la fecha, así que una reserva
+nueva solo invalida su día.
+"""
+from datetime import time, timedelta
+from django.core.cache import cache as django_cache
+from django.db.models import CharField
+from django.db.models.functions import Cast
+
+from . import cache
+from reservas.models import ESTADOS_OCUPAN
+from .horarios import jornada_general
+
+
+# Minutos por franja por defecto
+GRANULARIDAD = 15
+
+
+def _segundos(t):
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def franja(t, jornada, redondear_arriba=False):
+    """Índice de la franja de `jornada` que contiene la hora `t` (o la primera que empieza después)"""
+    segundos = _segundos(t) - _segundos(jornada.apertura)
+    paso = jornada.granularidad * 60
+    return -(-segundos // paso) if redondear_arriba else segundos // paso
+
+
+def bloque(primera, ultima):
+    """Máscara con los bits de las franjas [primera, ultima)"""
+    return ((1 << (ultima - primera)) - 1) << primera if ultima > primera else 0
+
+
+def franjas_ocupadas(valor):
+    """Índices de los bits encendidos de una máscara"""
+    indices = []
+    while valor:
+        bajo = valor & -valor
+        indices.append(bajo.bit_length() - 1)
+        valor ^= bajo
+    return indices
+
+
+def _calcular(fechas, jornada):
+    # Importación dentro de la función para evitar ciclos
+    from reservas.models import Reserva
+
+    total = len(jornada)
+    por_dia = {fecha: {} for fecha in fechas}
+    por_texto = {fecha.isoformat(): dia for fecha, dia in por_dia.items()}
+    # Fechas y horas se leen como texto (convertirlas fila por fila es la
+    # mayor parte del costo) y cada hora distinta se pasa a franja una vez
+    inicios, fines = {}, {}
+    filas = Reserva.objects.filter(
+        fecha__in=fechas, estado__in=ESTADOS_OCUPAN,
+    ).order_by().annotate(
+        dia=Cast('fecha', CharField()),
+        inicio=Cast('hora_inicio', CharField()),
+        fin=Cast('hora_fin', CharField()),
+    ).values_list('dia', 'salon_id', 'inicio', 'fin')
+    for dia, salon_id, inicio, fin in filas.iterator(chunk_size=5000):
+        primera = inicios.get(inicio)
+        if primera is None:
+            primera = inicios[inicio] = max(franja(time.fromisoformat(inicio), jornada), 0)
+        ultima = fines.get(fin)
+        if ultima is None:
+            ultima = fines[fin] = min(franja(time.fromisoformat(fin), jornada, True), total)
+        if ultima > primera:
+            mascaras = por_texto[dia]
+            mascaras[salon_id] = mascaras.get(salon_id, 0) | bloque(primera, ultima)
+    return por_dia
+
+
+def _clave(fecha, version, jornada):
+    return ':'.join([
+        cache.PREFIJO, 'ocupacion', jornada.apertura.isoformat(), jornada.cierre.isoformat(),
+        str(jornada.granularidad), fecha.isoformat(), str(version),
+    ])
+
+
+def ocupacion_dias(fechas, granularidad=GRANULARIDAD):
+    """
+    {fecha: {salon_id: máscara}} de las fechas indicadas (los salones sin
+    reservas en un día no aparecen). Los días que no están en el caché se
+    calculan juntos con una sola consulta.
+    """
+    jornada = jornada_general(granularidad)
+    claves = {fecha: _clave(fecha, cache.version_fecha(fecha), jornada) for fecha in fechas}
+    guardados = django_cache.get_many(claves.values())
+    resultado = {}
+    faltantes = []
+    for fecha, clave in claves.items():
+        if clave in guardados:
+            resultado[fecha] = guardados[clave]
+        else:
+            faltantes.append(fecha)
+    if faltantes:
+        calculados = _calcular(faltantes, jornada)
+        resultado.update(calculados)
+        django_cache.set_many({claves[fecha]: dia for fecha, dia in calculados.items()})
+    return resultado
+
+
+def rejilla(salon_ids, desde, hasta, granularidad=GRANULARIDAD):
+    """
+    Rejilla de ocupación serializable: por salón, una máscara por día entre
+    `desde` y `hasta` (inclusive) como texto hexadecimal de ancho fijo (los
+    enteros de más de 53 bits no se representan con exactitud en JavaScript).
+    """
+    fechas = [desde + timedelta(days=d) for d in range((hasta - desde).days + 1)]
+    dias = ocupacion_dias(fechas, granularidad)
+    jornada = jornada_general(granularidad)
+    total = len(jornada)
+    formato = f'0{-(-total // 4)}x'
+    vacio = format(0, formato)
+    columnas = [dias[fecha] for fecha in fechas]
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'apertura': jornada.apertura.strftime('%H:%M'),
+        'cierre': jornada.cierre.strftime('%H:%M'),
+        'granularidad': granularidad,
+        'franjas': total,
+        'fechas': fechas,
+        'ocupacion': {
+            salon_id: [
+                format(dia[salon_id], formato) if salon_id in dia else vacio
+                for dia in columnas
+            ]
+            for salon_id in salon_ids
+        },
+    }
@@ -0,0 +1,433 @@
+"""
+Carga masiva de datos: datos iniciales y campus sintético.
+
+Todo se inserta con bulk_create por lotes, cada lote en su propia
+transacción, y se puede ejecutar en cada arranque del contenedor:
+
+- Los usuarios y salones que ya existen (por username o código) se omiten
+  con una consulta por tabla en lugar de un get_or_create por fila.
+- Las contraseñas se hashean una vez por contraseña distinta y el hash se
+  comparte entre los usuarios que la usan (PBKDF2 tarda cientos de ms).
+- Las reservas sintéticas se generan día por día con un generador aleatorio
+  sembrado con (semilla, día), así que el resultado es determinista y una
+  carga interrumpida continúa desde el último día completo.
+
+Como bulk_create no dispara las señales, el resumen de métricas se actualiza
+por lote y el caché de salones se invalida al terminar.
+"""
+import random
+from datetime import date, time, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from reservas.models import Reserva, ResumenReserva
+from reservas import resumen, indice
+from .models import Salon
+from . import cache
+
+
+Usuario = get_user_model()
+
+TAMANO_LOTE = 50000
+
+# Identificación de los datos sintéticos
+PREFIJO_SALON = 'SIN'
+PREFIJO_DOCENTE = 'docente'
+CLAVE_SINTETICA = 'Docente123!'
+
+# Horas de inicio posibles de una reserva sintética (la última termina a las 21:00)
+HORAS = list(range(7, 21))
+
+BLOQUES = [f'Bloque {letra}' for letra in 'ABCDEFGHIJ']
+TIPOS = ['aula'] * 6 + ['laboratorio'] * 2 + ['auditorio', 'sala_conferencias']
+CAPACIDADES = [20, 25, 30, 35, 40, 50, 60, 80, 120]
+ESTADOS = ['confirmada'] * 14 + ['pendiente'] * 3 + ['cancelada'] * 2 + ['completada']
+MOTIVOS = ['Clase', 'Parcial', 'Tutoría', 'Reunión', 'Seminario', 'Laboratorio', 'Sustentación']
+
+
+USUARIOS_INICIALES = [
+    {
+        'username': 'admin', 'password': 'Admin123!',
+        'email': 'admin@fesc.edu.co', 'first_name': 'Administrador', 'last_name': 'Sistema',
+        'rol': 'admin', 'documento': '1000000001', 'telefono': '3001234567',
+        'is_staff': True, 'is_superuser': True,
+    },
+    {
+        'username': 'docente1', 'password': 'Docente123!',
+        'email': 'docente1@fesc.edu.co', 'first_name': 'Carlos', 'last_name': 'Martínez',
+        'rol': 'docente', 'documento': '1000000002', 'telefono': '3009876543',
+    },
+    {
+        'username': 'docente2', 'password': 'Docente123!',
+        'email': 'docente2@fesc.edu.co', 'first_name': 'María', 'last_name': 'González',
+        'rol': 'docente', 'documento': '1000000003', 'telefono': '3005551234',
+    },
+]
+
+SALONES_INICIALES = [
+    {
+        'nombre': 'Aula A-204', 'codigo': 'A204', 'tipo': 'aula',
+        'bloque': 'Bloque A', 'piso': '2º Piso', 'capacidad': 30,
+        'descripcion': 'Aula estándar para clases magistrales',
+        'tiene_proyector': True, 'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1562774053-701939374585?w=500&q=80',
+    },
+    {
+        'nombre': 'Lab. Informática 1', 'codigo': 'LAB301', 'tipo': 'laboratorio',
+        'bloque': 'Bloque B', 'piso': '3º Piso', 'capacidad': 25,
+        'descripcion': 'Laboratorio de computación con 25 equipos',
+        'tiene_computadores': True, 'tiene_proyector': True,
+        'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1498050108023-c5249f4df085?w=500&q=80',
+    },
+    {
+        'nombre': 'Auditorio Magna', 'codigo': 'AUD01', 'tipo': 'auditorio',
+        'bloque': 'Planta Baja', 'piso': 'PB', 'capacidad': 120,
+        'descripcion': 'Auditorio principal para eventos y conferencias',
+        'tiene_proyector': True, 'tiene_smart_tv': True, 'tiene_audio': True,
+        'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=500&q=80',
+    },
+    {
+        'nombre': 'Sala de Conferencias 1', 'codigo': 'CONF401', 'tipo': 'sala_conferencias',
+        'bloque': 'Bloque C', 'piso': '4º Piso', 'capacidad': 15,
+        'descripcion': 'Sala para reuniones y conferencias pequeñas',
+        'tiene_smart_tv': True, 'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1497366754035-f200968a6e72?w=500&q=80',
+    },
+    {
+        'nombre': 'Aula B-105', 'codigo': 'B105', 'tipo': 'aula',
+        'bloque': 'Bloque B', 'piso': '1º Piso', 'capacidad': 40,
+        'descripcion': 'Aula amplia con capacidad para 40 estudiantes',
+        'tiene_proyector': True, 'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1562774053-701939374585?w=500&q=80',
+    },
+    {
+        'nombre': 'Lab. Física', 'codigo': 'LAB201', 'tipo': 'laboratorio',
+        'bloque': 'Bloque A', 'piso': '2º Piso', 'capacidad': 20,
+        'descripcion': 'Laboratorio equipado para prácticas de física',
+        'tiene_proyector': True, 'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1532094349884-543bc11b234d?w=500&q=80',
+    },
+    {
+        'nombre': 'Aula C-302', 'codigo': 'C302', 'tipo': 'aula',
+        'bloque': 'Bloque C', 'piso': '3º Piso', 'capacidad': 35,
+        'descripcion': 'Aula moderna con tecnología audiovisual',
+        'tiene_proyector': True, 'tiene_smart_tv': True,
+        'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1497366811353-6870744d04b2?w=500&q=80',
+    },
+    {
+        'nombre': 'Lab. Química', 'codigo': 'LAB202', 'tipo': 'laboratorio',
+        'bloque': 'Bloque A', 'piso': '2º Piso', 'capacidad': 18,
+        'descripcion': 'Laboratorio especializado en química',
+        'tiene_proyector': True, 'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'mantenimiento',
+        'imagen_url': 'https://images.unsplash.com/photo-1532187863486-abf9dbad1b69?w=500&q=80',
+    },
+    {
+        'nombre': 'Aula D-101', 'codigo': 'D101', 'tipo': 'aula',
+        'bloque': 'Bloque D', 'piso': '1º Piso', 'capacidad': 50,
+        'descripcion': 'Aula grande para clases numerosas',
+        'tiene_proyector': True, 'tiene_aire_acondicionado': True,
+        'tiene_audio': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1524178232363-1fb2b075b655?w=500&q=80',
+    },
+    {
+        'nombre': 'Sala Multimedia', 'codigo': 'MULT501', 'tipo': 'sala_conferencias',
+        'bloque': 'Bloque C', 'piso': '5º Piso', 'capacidad': 25,
+        'descripcion': 'Sala equipada con tecnología multimedia avanzada',
+        'tiene_proyector': True, 'tiene_smart_tv': True, 'tiene_audio': True,
+        'tiene_aire_acondicionado': True, 'tiene_wifi': True,
+        'estado': 'disponible',
+        'imagen_url': 'https://images.unsplash.com/photo-1505373877841-8d25f7d46678?w=500&q=80',
+    },
+]
+
+
+class HashesCompartidos(dict):
+    """Hash de cada contraseña calculado una sola vez"""
+
+    def __missing__(self, clave):
+        self[clave] = make_password(clave)
+        return self[clave]
+
+
+def _crear_faltantes(modelo, campo, filas, tamano_lote):
+    """bulk_create de las filas cuyo `campo` no existe todavía; devuelve cuántas se crearon"""
+    valores = [getattr(fila, campo) for fila in filas]
+    existentes = set()
+    # Consultas por tramos para no superar el límite de parámetros de SQLite
+    for i in range(0, len(valores), 10000):
+        existentes.update(modelo.objects.filter(
+            **{f'{campo}__in': valores[i:i + 10000]}
+        ).values_list(campo, flat=True))
+    nuevas = [fila for fila in filas if getattr(fila, campo) not in existentes]
+    for i in range(0, len(nuevas), tamano_lote):
+        with transaction.atomic():
+            modelo.objects.bulk_create(nuevas[i:i + tamano_lote], batch_size=1000)
+    return len(nuevas)
+
+
+def poblar_iniciales(hashes=None):
+    """Usuarios, salones y reservas de demostración; devuelve {'usuarios': n, 'salones': n, 'reservas': n}"""
+    hashes = hashes if hashes is not None else HashesCompartidos()
+    existentes = set(Usuario.objects.filter(
+        username__in=[datos['username'] for datos in USUARIOS_INICIALES]
+    ).values_list('username', flat=True))
+    # Solo se hashean las contraseñas de los usuarios por crear
+    usuarios = [
+        Usuario(**{k: v for k, v in datos.items() if k != 'password'}, password=hashes[datos['password']])
+        for datos in USUARIOS_INICIALES if datos['username'] not in existentes
+    ]
+    creados = {
+        'usuarios': _crear_faltantes(Usuario, 'username', usuarios, TAMANO_LOTE),
+        'salones': _crear_faltantes(Salon, 'codigo', [Salon(**d) for d in SALONES_INICIALES], TAMANO_LOTE),
+        'reservas': reservas_demo(),
+    }
+    if any(creados.values()):
+        cache.invalidar_listados()
+        indice.limpiar()
+    return creados
+
+
+def reservas_demo(fecha=None):
+    """Dos reservas confirmadas para hoy, salvo que choquen con reservas existentes"""
+    fecha = fecha or date.today()
+    demos = [
+        ('A204', 'docente1', time(8), time(10), 'Clase de Programación', 'Intro a Python', 20),
+        ('LAB301', 'admin', time(9), time(12), 'Mantenimiento Preventivo', 'Revisión proyectores', 2),
+    ]
+    salones = Salon.objects.in_bulk([d[0] for d in demos], field_name='codigo')
+    usuarios = Usuario.objects.in_bulk([d[1] for d in demos], field_name='username')
+    nuevas = []
+    for codigo, username, hora_inicio, hora_fin, motivo, descripcion, asistentes in demos:
+        salon, usuario = salones.get(codigo), usuarios.get(username)
+        if salon is None or usuario is None:
+            continue
+        if Reserva.objects.solapadas(salon, fecha, hora_inicio, hora_fin).exists() or \
+                Reserva.objects.filter(salon=salon, fecha=fecha, hora_inicio=hora_inicio).exists():
+            continue
+        nuevas.append(Reserva(
+            usuario=usuario, salon=salon, fecha=fecha, hora_inicio=hora_inicio, hora_fin=hora_fin,
+            motivo=motivo, descripcion=descripcion, numero_asistentes=asistentes, estado='confirmada',
+        ))
+    if nuevas:
+        _guardar_lote(nuevas)
+        # bulk_create no emite señales: los procesos que ya leyeron la fecha
+        # (horarios, índice de intervalos) deben volver a cargarla
+        cache.invalidar_fechas(fecha)
+    return len(nuevas)
+
+
+def dias_habiles(inicio, anios):
+    """Días de lunes a viernes desde `inicio` durante `anios` años"""
+    fin = inicio.replace(year=inicio.year + anios)
+    dia = inicio
+    while dia < fin:
+        if dia.weekday() < 5:
+            yield dia
+        dia += timedelta(days=1)
+
+
+def franjas_del_dia(rng, cantidad):
+    """`cantidad` franjas (hora_inicio, hora_fin) sin solapamiento dentro de un día"""
+    inicios = sorted(rng.sample(HORAS, cantidad))
+    franjas = []
+    for i, hora in enumerate(inicios):
+        siguiente = inicios[i + 1] if i + 1 < len(inicios) else HORAS[-1] + 1
+        franjas.append((hora, min(hora + rng.choice((1, 2, 2, 3)), siguiente)))
+    return franjas
+
+
+def _salones_sinteticos(cantidad, semilla):
+    rng = random.Random(f'{semilla}:salones')
+    return [
+        Salon(
+            nombre=f'Salón sintético {i:04d}', codigo=f'{PREFIJO_SALON}{i:04d}',
+            tipo=rng.choice(TIPOS), bloque=rng.choice(BLOQUES), piso=str(rng.randint(1, 5)),
+            capacidad=rng.choice(CAPACIDADES),
+            tiene_proyector=rng.random() < 0.7, tiene_computadores=rng.random() < 0.2,
+            tiene_aire_acondicionado=rng.random() < 0.5, tiene_smart_tv=rng.random() < 0.3,
+            tiene_audio=rng.random() < 0.3, tiene_wifi=rng.random() < 0.9,
+        )
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def _docentes_sinteticos(cantidad, clave):
+    return [
+        Usuario(
+            username=f'{PREFIJO_DOCENTE}{i:05d}', documento=f'D{i:07d}', password=clave,
+            first_name='Docente', last_name=f'{i:05d}',
+            email=f'{PREFIJO_DOCENTE}{i:05d}@campus.local', rol='docente',
+        )
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def _guardar_lote(reservas):
+    """Reservas creadas con bulk_create y su aporte al resumen (para pocas filas)"""
+    with transaction.atomic():
+        Reserva.objects.bulk_create(reservas, batch_size=5000)
+        resumen.aplicar(resumen.agregar_reservas(reservas))
+
+
+def _insertar(modelo, columnas, filas):
+    """
+    INSERT con executemany de filas ya adaptadas a la base de datos.
+
+    bulk_create prepara cada valor de cada campo y en SQLite parte el lote en
+    sentencias de ~999 parámetros; con millones de filas ese costo domina.
+    """
+    qn = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(modelo._meta.db_table),
+        ', '.join(qn(modelo._meta.get_field(c).column) for c in columnas),
+        ', '.join(['%s'] * len(columnas)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, filas)
+
+
+COLUMNAS_RESERVA = (
+    'usuario', 'salon', 'fecha', 'hora_inicio', 'hora_fin', 'motivo', 'descripcion',
+    'numero_asistentes', 'estado', 'fecha_creacion', 'fecha_actualizacion',
+)
+
+
+def _guardar_lote_sintetico(filas, salas):
+    """
+    Reservas sintéticas (dicts con los campos de COLUMNAS_RESERVA) y su aporte
+    al resumen. Las filas del resumen se insertan directamente salvo que ya
+    existan filas para esos salones y días; en ese caso se suman con aplicar().
+    """
+    ops = connection.ops
+    ahora = ops.adapt_datetimefield_value(timezone.now())
+    fechas = {fila['fecha'] for fila in filas}
+    fechas_db = {fecha: ops.adapt_datefield_value(fecha) for fecha in fechas}
+    horas_db = {}
+
+    def hora_db(valor):
+        if valor not in horas_db:
+            horas_db[valor] = ops.adapt_timefield_value(valor)
+        return horas_db[valor]
+
+    aportes = resumen.agregar_reservas(filas)
+    with transaction.atomic():
+        _insertar(Reserva, COLUMNAS_RESERVA, (
+            (
+                fila['usuario_id'], fila['salon_id'], fechas_db[fila['fecha']],
+                hora_db(fila['hora_inicio']), hora_db(fila['hora_fin']), fila['motivo'], '',
+                fila['numero_asistentes'], fila['estado'], ahora, ahora,
+            )
+            for fila in filas
+        ))
+        previas = ResumenReserva.objects.filter(
+            salon_id__in=[salon_id for salon_id, _ in salas], fecha__in=fechas,
+        ).exists()
+        if previas:
+            resumen.aplicar(aportes)
+        else:
+            _insertar(ResumenReserva, ('salon', 'fecha', 'hora', 'estado', 'reservas', 'minutos'), (
+                (salon_id, fechas_db[fecha], hora, estado, reservas, minutos)
+                for (salon_id, fecha, hora, estado), (reservas, minutos) in aportes.items()
+            ))
+
+
+def _generar_reservas(salas, usuarios, reservas, inicio, anios, semilla, tamano_lote, progreso):
+    """Reservas sin solapamiento por salón y día; devuelve cuántas se crearon"""
+    dias = list(dias_habiles(inicio, anios))
+    if not dias:
+        raise ValueError('El rango de fechas no tiene días hábiles')
+    promedio = reservas / (len(dias) * len(salas))
+    if promedio > len(HORAS):
+        raise ValueError(f'No caben {reservas} reservas: máximo {len(HORAS)} por salón y día')
+    base, fraccion = int(promedio), promedio - int(promedio)
+    horas = {hora: time(hora) for hora in range(HORAS[0], HORAS[-1] + 2)}
+
+    # Continuar desde el último día generado (los lotes se guardan por días completos)
+    ultimo = Reserva.objects.filter(
+        salon_id__in=[salon_id for salon_id, _ in salas], fecha__gte=dias[0], fecha__lte=dias[-1],
+    ).aggregate(ultimo=Max('fecha'))['ultimo']
+
+    lote = []
+    creadas = 0
+    for i, dia in enumerate(dias):
+        if ultimo is None or dia > ultimo:
+            rng = random.Random(f'{semilla}:{dia.isoformat()}')
+            for salon_id, capacidad in salas:
+                cantidad = base + (1 if rng.random() < fraccion else 0)
+                for hora_inicio, hora_fin in franjas_del_dia(rng, cantidad):
+                    lote.append({
+                        'usuario_id': rng.choice(usuarios), 'salon_id': salon_id, 'fecha': dia,
+                        'hora_inicio': horas[hora_inicio], 'hora_fin': horas[hora_fin],
+                        'motivo': rng.choice(MOTIVOS), 'numero_asistentes': rng.randint(5, capacidad),
+                        'estado': rng.choice(ESTADOS),
+                    })
+        if lote and (len(lote) >= tamano_lote or i == len(dias) - 1):
+            _guardar_lote_sintetico(lote, salas)
+            cache.invalidar_fechas(*{fila['fecha'] for fila in lote})
+            creadas += len(lote)
+            lote = []
+            if progreso:
+                progreso(creadas)
+    return creadas
+
+
+def generar_sintetico(salones, docentes, reservas, inicio, anios=1, semilla=42,
+                      tamano_lote=TAMANO_LOTE, progreso=None, hashes=None):
+    """
+    Campus sintético: `salones` salones, `docentes` docentes y unas `reservas`
+    reservas repartidas en los días hábiles de `anios` años desde `inicio`,
+    sin solapamientos dentro de cada salón.
+
+    Solo se crea lo que falta: los salones y docentes por código o username, y
+    las reservas desde el día siguiente al último ya generado. `progreso(n)`
+    se llama tras cada lote con el total de reservas creadas.
+
+    Devuelve {'salones': n, 'docentes': n, 'reservas': n} con lo creado.
+    """
+    hashes = hashes if hashes is not None else HashesCompartidos()
+    creados = {
+        'salones': _crear_faltantes(Salon, 'codigo', _salones_sinteticos(salones, semilla), tamano_lote),
+        'docentes': 0,
+        'reservas': 0,
+    }
+    nombres = {f'{PREFIJO_DOCENTE}{i:05d}' for i in range(1, docentes + 1)}
+    sinteticos = Usuario.objects.filter(username__regex=rf'^{PREFIJO_DOCENTE}\d{{5}}$')
+    # El hash solo se calcula si falta algún docente
+    if sinteticos.count() < docentes:
+        creados['docentes'] = _crear_faltantes(
+            Usuario, 'username', _docentes_sinteticos(docentes, hashes[CLAVE_SINTETICA]), tamano_lote
+        )
+    if reservas:
+        if not salones or not docentes:
+            raise ValueError('Se necesitan salones y docentes para generar reservas')
+        codigos = [salon.codigo for salon in _salones_sinteticos(salones, semilla)]
+        salas = list(
+            Salon.objects.filter(codigo__in=codigos).order_by('codigo').values_list('id', 'capacidad')
+        )
+        usuarios = [
+            usuario_id for username, usuario_id in sinteticos.order_by('username').values_list('username', 'id')
+            if username in nombres
+        ]
+        creados['reservas'] = _generar_reservas(
+            salas, usuarios, reservas, inicio, anios, semilla, tamano_lote, progreso
+        )
+
+    if any(creados.values()):
+        cache.invalidar_listados()
+        indice.limpiar()
+    return creados
@@ -1,17 +1,47 @@
 from rest_framework import serializers
+from gecos_backend.campos import CamposDinamicosMixin
 from .models import Salon
+from .horarios import construir_horarios, resolver_fecha, resolver_granularidad
 
 
-class SalonSerializer(serializers.ModelSerializer):
+class SalonSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Salon"""
     
     class Meta:
         model = Salon
         fields = '__all__'
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
+    
+    def validate(self, data):
+        apertura = data.get('hora_apertura', getattr(self.instance, 'hora_apertura', None))
+        cierre = data.get('hora_cierre', getattr(self.instance, 'hora_cierre', None))
+        if (apertura is None) != (cierre is None):
+            raise serializers.ValidationError(
+                "Se deben indicar juntas 'hora_apertura' y 'hora_cierre' (o ninguna)"
+            )
+        if apertura is not None and cierre <= apertura:
+            raise serializers.ValidationError('La hora de cierre debe ser mayor que la hora de apertura')
+        return data
+
+
+class SalonHorarioListSerializer(serializers.ListSerializer):
+    """
+    Serializa una lista de salones calculando los horarios de todos en una
+    sola consulta y compartiéndolos con cada elemento a través del contexto.
+    """
+
+    def to_representation(self, data):
+        salones = data.all() if hasattr(data, 'all') else data
+        salones = list(salones)
+        if 'schedule' in self.child.fields and 'horarios' not in self.context:
+            request = self.context.get('request')
+            self.context['horarios'] = construir_horarios(
+                salones, resolver_fecha(request), resolver_granularidad(request)
+            )
+        return [self.child.to_representation(salon) for salon in salones]
 
 
-class SalonListSerializer(serializers.ModelSerializer):
+class SalonListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer simplificado para listado de salones"""
     status = serializers.SerializerMethodField()
     statusText = serializers.SerializerMethodField()
@@ -24,6 +54,15 @@ class SalonListSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'codigo', 'tipo', 'bloque', 'piso', 'capacidad', 
                   'tiene_proyector', 'tiene_aire_acondicionado', 'estado', 'imagen_url', 'imagen',
                   'status', 'statusText', 'statusColor', 'features', 'schedule']
+        list_serializer_class = SalonHorarioListSerializer
+    
+    dependencias = {
+        'status': ('estado',),
+        'statusText': ('estado',),
+        'statusColor': ('estado',),
+        'features': ('tiene_proyector', 'tiene_aire_acondicionado', 'tiene_computadores', 'tiene_wifi'),
+        'schedule': ('bloque', 'hora_apertura', 'hora_cierre'),
+    }
 
     def get_status(self, obj):
         mapping = {
@@ -69,58 +108,18 @@ class SalonListSerializer(serializers.ModelSerializer):
         return feats
 
     def get_schedule(self, obj):
-        from datetime import datetime, time, timedelta
-        from django.utils import timezone
-        # Importación dentro del método para evitar ciclos
-        from reservas.models import Reserva
-        
-        # Intentar obtener la fecha del query param, si no existe usar hoy (local)
-        request = self.context.get('request')
-        # Usar .GET en lugar de .query_params para compatibilidad con requests de Django puro y DRF
-        fecha_param = request.GET.get('fecha') if request else None
-        
-        if fecha_param:
-            try:
-                today = datetime.strptime(fecha_param, '%Y-%m-%d').date()
-            except ValueError:
-                local_now = timezone.localtime(timezone.now())
-                today = local_now.date()
-        else:
-            local_now = timezone.localtime(timezone.now())
-            today = local_now.date()
-        
-        # DEBUG: Imprimir para verificar qué fecha se está consultando realmente
-        # print(f"DEBUG: Salon {obj.codigo} - Consultando fecha: {today}")
+        horarios = self.context.get('horarios')
+        if horarios is None or obj.pk not in horarios:
+            # Serialización individual: calcular solo el horario de este salón
+            request = self.context.get('request')
+            horarios = construir_horarios([obj], resolver_fecha(request), resolver_granularidad(request))
+        return horarios[obj.pk]
 
-        # Definir horario de operación extendido (6 AM - 10 PM)
-        start_hour = 6
-        end_hour = 22
-        slots = []
-        
-        # Filtrar reservas confirmadas para este salón y esta fecha
-        reservations = Reserva.objects.filter(
-            salon=obj, 
-            fecha=today,
-            estado__in=['confirmada', 'completada', 'pendiente']
-        )
-        
-        for h in range(start_hour, end_hour):
-            slot_start = time(h, 0)
-            slot_end = time(h + 1, 0)
-            
-            status = 'available'
-            
-            # Verificar si hay reserva en este bloque
-            for res in reservations:
-                # Lógica de intersección de rangos:
-                # Un intervalo [A, B] se solapa con [C, D] si A < D y B > C
-                if (res.hora_inicio < slot_end) and (res.hora_fin > slot_start):
-                    status = 'occupied'
-                    break
-            
-            slots.append({
-                'time': f"{h:02d}:00",
-                'status': status
-            })
-            
-        return slots
+
+class SalonResumenSerializer(SalonListSerializer):
+    """Resumen del salón embebido en otros recursos (sin horario del día)"""
+    schedule = None
+    
+    class Meta(SalonListSerializer.Meta):
+        fields = [f for f in SalonListSerializer.Meta.fields if f != 'schedule']
+        list_serializer_class = serializers.ListSerializer
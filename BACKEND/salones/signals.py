@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from reservas.models import Reserva
+from .models import Salon
+from . import cache
+
+
+@receiver([post_save, post_delete], sender=Salon)
+def invalidar_cache_salon(sender, instance, **kwargs):
+    """Un cambio en el salón invalida su detalle y los listados"""
+    cache.invalidar_salon(instance.pk)
+
+
+@receiver(post_save, sender=Reserva)
+def invalidar_cache_reserva(sender, instance, raw=False, **kwargs):
+    """Una reserva nueva o editada invalida los listados de su fecha (y de la anterior)"""
+    if raw:
+        return
+    previos = getattr(instance, '_valores_previos', None) or {}
+    cache.invalidar_fechas(instance.fecha, previos.get('fecha'))
+
+
+@receiver(post_delete, sender=Reserva)
+def invalidar_cache_reserva_eliminada(sender, instance, **kwargs):
+    cache.invalidar_fechas(instance.fecha)
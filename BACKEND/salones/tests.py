@@ -1,3 +1,481 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import date, time
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from usuarios.models import Usuario
+from reservas.models import Reserva, ResumenReserva
+from reservas.resumen import reconstruir
+from .cache import aclave_lista, clave_lista, version_fecha
+from .horarios import Jornada
+from .models import Salon
+from .ocupacion import franjas_ocupadas
+from .poblado import generar_sintetico
 
-# Create your tests here.
+
+class HorarioSalonesTest(TestCase):
+    """Pruebas del cálculo de horarios en el listado de salones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+        cls.salones = [
+            Salon.objects.create(
+                nombre=f'Aula {i}', codigo=f'A{i}', bloque='Bloque A',
+                piso='1', capacidad=30
+            )
+            for i in range(5)
+        ]
+        cls.fecha = date(2030, 3, 4)
+        Reserva.objects.create(
+            usuario=cls.usuario, salon=cls.salones[0], fecha=cls.fecha,
+            hora_inicio=time(8, 0), hora_fin=time(10, 0),
+            motivo='Clase', numero_asistentes=10, estado='confirmada'
+        )
+        Reserva.objects.create(
+            usuario=cls.usuario, salon=cls.salones[1], fecha=cls.fecha,
+            hora_inicio=time(10, 30), hora_fin=time(11, 0),
+            motivo='Clase', numero_asistentes=10, estado='cancelada'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_horario_marca_bloques_ocupados(self):
+        response = self.client.get('/api/salones/', {'fecha': '2030-03-04'})
+        salon = next(s for s in response.data['results'] if s['id'] == self.salones[0].id)
+        ocupados = [slot['time'] for slot in salon['schedule'] if slot['status'] == 'occupied']
+        self.assertEqual(ocupados, ['08:00', '09:00'])
+
+    def test_reservas_canceladas_no_ocupan(self):
+        response = self.client.get('/api/salones/', {'fecha': '2030-03-04'})
+        salon = next(s for s in response.data['results'] if s['id'] == self.salones[1].id)
+        self.assertTrue(all(slot['status'] == 'available' for slot in salon['schedule']))
+
+    def test_campos_seleccionados_omiten_horario(self):
+        # Sin 'schedule' no se consultan las reservas
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/salones/', {'fields': 'id,nombre,status'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'nombre', 'status'})
+
+    def test_consultas_constantes_con_mas_salones(self):
+        with self.assertNumQueries(3):
+            self.client.get('/api/salones/', {'fecha': '2030-03-04'})
+        for i in range(5, 9):
+            Salon.objects.create(
+                nombre=f'Aula {i}', codigo=f'A{i}', bloque='Bloque B',
+                piso='1', capacidad=30
+            )
+        with self.assertNumQueries(3):
+            self.client.get('/api/salones/', {'fecha': '2030-03-04'})
+
+    def test_franjas_de_media_hora(self):
+        # 10:30-11:00 ocupa solo la segunda media hora de las 10
+        Reserva.objects.create(
+            usuario=self.usuario, salon=self.salones[2], fecha=self.fecha,
+            hora_inicio=time(10, 30), hora_fin=time(11, 0),
+            motivo='Clase', numero_asistentes=10, estado='confirmada'
+        )
+        response = self.client.get('/api/salones/', {'fecha': '2030-03-04', 'granularidad': 30})
+        salon = next(s for s in response.data['results'] if s['id'] == self.salones[2].id)
+        self.assertEqual(len(salon['schedule']), 32)
+        ocupados = [slot['time'] for slot in salon['schedule'] if slot['status'] == 'occupied']
+        self.assertEqual(ocupados, ['10:30'])
+
+    @override_settings(HORARIOS_BLOQUE={'Bloque A': ('07:00', '12:00')})
+    def test_horario_del_salon_y_del_bloque(self):
+        propio = Salon.objects.create(
+            nombre='Aula nocturna', codigo='N1', bloque='Bloque A', piso='1', capacidad=30,
+            hora_apertura=time(18, 0), hora_cierre=time(21, 30)
+        )
+        otro_bloque = Salon.objects.create(
+            nombre='Aula B', codigo='B1', bloque='Bloque B', piso='1', capacidad=30
+        )
+        response = self.client.get('/api/salones/', {'fecha': '2030-03-04'})
+        horarios = {s['id']: [slot['time'] for slot in s['schedule']] for s in response.data['results']}
+        self.assertEqual(horarios[self.salones[0].id], ['07:00', '08:00', '09:00', '10:00', '11:00'])
+        self.assertEqual(horarios[propio.id], ['18:00', '19:00', '20:00', '21:00'])
+        self.assertEqual(len(horarios[otro_bloque.id]), 16)
+
+    def test_horario_propio_invalido(self):
+        response = self.client.post('/api/salones/', {
+            'nombre': 'Aula X', 'codigo': 'X1', 'bloque': 'Bloque A', 'piso': '1',
+            'capacidad': 30, 'hora_apertura': '20:00', 'hora_cierre': '08:00',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class JornadaTest(SimpleTestCase):
+    """Pruebas del marcado de franjas en un solo recorrido"""
+
+    def test_marca_franjas_que_se_solapan(self):
+        jornada = Jornada('08:00', '10:45', 30)
+        self.assertEqual(jornada.etiquetas(), ['08:00', '08:30', '09:00', '09:30', '10:00', '10:30'])
+        def h(horas, minutos):
+            return horas * 3600 + minutos * 60
+
+        ocupadas = jornada.ocupadas([
+            (h(7, 0), h(8, 10)),     # empieza antes de la apertura
+            (h(7, 30), h(9, 5)),     # contiene a la siguiente
+            (h(8, 15), h(8, 20)),
+            (h(10, 40), h(11, 0)),   # la última franja termina en el cierre
+        ])
+        self.assertEqual(ocupadas, [True, True, True, False, False, True])
+        self.assertEqual(jornada.ocupadas([]), [False] * 6)
+        # Una reserva después del cierre no ocupa la última franja recortada
+        self.assertEqual(jornada.ocupadas([(h(10, 50), h(11, 30))]), [False] * 6)
+
+
+class DisponibilidadSalonesTest(TestCase):
+    """Pruebas de la búsqueda de salones libres"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+        cls.grande = Salon.objects.create(
+            nombre='Auditorio', codigo='AUD', bloque='A', piso='1',
+            capacidad=100, tiene_proyector=True
+        )
+        cls.mediano = Salon.objects.create(
+            nombre='Aula 40', codigo='A40', bloque='A', piso='1',
+            capacidad=40, tiene_proyector=True
+        )
+        cls.pequeno = Salon.objects.create(
+            nombre='Aula 20', codigo='A20', bloque='A', piso='1', capacidad=20
+        )
+        Reserva.objects.create(
+            usuario=cls.usuario, salon=cls.mediano, fecha=date(2030, 3, 5),
+            hora_inicio=time(9, 0), hora_fin=time(11, 0),
+            motivo='Clase', numero_asistentes=30, estado='pendiente'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def buscar(self, **params):
+        return self.client.get('/api/salones/disponibles/', params)
+
+    def test_excluye_salones_ocupados_y_ordena_por_ajuste(self):
+        response = self.buscar(fecha='2030-03-05', hora_inicio='10:00', hora_fin='12:00')
+        self.assertEqual([s['id'] for s in response.data], [self.pequeno.id, self.grande.id])
+
+        response = self.buscar(fecha='2030-03-05', hora_inicio='11:00', hora_fin='12:00')
+        self.assertEqual(
+            [s['id'] for s in response.data],
+            [self.pequeno.id, self.mediano.id, self.grande.id]
+        )
+
+    def test_capacidad_recursos_y_rango_de_dias(self):
+        response = self.buscar(
+            fecha='2030-03-03', hasta='2030-03-09', hora_inicio='08:00',
+            hora_fin='09:30', capacidad=25, tiene_proyector='true'
+        )
+        self.assertEqual([s['id'] for s in response.data], [self.grande.id])
+
+    def test_parametros_invalidos(self):
+        response = self.buscar(fecha='2030-03-05', hora_inicio='12:00', hora_fin='10:00')
+        self.assertEqual(response.status_code, 400)
+        response = self.buscar(fecha='2030-03-05')
+        self.assertEqual(response.status_code, 400)
+
+    def test_huecos_y_siguiente_libre_de_un_salon(self):
+        url = f'/api/salones/{self.mediano.id}/libres/'
+        response = self.client.get(url, {'fecha': '2030-03-05', 'duracion': 90, 'desde': '08:00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(h['hora_inicio'], h['hora_fin']) for h in response.data['huecos']],
+            [(time(6, 0), time(9, 0)), (time(11, 0), time(22, 0))]
+        )
+        self.assertEqual(response.data['siguiente']['hora_inicio'], time(11, 0))
+        self.assertEqual(response.data['siguiente']['hora_fin'], time(12, 30))
+
+        response = self.client.get(url, {'fecha': '2030-03-05', 'duracion': 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class OcupacionSalonesTest(TestCase):
+    """Pruebas de la rejilla de ocupación en máscaras de bits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+        cls.a = Salon.objects.create(nombre='Aula A', codigo='A', bloque='A', piso='1', capacidad=30)
+        cls.b = Salon.objects.create(nombre='Aula B', codigo='B', bloque='B', piso='1', capacidad=30)
+        for inicio, fin, estado in [
+            (time(6, 0), time(7, 0), 'confirmada'),
+            (time(9, 10), time(9, 40), 'pendiente'),
+            (time(12, 0), time(13, 0), 'cancelada'),
+        ]:
+            Reserva.objects.create(
+                usuario=cls.usuario, salon=cls.a, fecha=date(2030, 3, 5),
+                hora_inicio=inicio, hora_fin=fin, motivo='Clase',
+                numero_asistentes=10, estado=estado
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def rejilla(self, **params):
+        return self.client.get('/api/salones/ocupacion/', params)
+
+    def test_mascaras_por_salon_y_dia(self):
+        response = self.rejilla(desde='2030-03-04', hasta='2030-03-06')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['franjas'], 64)
+        self.assertEqual(len(response.data['fechas']), 3)
+        lunes, martes, miercoles = response.data['ocupacion'][self.a.id]
+        self.assertEqual(len(martes), 16)
+        self.assertEqual(int(lunes, 16), 0)
+        self.assertEqual(int(miercoles, 16), 0)
+        # 6:00-7:00 son las franjas 0-3; 9:10-9:40 toca las franjas 12-14
+        self.assertEqual(franjas_ocupadas(int(martes, 16)), [0, 1, 2, 3, 12, 13, 14])
+        self.assertEqual([int(m, 16) for m in response.data['ocupacion'][self.b.id]], [0, 0, 0])
+
+        response = self.rejilla(desde='2030-03-05', granularidad=60, bloque='A')
+        self.assertEqual(list(response.data['ocupacion']), [self.a.id])
+        self.assertEqual(franjas_ocupadas(int(response.data['ocupacion'][self.a.id][0], 16)), [0, 3])
+
+    def test_una_reserva_nueva_invalida_su_dia(self):
+        self.rejilla(desde='2030-03-05')
+        Reserva.objects.create(
+            usuario=self.usuario, salon=self.b, fecha=date(2030, 3, 5),
+            hora_inicio=time(21, 45), hora_fin=time(22, 0), motivo='Clase',
+            numero_asistentes=10, estado='confirmada'
+        )
+        with self.assertNumQueries(2):
+            response = self.rejilla(desde='2030-03-05')
+        self.assertEqual(franjas_ocupadas(int(response.data['ocupacion'][self.b.id][0], 16)), [63])
+        with self.assertNumQueries(1):
+            self.rejilla(desde='2030-03-05')
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.rejilla(desde='2030-03-05', hasta='2030-03-01').status_code, 400)
+        self.assertEqual(self.rejilla(desde='2030-03-01', hasta='2030-04-30').status_code, 400)
+        self.assertEqual(self.rejilla(desde='2030-03-05', granularidad=7).status_code, 400)
+
+
+class CacheSalonesTest(TestCase):
+    """Pruebas del caché de listados y detalle de salones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+        cls.a1 = Salon.objects.create(nombre='Aula 1', codigo='A1', bloque='A', piso='1', capacidad=30)
+        cls.a2 = Salon.objects.create(nombre='Aula 2', codigo='A2', bloque='A', piso='1', capacidad=30)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def horario(self, fecha):
+        response = self.client.get('/api/salones/', {'fecha': fecha})
+        salon = next(s for s in response.data['results'] if s['id'] == self.a1.id)
+        return [slot['time'] for slot in salon['schedule'] if slot['status'] == 'occupied']
+
+    def test_lectura_repetida_sin_consultas(self):
+        self.horario('2030-03-04')
+        self.client.get(f'/api/salones/{self.a1.id}/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/salones/', {'fecha': '2030-03-04'})
+            self.client.get(f'/api/salones/{self.a1.id}/')
+
+    def test_reserva_invalida_solo_su_fecha(self):
+        self.assertEqual(self.horario('2030-03-04'), [])
+        self.horario('2030-03-05')
+        self.client.get(f'/api/salones/{self.a1.id}/')
+
+        reserva = Reserva.objects.create(
+            usuario=self.usuario, salon=self.a1, fecha=date(2030, 3, 4),
+            hora_inicio=time(8, 0), hora_fin=time(9, 0),
+            motivo='Clase', numero_asistentes=10
+        )
+        with self.assertNumQueries(0):
+            self.horario('2030-03-05')
+            self.client.get(f'/api/salones/{self.a1.id}/')
+        self.assertEqual(self.horario('2030-03-04'), ['08:00'])
+
+        # Mover la reserva invalida la fecha anterior y la nueva
+        reserva.fecha = date(2030, 3, 5)
+        reserva.save()
+        self.assertEqual(self.horario('2030-03-04'), [])
+        self.assertEqual(self.horario('2030-03-05'), ['08:00'])
+
+        reserva.delete()
+        self.assertEqual(self.horario('2030-03-05'), [])
+
+    def test_cambio_de_salon_invalida_su_detalle(self):
+        self.client.get(f'/api/salones/{self.a1.id}/')
+        self.client.get(f'/api/salones/{self.a2.id}/')
+        self.a1.capacidad = 45
+        self.a1.save()
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/salones/{self.a2.id}/')
+        response = self.client.get(f'/api/salones/{self.a1.id}/')
+        self.assertEqual(response.data['capacidad'], 45)
+
+    def test_etag_del_listado_cambia_con_reservas_de_la_fecha(self):
+        etag = self.client.get('/api/salones/', {'fecha': '2030-03-04'})['ETag']
+        response = self.client.get('/api/salones/', {'fecha': '2030-03-04'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Reserva.objects.create(
+            usuario=self.usuario, salon=self.a1, fecha=date(2030, 3, 4),
+            hora_inicio=time(8, 0), hora_fin=time(9, 0),
+            motivo='Clase', numero_asistentes=10
+        )
+        response = self.client.get('/api/salones/', {'fecha': '2030-03-04'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class LecturasAsincronasTest(TestCase):
+    """Las vistas asíncronas devuelven lo mismo que las de DRF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+        cls.salones = [
+            Salon.objects.create(
+                nombre=f'Aula {i}', codigo=f'A{i}', bloque='Bloque A',
+                piso='1', capacidad=20 + i * 10, tiene_proyector=i % 2 == 0
+            )
+            for i in range(12)
+        ]
+        Reserva.objects.create(
+            usuario=cls.usuario, salon=cls.salones[0], fecha=date(2030, 3, 4),
+            hora_inicio=time(8, 0), hora_fin=time(10, 0),
+            motivo='Clase', numero_asistentes=10, estado='confirmada'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    async def comparar(self, ruta_sync, ruta_async, params):
+        esperado = await sync_to_async(self.client.get)(ruta_sync, params)
+        response = await self.async_client.get(ruta_async, params)
+        self.assertEqual(response.status_code, 200)
+        datos, esperados = response.json(), json.loads(esperado.content)
+        if isinstance(datos, dict):
+            # Los enlaces de paginación apuntan a cada versión del endpoint
+            for enlace in ('next', 'previous'):
+                self.assertEqual(bool(datos.pop(enlace)), bool(esperados.pop(enlace)))
+        self.assertEqual(datos, esperados)
+        return datos
+
+    async def test_listado(self):
+        datos = await self.comparar('/api/salones/', '/api/async/salones/', {'fecha': '2030-03-04'})
+        self.assertEqual(datos['count'], 12)
+        await self.comparar('/api/salones/', '/api/async/salones/', {
+            'fecha': '2030-03-04', 'page': 2, 'ordering': '-capacidad',
+        })
+        await self.comparar('/api/salones/', '/api/async/salones/', {
+            'tiene_proyector': 'true', 'search': 'Aula 1', 'fields': 'id,nombre,schedule',
+        })
+
+    async def test_listado_sin_cache_sincrono_en_el_event_loop(self):
+        clase = type(caches['default'])
+
+        def fuera_del_loop(original):
+            def metodo(*args, **kwargs):
+                with self.assertRaises(RuntimeError, msg='E/S de caché síncrona en el event loop'):
+                    asyncio.get_running_loop()
+                return original(*args, **kwargs)
+            return metodo
+
+        with mock.patch.multiple(clase, **{
+            nombre: fuera_del_loop(getattr(clase, nombre)) for nombre in ('get', 'set', 'add')
+        }):
+            for _ in range(2):
+                response = await self.async_client.get('/api/async/salones/', {'fecha': '2030-03-04'})
+                self.assertEqual(response.status_code, 200)
+
+    async def test_clave_asincrona_igual_a_la_sincrona(self):
+        request = RequestFactory().get('/api/salones/', {'fecha': '2030-03-04'})
+        self.assertEqual(await aclave_lista(request), await sync_to_async(clave_lista)(request))
+
+    async def test_disponibles(self):
+        datos = await self.comparar('/api/salones/disponibles/', '/api/async/salones/disponibles/', {
+            'fecha': '2030-03-04', 'hora_inicio': '09:00', 'hora_fin': '10:00', 'capacidad': 25,
+        })
+        self.assertNotIn(self.salones[0].id, [salon['id'] for salon in datos])
+
+    async def test_horario(self):
+        response = await self.async_client.get(
+            f'/api/async/salones/{self.salones[0].id}/horario/', {'fecha': '2030-03-04'}
+        )
+        ocupados = [slot['time'] for slot in response.json()['schedule'] if slot['status'] == 'occupied']
+        self.assertEqual(ocupados, ['08:00', '09:00'])
+        response = await self.async_client.get('/api/async/salones/999/horario/')
+        self.assertEqual(response.status_code, 404)
+
+
+class PobladoMasivoTest(TestCase):
+    """Pruebas del cargador masivo de `manage.py poblar_db`"""
+
+    def poblar(self):
+        call_command(
+            'poblar_db', salones=4, docentes=6, reservas=300, inicio='2030-01-07', semilla=7,
+            lote=100, stdout=StringIO(),
+        )
+
+    def test_idempotente_y_sin_solapamientos(self):
+        self.poblar()
+        conteos = (Usuario.objects.count(), Salon.objects.count(), Reserva.objects.count())
+        self.assertEqual(conteos[:2], (3 + 6, 10 + 4))
+        self.assertAlmostEqual(Reserva.objects.filter(salon__codigo__startswith='SIN').count(), 300, delta=60)
+
+        self.poblar()
+        self.assertEqual((Usuario.objects.count(), Salon.objects.count(), Reserva.objects.count()), conteos)
+
+        for reserva in Reserva.objects.filter(salon__codigo__startswith='SIN')[:100]:
+            self.assertFalse(Reserva.objects.solapadas(
+                reserva.salon, reserva.fecha, reserva.hora_inicio, reserva.hora_fin, excluir=reserva.pk
+            ).exists())
+
+    def test_invalida_las_fechas_generadas(self):
+        # Versiones leídas antes de poblar (por ejemplo por otro proceso)
+        hoy, lunes = date.today(), date(2030, 1, 7)
+        previas = (version_fecha(hoy), version_fecha(lunes))
+        self.poblar()
+        self.assertNotEqual(version_fecha(hoy), previas[0])
+        self.assertNotEqual(version_fecha(lunes), previas[1])
+
+    def test_rango_sin_dias_habiles(self):
+        with self.assertRaisesMessage(CommandError, "'--anios' debe ser al menos 1"):
+            call_command('poblar_db', salones=1, docentes=1, reservas=10, anios=0, stdout=StringIO())
+        with self.assertRaisesMessage(ValueError, 'no tiene días hábiles'):
+            generar_sintetico(1, 1, 10, date(2030, 1, 7), anios=-1)
+
+    def test_hash_compartido_y_resumen(self):
+        with mock.patch('salones.poblado.make_password', wraps=make_password) as hashear:
+            self.poblar()
+        # Una vez por contraseña distinta (admin y docentes)
+        self.assertEqual(hashear.call_count, 2)
+        self.assertTrue(Usuario.objects.get(username='docente00003').check_password('Docente123!'))
+
+        def filas():
+            return sorted(ResumenReserva.objects.values_list(
+                'salon_id', 'fecha', 'hora', 'estado', 'reservas', 'minutos'
+            ))
+
+        incremental = filas()
+        reconstruir()
+        self.assertEqual(filas(), incremental)
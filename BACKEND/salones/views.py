@@ -1,13 +1,21 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
+from gecos_backend.campos import CamposDinamicosViewSetMixin
+from gecos_backend.condicional import ValidacionCondicionalMixin
 from .models import Salon
 from .serializers import SalonSerializer, SalonListSerializer
+from .disponibilidad import (
+    buscar_desde_parametros, libres_desde_parametros, ocupacion_desde_parametros, BusquedaInvalida,
+)
+from . import cache
+from .cache import CacheSalonesMixin
 
 
-class SalonViewSet(viewsets.ModelViewSet):
+class SalonViewSet(ValidacionCondicionalMixin, CacheSalonesMixin, CamposDinamicosViewSetMixin,
+                   viewsets.ModelViewSet):
     """ViewSet para gestionar salones"""
     queryset = Salon.objects.all()
     serializer_class = SalonSerializer
@@ -22,9 +30,47 @@ class SalonViewSet(viewsets.ModelViewSet):
             return SalonListSerializer
         return SalonSerializer
     
+    def calcular_validadores(self, request, queryset, detalle=False):
+        # El ETag sale de los tokens de versión del caché, sin consultas
+        salon_id = self.kwargs[self.lookup_url_kwarg or self.lookup_field] if detalle else None
+        return cache.etag(request, salon_id), None
+    
     @action(detail=False, methods=['get'])
     def disponibles(self, request):
-        """Obtener solo salones disponibles"""
-        salones = self.queryset.filter(estado='disponible')
+        """
+        Buscar salones libres.
+
+        Con ?fecha=&hora_inicio=&hora_fin= devuelve los salones sin reservas
+        que se solapen con esa franja (opcionalmente hasta ?hasta= para varios
+        días), filtrando por ?capacidad= y por los recursos tiene_*.
+        """
+        try:
+            salones = buscar_desde_parametros(request.query_params, self.queryset)
+        except BusquedaInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         serializer = SalonListSerializer(salones, many=True, context={'request': request})
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def ocupacion(self, request):
+        """
+        Rejilla de ocupación de ?desde= a ?hasta= (máx. 31 días): por salón,
+        una máscara de bits por día con las franjas de ?granularidad= minutos
+        ocupadas. Acepta los mismos filtros que el listado.
+        """
+        salon_ids = self.filter_queryset(self.get_queryset()).order_by('id').values_list('id', flat=True)
+        try:
+            return Response(ocupacion_desde_parametros(list(salon_ids), request.query_params))
+        except BusquedaInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def libres(self, request, pk=None):
+        """
+        Huecos libres del salón en ?fecha= de al menos ?duracion= minutos y la
+        siguiente franja libre desde ?desde= (HH:MM)
+        """
+        try:
+            return Response(libres_desde_parametros(self.get_object(), request.query_params))
+        except BusquedaInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,65 @@
+"""
+Versiones asíncronas de las lecturas de salones (ver gecos_backend.asincrono).
+
+    GET /api/async/salones/                  listado (mismos filtros que /api/salones/)
+    GET /api/async/salones/disponibles/      búsqueda de salones libres
+    GET /api/async/salones/<id>/horario/     horario del día (?fecha=, ?granularidad=)
+"""
+from django.core.cache import cache
+from rest_framework.exceptions import ValidationError
+from gecos_backend.asincrono import (
+    PaginaInvalida, paginar, queryset_de_vista, respuesta_json,
+)
+from .models import Salon
+from .serializers import SalonListSerializer
+from .disponibilidad import buscar_desde_parametros, BusquedaInvalida
+from .horarios import aconstruir_horarios, resolver_fecha, resolver_granularidad
+from .cache import aclave_lista
+from .views import SalonViewSet
+
+
+async def _serializar_salones(request, salones):
+    serializer = SalonListSerializer(salones, many=True, context={'request': request})
+    if 'schedule' in serializer.child.fields:
+        # Calcular los horarios aquí para que el serializer no consulte
+        serializer.context['horarios'] = await aconstruir_horarios(
+            salones, resolver_fecha(request), resolver_granularidad(request)
+        )
+    return serializer.data
+
+
+async def lista(request):
+    """Listado paginado de salones con su horario del día"""
+    clave = await aclave_lista(request, 'lista_async')
+    datos = await cache.aget(clave)
+    if datos is not None:
+        return respuesta_json(datos)
+    try:
+        salones, paginacion = await paginar(request, queryset_de_vista(SalonViewSet, request))
+    except ValidationError as e:
+        return respuesta_json(e.detail, status=400)
+    except PaginaInvalida as e:
+        return respuesta_json({'error': str(e)}, status=404)
+    datos = {**paginacion, 'results': await _serializar_salones(request, salones)}
+    await cache.aset(clave, datos)
+    return respuesta_json(datos)
+
+
+async def disponibles(request):
+    """Salones libres en una franja (mismos parámetros que /api/salones/disponibles/)"""
+    try:
+        consulta = buscar_desde_parametros(request.GET, Salon.objects.all())
+    except BusquedaInvalida as e:
+        return respuesta_json({'error': str(e)}, status=400)
+    salones = [salon async for salon in consulta]
+    return respuesta_json(await _serializar_salones(request, salones))
+
+
+async def horario(request, pk):
+    """Horario del día (?fecha=, ?granularidad=) de un salón"""
+    salon = await Salon.objects.filter(pk=pk).only('bloque', 'hora_apertura', 'hora_cierre').afirst()
+    if salon is None:
+        return respuesta_json({'error': 'Salón no encontrado'}, status=404)
+    fecha = resolver_fecha(request)
+    horarios = await aconstruir_horarios([salon], fecha, resolver_granularidad(request))
+    return respuesta_json({'salon': pk, 'fecha': fecha, 'schedule': horarios[pk]})
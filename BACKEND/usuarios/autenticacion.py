@@ -0,0 +1,235 @@
+"""
+Autenticación por token con caché: resuelve `request.user` sin consultar la
+base de datos en cada petición.
+
+TokenAuthentication de DRF busca el token y su usuario (un JOIN) en cada
+petición autenticada. Aquí el resultado se guarda en un LRU en memoria con
+vencimiento (AUTH_TOKEN_CACHE_MAXIMO entradas, AUTH_TOKEN_CACHE_TTL
+segundos) y se mantiene coherente así:
+
+- Dentro del proceso, las señales de Token y Usuario (usuarios.signals)
+  descartan las entradas del token eliminado (logout) o del usuario
+  guardado o eliminado (por ejemplo al desactivarlo).
+- Con AUTH_TOKEN_CACHE_COMPARTIDO=True (por defecto con CACHE_BACKEND=file)
+  el LRU se respalda en el caché `default` y cada entrada recuerda el token
+  de versión de su usuario, que cambia con esas mismas señales (también al
+  eliminar uno de sus tokens) en cualquier proceso; si no coincide, la
+  entrada se vuelve a cargar. Con varios procesos y el caché de archivo,
+  así un logout llega a todos de inmediato. En el caché compartido no se
+  guardan el token ni el usuario completos (el caché de archivo está en
+  disco), sino la fecha del token y los CAMPOS_USUARIO; el resto del usuario
+  se lee de la base de datos solo si una vista lo usa, y el hash de la
+  contraseña nunca sale de ella.
+- Los cambios que no emiten señales (QuerySet.update) se ven al vencer la
+  entrada.
+
+Cada petición recibe una copia del token y del usuario guardados, de modo
+que lo que una vista les agregue no pasa a la siguiente.
+"""
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+PREFIJO = 'usuarios'
+# Campos del usuario que se guardan en el caché compartido: los que usan la
+# autenticación y los permisos en cada petición
+CAMPOS_USUARIO = ('id', 'username', 'first_name', 'last_name', 'rol', 'is_active', 'is_staff', 'is_superuser')
+
+_entradas = OrderedDict()
+_lock = threading.Lock()
+# Aumenta con cada descarte: lo cargado antes de uno no se guarda, porque
+# podría ser el token que se acaba de eliminar
+_descartes = 0
+
+
+def _maximo():
+    return getattr(settings, 'AUTH_TOKEN_CACHE_MAXIMO', 10000)
+
+
+def _ttl():
+    return getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300)
+
+
+def compartido():
+    """Si el LRU se respalda en el caché compartido (consultarlo hace E/S)"""
+    return getattr(settings, 'AUTH_TOKEN_CACHE_COMPARTIDO', False) and not isinstance(
+        caches['default'], DummyCache
+    )
+
+
+def _clave_token(clave):
+    # La clave del token es una credencial: en el caché compartido va su hash
+    return f'{PREFIJO}:token:{hashlib.sha256(clave.encode()).hexdigest()}'
+
+
+def _clave_version(usuario_id):
+    return f'{PREFIJO}:v:usuario:{usuario_id}'
+
+
+def _version(usuario_id):
+    """Token de versión del usuario en el caché compartido; se crea uno si no existe"""
+    clave = _clave_version(usuario_id)
+    version = cache.get(clave)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() evita pisar un token creado por otro proceso al mismo tiempo
+        if not cache.add(clave, version, timeout=None):
+            version = cache.get(clave, version)
+    return version
+
+
+def _a_compartido(token, version):
+    return (version, token.created, {campo: getattr(token.user, campo) for campo in CAMPOS_USUARIO})
+
+
+def _instancia(modelo, datos):
+    # from_db() recibe los valores en el orden de los campos del modelo; los
+    # que faltan quedan diferidos (se leen de la base de datos al usarlos)
+    campos = [f.attname for f in modelo._meta.concrete_fields if f.attname in datos]
+    return modelo.from_db(DEFAULT_DB_ALIAS, campos, [datos[campo] for campo in campos])
+
+
+def _de_compartido(clave, guardado):
+    """Reconstruir (token, versión) de lo guardado en el caché compartido"""
+    # Importación dentro de la función: los modelos no están listos al
+    # cargar la configuración de DRF
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    version, creado, datos = guardado
+    usuario = _instancia(get_user_model(), datos)
+    token = _instancia(Token, {'key': clave, 'user_id': usuario.pk, 'created': creado})
+    token.user = usuario
+    return token, version
+
+
+def _copia(token):
+    token = copy.copy(token)
+    token.user = copy.copy(token.user)
+    return token
+
+
+def buscar(clave):
+    """Token guardado (con su usuario) de `clave`, o None si no está o venció"""
+    ahora = time.monotonic()
+    with _lock:
+        entrada = _entradas.get(clave)
+        if entrada is not None and entrada[1] <= ahora:
+            del _entradas[clave]
+            entrada = None
+        if entrada is not None:
+            _entradas.move_to_end(clave)
+    if not compartido():
+        return _copia(entrada[0]) if entrada else None
+
+    if entrada is not None and entrada[2] == _version(entrada[0].user_id):
+        return _copia(entrada[0])
+    guardado = cache.get(_clave_token(clave))
+    if guardado is None:
+        return None
+    token, version = _de_compartido(clave, guardado)
+    if version != _version(token.user_id):
+        return None
+    _guardar_local(clave, token, version)
+    return _copia(token)
+
+
+def _guardar_local(clave, token, version=None):
+    with _lock:
+        _entradas[clave] = (token, time.monotonic() + _ttl(), version)
+        _entradas.move_to_end(clave)
+        while len(_entradas) > _maximo():
+            _entradas.popitem(last=False)
+
+
+def guardar(token, descartes=None):
+    """
+    Guardar un token recién cargado de la base de datos (con token.user).
+    `descartes` es el valor de _descartes antes de la consulta.
+    """
+    if descartes is not None and descartes != _descartes:
+        return
+    token = _copia(token)
+    version = None
+    if compartido():
+        version = _version(token.user_id)
+        cache.set(_clave_token(token.key), _a_compartido(token, version), timeout=_ttl())
+    _guardar_local(token.key, token, version)
+
+
+def descartar(clave, usuario_id=None):
+    """
+    Quitar un token (por ejemplo al cerrar sesión). En modo compartido se
+    renueva además el token de versión de su usuario (`usuario_id`), para que
+    los demás procesos no sigan aceptando la copia de su LRU local.
+    """
+    global _descartes
+    with _lock:
+        _descartes += 1
+        entrada = _entradas.pop(clave, None)
+    if compartido():
+        cache.delete(_clave_token(clave))
+        if usuario_id is None and entrada is not None:
+            usuario_id = entrada[0].user_id
+        if usuario_id is not None:
+            cache.set(_clave_version(usuario_id), uuid.uuid4().hex, timeout=None)
+
+
+def descartar_usuario(usuario_id):
+    """Quitar los tokens de un usuario guardado, desactivado o eliminado"""
+    global _descartes
+    with _lock:
+        _descartes += 1
+        for clave in [c for c, (token, _, _) in _entradas.items() if token.user_id == usuario_id]:
+            del _entradas[clave]
+    if compartido():
+        cache.set(_clave_version(usuario_id), uuid.uuid4().hex, timeout=None)
+
+
+def limpiar():
+    global _descartes
+    with _lock:
+        _descartes += 1
+        _entradas.clear()
+
+
+def autenticar(clave):
+    """
+    Token válido de `clave` con su usuario activo, desde el caché o (una sola
+    consulta) desde la base de datos. Lanza AuthenticationFailed si no existe
+    o el usuario está inactivo.
+    """
+    token = buscar(clave)
+    if token is None:
+        descartes = _descartes
+        # Importación dentro de la función: los modelos no están listos al
+        # cargar la configuración de DRF
+        from rest_framework.authtoken.models import Token
+
+        try:
+            token = Token.objects.select_related('user').get(key=clave)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        guardar(token, descartes)
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication que resuelve el token desde el caché (ver módulo)"""
+
+    def authenticate_credentials(self, key):
+        token = autenticar(key)
+        return (token.user, token)
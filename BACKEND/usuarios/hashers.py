@@ -0,0 +1,47 @@
+"""
+Hashers de contraseñas con costo configurable.
+
+PASSWORD_HASHER elige el algoritmo con el que se guardan las contraseñas
+nuevas y PASSWORD_COSTO su factor de trabajo (iteraciones de PBKDF2, N de
+scrypt, time_cost de Argon2 o rondas de bcrypt); sin PASSWORD_COSTO se usa
+el valor por defecto de Django. Los demás algoritmos quedan disponibles para
+verificar contraseñas guardadas antes, y Django vuelve a calcular el hash
+con el algoritmo y el costo actuales en el siguiente login correcto
+(check_password con setter), sin pedirle nada al usuario.
+
+Argon2 y bcrypt necesitan argon2-cffi y bcrypt instalados.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _costo(hasher, defecto):
+    # El costo configurado es el del algoritmo preferido; los demás solo verifican
+    if getattr(settings, 'PASSWORD_HASHER', 'pbkdf2_sha256') != hasher.algorithm:
+        return defecto
+    return getattr(settings, 'PASSWORD_COSTO', None) or defecto
+
+
+class PBKDF2Hasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _costo(self, hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _costo(self, hashers.ScryptPasswordHasher.work_factor)
+
+
+class Argon2Hasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _costo(self, hashers.Argon2PasswordHasher.time_cost)
+
+
+class BCryptSHA256Hasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return _costo(self, hashers.BCryptSHA256PasswordHasher.rounds)
+
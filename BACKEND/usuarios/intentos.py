@@ -0,0 +1,64 @@
+"""
+Límite de intentos fallidos de login por usuario y por IP.
+
+Solo cuentan los intentos fallidos, de modo que un aula entera que inicia
+sesión a la vez desde la misma IP no se bloquea. Los contadores son de
+ventana fija (LOGIN_VENTANA segundos) en el caché `login`, en memoria del
+proceso: consultarlos no cuesta E/S y un intento bloqueado no llega a
+calcular el hash de la contraseña.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+def _cache():
+    return caches['login']
+
+
+def _ventana():
+    return getattr(settings, 'LOGIN_VENTANA', 300)
+
+
+def ip_de(request):
+    """IP del cliente (respeta NUM_PROXIES de DRF, como sus throttles)"""
+    return BaseThrottle().get_ident(request)
+
+
+def _claves(request, username):
+    """[(clave del contador, límite)] del usuario y de la IP en la ventana actual"""
+    ventana = int(time.time() // _ventana())
+    # Sin distinguir mayúsculas, para que variar el nombre no evada el límite
+    usuario = hashlib.sha256(username.strip().lower().encode()).hexdigest()
+    return [
+        (f'login:fallos:usuario:{usuario}:{ventana}', getattr(settings, 'LOGIN_FALLOS_USUARIO', 5)),
+        (f'login:fallos:ip:{ip_de(request)}:{ventana}', getattr(settings, 'LOGIN_FALLOS_IP', 50)),
+    ]
+
+
+def espera(request, username):
+    """Segundos que faltan para volver a intentar, o 0 si el intento se permite"""
+    claves = _claves(request, username)
+    fallos = _cache().get_many([clave for clave, _ in claves])
+    if any(fallos.get(clave, 0) >= limite for clave, limite in claves):
+        return int(_ventana() - time.time() % _ventana()) + 1
+    return 0
+
+
+def registrar_fallo(request, username):
+    cache = _cache()
+    for clave, _ in _claves(request, username):
+        # add() crea el contador con la duración de la ventana; incr() es atómico en locmem
+        cache.add(clave, 0, timeout=_ventana())
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=_ventana())
+
+
+def limpiar(request, username):
+    """Reiniciar los fallos del usuario tras un login correcto (los de la IP se mantienen)"""
+    clave, _ = _claves(request, username)[0]
+    _cache().delete(clave)
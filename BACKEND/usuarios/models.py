@@ -13,11 +13,17 @@ class Usuario(AbstractUser):
     telefono = models.CharField(max_length=20, blank=True, null=True)
     documento = models.CharField(max_length=20, unique=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Validador de las respuestas que embeben al usuario (ETag de reservas)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Paginación por cursor sobre (-fecha_creacion, id)
+            models.Index(fields=['-fecha_creacion', 'id'], name='usuario_orden_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.rol})"
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from gecos_backend.campos import CamposDinamicosMixin
 from .models import Usuario
 
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Usuario"""
     
     class Meta:
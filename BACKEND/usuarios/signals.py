@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .models import Usuario
+from . import autenticacion
+
+
+@receiver(post_delete, sender=Token)
+def descartar_token(sender, instance, **kwargs):
+    """Quitar del caché de autenticación el token eliminado (logout)"""
+    autenticacion.descartar(instance.key, instance.user_id)
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def descartar_tokens_usuario(sender, instance, **kwargs):
+    """Quitar del caché los tokens de un usuario modificado (rol, desactivación) o eliminado"""
+    autenticacion.descartar_usuario(instance.pk)
@@ -1,3 +1,179 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .models import Usuario
+from . import autenticacion
+from .hashers import PBKDF2Hasher
 
-# Create your tests here.
+
+class AutenticacionCacheTest(TestCase):
+    """Pruebas del caché de autenticación por token"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+
+    def setUp(self):
+        autenticacion.limpiar()
+        cache.clear()
+        self.token = Token.objects.create(user=self.usuario)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_peticiones_repetidas_no_consultan_el_token(self):
+        self.client.get('/api/usuarios/me/')
+        # /me/ solo serializa request.user: sin consultas con el token en caché
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/usuarios/me/')
+        self.assertEqual(response.data['username'], 'docente')
+
+    def test_cada_peticion_recibe_su_copia(self):
+        primero = autenticacion.autenticar(self.token.key)
+        primero.user.first_name = 'Modificado'
+        segundo = autenticacion.autenticar(self.token.key)
+        self.assertEqual(segundo.user.first_name, '')
+        self.assertIsNot(primero.user, segundo.user)
+
+    def test_logout_invalida_el_token(self):
+        self.client.get('/api/usuarios/me/')
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/usuarios/me/').status_code, 401)
+
+    def test_desactivar_usuario_invalida_el_token(self):
+        self.client.get('/api/usuarios/me/')
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertEqual(self.client.get('/api/usuarios/me/').status_code, 401)
+
+    def test_cambio_de_rol_se_ve_en_la_siguiente_peticion(self):
+        self.client.get('/api/usuarios/me/')
+        self.usuario.rol = 'admin'
+        self.usuario.save()
+        self.assertEqual(self.client.get('/api/usuarios/me/').data['rol'], 'admin')
+
+    @override_settings(AUTH_TOKEN_CACHE_MAXIMO=1)
+    def test_lru_acotado(self):
+        otro = Usuario.objects.create_user(username='otro', password='Otro123!', documento='2')
+        otro_token = Token.objects.create(user=otro)
+        autenticacion.autenticar(self.token.key)
+        autenticacion.autenticar(otro_token.key)
+        self.assertIsNone(autenticacion.buscar(self.token.key))
+        self.assertIsNotNone(autenticacion.buscar(otro_token.key))
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=0)
+    def test_entradas_vencidas(self):
+        autenticacion.autenticar(self.token.key)
+        self.assertIsNone(autenticacion.buscar(self.token.key))
+
+    @override_settings(AUTH_TOKEN_CACHE_COMPARTIDO=True)
+    def test_cache_compartido_entre_procesos(self):
+        autenticacion.autenticar(self.token.key)
+        # Otro proceso: sin LRU local, el token sale del caché compartido
+        autenticacion.limpiar()
+        with self.assertNumQueries(0):
+            token = autenticacion.autenticar(self.token.key)
+        self.assertEqual(token.user, self.usuario)
+        self.assertEqual(token.user.rol, 'docente')
+        # La versión del usuario cambia en cualquier proceso y deja viejo el LRU
+        cache.set(autenticacion._clave_version(self.usuario.pk), 'otra', timeout=None)
+        self.assertIsNone(autenticacion.buscar(self.token.key))
+
+    @override_settings(AUTH_TOKEN_CACHE_COMPARTIDO=True)
+    def test_cache_compartido_sin_hash_de_contrasena(self):
+        self.usuario.email = 'docente@example.com'
+        self.usuario.save()
+        self.client.get('/api/usuarios/me/')
+        guardado = cache.get(autenticacion._clave_token(self.token.key))
+        self.assertNotIn(self.usuario.password, repr(guardado))
+        self.assertNotIn(self.token.key, repr(guardado))
+        # En otro proceso, los campos que no se guardan se leen de la base de datos
+        autenticacion.limpiar()
+        token = autenticacion.autenticar(self.token.key)
+        self.assertEqual(token.user.email, 'docente@example.com')
+        self.assertTrue(token.user.check_password('Docente123!'))
+        autenticacion.limpiar()
+        self.assertEqual(self.client.get('/api/usuarios/me/').data['email'], 'docente@example.com')
+
+    @override_settings(AUTH_TOKEN_CACHE_COMPARTIDO=True)
+    def test_logout_en_otro_proceso(self):
+        self.client.get('/api/usuarios/me/')
+        # Copia del LRU local de otro proceso que ya había autenticado el token
+        otro_proceso = dict(autenticacion._entradas)
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        autenticacion._entradas.update(otro_proceso)
+        self.assertIsNone(autenticacion.buscar(self.token.key))
+        self.assertEqual(self.client.get('/api/usuarios/me/').status_code, 401)
+
+
+@override_settings(LOGIN_FALLOS_USUARIO=3, LOGIN_FALLOS_IP=5)
+class LoginTest(TestCase):
+    """Pruebas del login: un hash por intento, límite de fallos y rehash"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='docente', password='Docente123!', documento='1'
+        )
+
+    def setUp(self):
+        caches['login'].clear()
+        self.client = APIClient()
+
+    def login(self, username='docente', password='Docente123!', ip='10.0.0.1'):
+        return self.client.post(
+            '/api/login/', {'username': username, 'password': password},
+            format='json', REMOTE_ADDR=ip,
+        )
+
+    def test_un_solo_hash_por_intento(self):
+        with mock.patch.object(PBKDF2Hasher, 'encode', wraps=PBKDF2Hasher().encode) as encode:
+            for username in ('docente', 'no_existe'):
+                encode.reset_mock()
+                self.assertEqual(self.login(username, 'incorrecta').status_code, 401)
+                self.assertEqual(encode.call_count, 1)
+
+    def test_login_correcto_devuelve_token(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], Token.objects.get(user=self.usuario).key)
+
+    def test_bloqueo_por_usuario(self):
+        for _ in range(3):
+            self.assertEqual(self.login(password='incorrecta').status_code, 401)
+        # Bloqueado aun con la contraseña correcta, desde otra IP y sin calcular el hash
+        with mock.patch.object(PBKDF2Hasher, 'encode') as encode, self.assertLogs('usuarios.views', 'WARNING'):
+            response = self.login(username='DOCENTE', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        encode.assert_not_called()
+
+    def test_bloqueo_por_ip(self):
+        for i in range(5):
+            self.login(username=f'otro{i}', password='incorrecta')
+        with self.assertLogs('usuarios.views', 'WARNING') as registro:
+            self.assertEqual(self.login().status_code, 429)
+        self.assertEqual(registro.records[0].ip, '10.0.0.1')
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 200)
+
+    def test_login_correcto_reinicia_los_fallos_del_usuario(self):
+        for _ in range(2):
+            self.login(password='incorrecta')
+        self.assertEqual(self.login().status_code, 200)
+        for _ in range(2):
+            self.login(password='incorrecta')
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_rehash_al_cambiar_el_costo(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(
+            password=make_password('Docente123!', hasher='pbkdf2_sha1')
+        )
+        with override_settings(PASSWORD_COSTO=1000):
+            self.assertEqual(self.login().status_code, 200)
+            password = Usuario.objects.get(pk=self.usuario.pk).password
+            self.assertTrue(password.startswith('pbkdf2_sha256$1000$'))
+            self.assertTrue(check_password('Docente123!', password))
@@ -1,11 +1,18 @@
+import logging
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
+from gecos_backend.campos import CamposDinamicosViewSetMixin
+from gecos_backend.paginacion import KeysetPagination
 from .models import Usuario
 from .serializers import UsuarioSerializer, UsuarioCreateSerializer, LoginSerializer
+from . import intentos
+
+
+logger = logging.getLogger(__name__)
 
 
 class IsAdmin(IsAuthenticated):
@@ -14,10 +21,13 @@ class IsAdmin(IsAuthenticated):
         return super().has_permission(request, view) and request.user.rol == 'admin'
 
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar usuarios"""
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
+    pagination_class = KeysetPagination
+    # Orden total para la paginación por cursor (?cursor=)
+    orden_keyset = ('-fecha_creacion', 'id')
     
     def get_permissions(self):
         """Permisos personalizados según la acción"""
@@ -61,31 +71,40 @@ def login_view(request):
     
     username = serializer.validated_data['username']
     password = serializer.validated_data['password']
+    ip = intentos.ip_de(request)
     
-    print(f"DEBUG LOGIN: Intentando login con user='{username}' pass='{password}'")
+    # Un intento bloqueado se rechaza antes de calcular el hash
+    espera = intentos.espera(request, username)
+    if espera:
+        logger.warning('Login bloqueado por intentos fallidos', extra={
+            'evento': 'login_bloqueado', 'usuario': username, 'ip': ip, 'espera': espera,
+        })
+        return Response(
+            {'error': 'Demasiados intentos fallidos. Intente de nuevo más tarde.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(espera)}
+        )
     
-    user = authenticate(username=username, password=password)
+    # Una sola verificación del hash por intento: authenticate() también la
+    # hace (contra un hash ficticio) si el usuario no existe o está inactivo,
+    # y vuelve a calcular el hash si cambió el algoritmo o su costo
+    user = authenticate(request, username=username, password=password)
     
     if not user:
-        # Debugging extra
-        try:
-            u = Usuario.objects.get(username=username)
-            print(f"DEBUG LOGIN: Usuario encontrado. pass_valid={u.check_password(password)}")
-            print(f"DEBUG LOGIN: is_active={u.is_active}")
-        except Usuario.DoesNotExist:
-            print(f"DEBUG LOGIN: Usuario '{username}' NO encontrado en DB.")
-            
-    if user:
-        token, created = Token.objects.get_or_create(user=user)
-        return Response({
-            'token': token.key,
-            'user': UsuarioSerializer(user).data
-        })
-    else:
+        intentos.registrar_fallo(request, username)
+        logger.info('Login fallido', extra={'evento': 'login_fallido', 'usuario': username, 'ip': ip})
         return Response(
             {'error': 'Credenciales inválidas'},
             status=status.HTTP_401_UNAUTHORIZED
         )
+    
+    intentos.limpiar(request, username)
+    token, created = Token.objects.get_or_create(user=user)
+    logger.info('Login correcto', extra={'evento': 'login', 'usuario': username, 'ip': ip})
+    return Response({
+        'token': token.key,
+        'user': UsuarioSerializer(user).data
+    })
 
 
 @api_view(['POST'])
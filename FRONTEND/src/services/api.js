@@ -60,16 +60,32 @@ export default {
     return axios.get(`${API_URL}/reservas/`, { params })
   },
 
+  getMetricasReservas(params = {}) {
+    return axios.get(`${API_URL}/reservas/metricas/`, { params })
+  },
+
+  getCambiosReservas(desde, params = {}) {
+    // Solo lo creado, modificado o eliminado desde `desde`; la respuesta
+    // trae `hasta` para usarlo como `desde` en la siguiente consulta
+    return axios.get(`${API_URL}/reservas/cambios/`, { params: { ...params, desde } })
+  },
+
+  suscribirOcupacion(params = {}) {
+    // Flujo de eventos (SSE) de reservas y ocupación, filtrado por fecha o salón.
+    // EventSource se reconecta solo y reenvía Last-Event-ID
+    const query = new URLSearchParams(params).toString()
+    return new EventSource(`${API_URL}/eventos/ocupacion/${query ? `?${query}` : ''}`)
+  },
+
   getMisReservas() {
     return axios.get(`${API_URL}/reservas/mis_reservas/`)
   },
 
   getReservasPorSalon(salonId) {
-    return axios.get(`${API_URL}/reservas/`, { 
-      params: { 
-        salon: salonId,
-        timestamp: new Date().getTime() // Cache buster
-      } 
+    // El servidor responde con ETag y Cache-Control: no-cache, así que el
+    // navegador revalida cada vez y recibe 304 si no hubo cambios
+    return axios.get(`${API_URL}/reservas/`, {
+      params: { salon: salonId }
     })
   },
 
@@ -77,6 +93,10 @@ export default {
     return axios.post(`${API_URL}/reservas/`, data)
   },
 
+  createReservasRecurrentes(data) {
+    return axios.post(`${API_URL}/reservas/recurrente/`, data)
+  },
+
   cancelarReserva(id) {
     return axios.post(`${API_URL}/reservas/${id}/cancelar/`)
   },